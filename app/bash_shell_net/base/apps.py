@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BaseConfig(AppConfig):
     name = "bash_shell_net.base"
+
+    def ready(self) -> None:
+        from bash_shell_net.base import signals  # noqa: F401
@@ -0,0 +1,16 @@
+from django.core.cache import cache
+
+
+def delete_cache_pattern(pattern: str) -> bool:
+    """
+    Deletes every key in the default cache matching the glob style `pattern` if the cache backend supports it,
+    as django-redis does.
+
+    Returns False when the backend cannot delete by pattern. Callers should be using keys which change or expire
+    on their own as well so that this is not the only thing keeping stale values from being used.
+    """
+    delete_pattern = getattr(cache, "delete_pattern", None)
+    if delete_pattern is None:
+        return False
+    delete_pattern(pattern)
+    return True
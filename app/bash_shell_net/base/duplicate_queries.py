@@ -0,0 +1,100 @@
+"""
+Finds queries which run over and over with different parameters while handling a single request, which is usually a
+template or loop reaching through a relation on each object of a list, the N+1 problem.
+
+DuplicateQueryMiddleware checks every request and logs, or raises DuplicateQueriesError when
+DUPLICATE_QUERIES_RAISE is set, for each query fingerprint which ran more than DUPLICATE_QUERIES_THRESHOLD times.
+It is meant for development and tests and is not in MIDDLEWARE by default. Set DUPLICATE_QUERIES_MIDDLEWARE
+to add it in local settings, or run the tests with --fail-on-duplicate-queries. Tests can also check a block of code
+with DuplicateQueriesTestMixin from bash_shell_net.base.test_utils.
+"""
+
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from django.db import connections
+
+from bash_shell_net.base.instrumentation import fingerprint_sql
+
+# frames from these are left out of the stacks, leaving the code of this site which ran the query
+IGNORED_STACK_PATHS = ("/django/", "/wagtail/", "/modelcluster/", "/treebeard/", "/taggit/", __file__)
+
+
+@dataclass
+class DuplicateQuery:
+    fingerprint: str
+    count: int
+    # where the first few of the queries were run from
+    stacks: list[list[str]] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        lines = [f"{self.count} queries: {self.fingerprint}"]
+        for stack in self.stacks:
+            lines.append("  from:")
+            lines.extend(f"    {frame}" for frame in stack)
+        return "\n".join(lines)
+
+
+class DuplicateQueriesError(Exception):
+    def __init__(self, duplicates: list[DuplicateQuery], description: str = ""):
+        self.duplicates = duplicates
+        message = f"Repeated queries{f' in {description}' if description else ''}:\n"
+        super().__init__(message + "\n".join(str(duplicate) for duplicate in duplicates))
+
+
+def get_stack() -> list[str]:
+    """
+    Returns the current stack as "path:line in function" strings, without the frames of Django and other
+    libraries
+    """
+    return [
+        f"{frame.filename}:{frame.lineno} in {frame.name}"
+        for frame in traceback.extract_stack()
+        if not any(path in frame.filename for path in IGNORED_STACK_PATHS) and "site-packages" not in frame.filename
+    ]
+
+
+class DuplicateQueryDetector:
+    """
+    Context manager which counts the queries run on every database connection by fingerprint while it is active.
+
+        with DuplicateQueryDetector() as detector:
+            response = client.get(url)
+        duplicates = detector.get_duplicates(threshold=2)
+
+    The stacks of the first `stacks_per_query` queries of each fingerprint are kept.
+    """
+
+    def __init__(self, stacks_per_query: int = 2) -> None:
+        self.stacks_per_query = stacks_per_query
+        self.counts: Counter[str] = Counter()
+        self.stacks: dict[str, list[list[str]]] = {}
+        self._exit_stack = ExitStack()
+
+    def __enter__(self) -> "DuplicateQueryDetector":
+        for connection in connections.all():
+            self._exit_stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._exit_stack.close()
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+        fingerprint = fingerprint_sql(sql)
+        self.counts[fingerprint] += 1
+        if self.counts[fingerprint] <= self.stacks_per_query:
+            self.stacks.setdefault(fingerprint, []).append(get_stack())
+        return execute(sql, params, many, context)
+
+    def get_duplicates(self, threshold: int) -> list[DuplicateQuery]:
+        """
+        Returns the queries which ran more than `threshold` times, most repeated first
+        """
+        return [
+            DuplicateQuery(fingerprint=fingerprint, count=count, stacks=self.stacks.get(fingerprint, []))
+            for fingerprint, count in self.counts.most_common()
+            if count > threshold
+        ]
@@ -0,0 +1,111 @@
+"""
+Per request timings of SQL, template rendering, and cache use, which RequestInstrumentationMiddleware binds to the
+structlog context so that they are logged with django_structlog's request_finished event.
+
+Only the requests picked by REQUEST_INSTRUMENTATION_SAMPLE_RATE are measured. For every other request the helpers
+here find no RequestStats for the current context and return without doing anything.
+"""
+
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable
+
+# the stats of the request being measured in this context, if it was sampled
+_current_stats: ContextVar["RequestStats | None"] = ContextVar("request_stats", default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint_sql(sql: str) -> str:
+    """
+    Returns `sql` with the literal values and parameter placeholders replaced with ?, and lists of them collapsed to
+    a single (...), so that queries which only differ by their parameters have the same fingerprint.
+    """
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _PLACEHOLDER_LIST_RE.sub("(...)", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+@dataclass
+class RequestStats:
+    query_count: int = 0
+    sql_ms: float = 0
+    slowest_query_ms: float = 0
+    slowest_query_sql: str = ""
+    template_ms: float = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def as_log_context(self) -> dict[str, Any]:
+        return {
+            "sql_query_count": self.query_count,
+            "sql_ms": round(self.sql_ms, 3),
+            "sql_slowest_query_ms": round(self.slowest_query_ms, 3),
+            # the sql is only fingerprinted for the slowest query of the request, once it is known
+            "sql_slowest_query": fingerprint_sql(self.slowest_query_sql) if self.slowest_query_sql else None,
+            "template_ms": round(self.template_ms, 3),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
+
+
+def start_request_stats() -> RequestStats:
+    """
+    Starts measuring the current request
+    """
+    stats = RequestStats()
+    _current_stats.set(stats)
+    return stats
+
+
+def stop_request_stats() -> None:
+    _current_stats.set(None)
+
+
+def get_request_stats() -> RequestStats | None:
+    """
+    Returns the stats of the request being measured in this context, or None if it is not measured
+    """
+    return _current_stats.get()
+
+
+def record_cache_lookups(hits: int = 0, misses: int = 0) -> None:
+    """
+    Counts cache lookups for the current request. The site's own caches call this after every lookup.
+    """
+    if (stats := _current_stats.get()) is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+def record_template_render(elapsed_ms: float) -> None:
+    if (stats := _current_stats.get()) is not None:
+        stats.template_ms += elapsed_ms
+
+
+def sql_timing_wrapper(execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]) -> Any:
+    """
+    Database execute wrapper which adds the time and count of every query to the current RequestStats.
+    See https://docs.djangoproject.com/en/stable/topics/db/instrumentation/
+    """
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats.query_count += 1
+        stats.sql_ms += elapsed_ms
+        if elapsed_ms > stats.slowest_query_ms:
+            stats.slowest_query_ms = elapsed_ms
+            stats.slowest_query_sql = sql
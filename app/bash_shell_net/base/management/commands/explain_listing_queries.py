@@ -0,0 +1,97 @@
+import re
+from typing import Iterator
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import QuerySet
+
+from bash_shell_net.blog.models import BlogPage, BlogPageIndex
+from bash_shell_net.on_tap.models import BatchLogPage, OnTapPage, RecipePage
+
+# plan nodes which read from an index
+INDEX_NODE_RE = re.compile(r"(Index Only Scan|Index Scan|Bitmap Index Scan)(?: Backward)?(?: using| on) (\S+)")
+
+# the indexes added for the listings by blog 0012 and on_tap 0017
+PAGE_LIVE_PUBLISHED_INDEX = "wagtailcore_page_live_published_idx"
+RECORD_BATCH_DATES_INDEX = "on_tap_record_batch_dates_idx"
+RECORD_CURRENT_INDEX = "on_tap_record_current_idx"
+RECORD_NEVER_INDEX = "on_tap_record_never_idx"
+
+
+def get_listing_queries() -> Iterator[tuple[str, QuerySet, tuple[str, ...]]]:
+    """
+    Yields a name, the QuerySet, and the names of the indexes which the query should use any of, for each of the
+    queries behind the blog and on tap listings and the sitemaps. The queries for a listing page are only included
+    if there is a page of that type.
+    """
+    if blog_index_page := BlogPageIndex.objects.live().first():
+        paginator = blog_index_page.get_posts_paginator()
+        first_page = paginator.page()
+        yield "blog index first page", paginator.get_page_queryset(), (PAGE_LIVE_PUBLISHED_INDEX,)
+        if first_page.object_list:
+            yield (
+                "blog index next page",
+                paginator.get_page_queryset(after=first_page.object_list[-1]),
+                (PAGE_LIVE_PUBLISHED_INDEX,),
+            )
+
+    if on_tap_page := OnTapPage.objects.live().first():
+        yield "on tap dashboard", on_tap_page.get_dashboard_batches(), (RECORD_BATCH_DATES_INDEX, RECORD_CURRENT_INDEX)
+        yield "on tap current batches", on_tap_page.get_on_tap_batches(), (RECORD_CURRENT_INDEX,)
+        yield "on tap upcoming batches", on_tap_page.get_upcoming_batches(), (RECORD_BATCH_DATES_INDEX,)
+        paginator, _page = on_tap_page.paginate(on_tap_page.get_past_batches())
+        yield (
+            "on tap past batches",
+            paginator.get_page_queryset(),
+            (RECORD_BATCH_DATES_INDEX, RECORD_NEVER_INDEX),
+        )
+
+    # the same as the items() of the sitemaps in config/sitemaps.py
+    sitemap_index = (PAGE_LIVE_PUBLISHED_INDEX,)
+    yield "blog sitemap", BlogPage.objects.live().public().order_by("-first_published_at"), sitemap_index
+    yield "on tap sitemap", OnTapPage.objects.live().public().order_by("-first_published_at"), sitemap_index
+    yield "batch log sitemap", BatchLogPage.objects.live().public().order_by("-first_published_at"), sitemap_index
+    yield "recipe sitemap", RecipePage.objects.live().public().order_by("-first_published_at"), sitemap_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN on the queries behind the blog and on tap listings and the sitemaps and fails if any of them "
+        "does not use the index added for it. With only a few rows Postgres will prefer sequential scans, so use "
+        "--disable-seqscan to see which indexes would be used on a larger database."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--disable-seqscan",
+            action="store_true",
+            help="Discourage sequential scans with SET LOCAL enable_seqscan = off while explaining",
+        )
+        parser.add_argument("--show-plans", action="store_true", help="Print the full plan of every query")
+
+    def handle(self, *args, **options) -> None:
+        if connection.vendor != "postgresql":
+            raise CommandError("explain_listing_queries only supports PostgreSQL")
+
+        without_index = []
+        with transaction.atomic():
+            if options["disable_seqscan"]:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset, expected_indexes in get_listing_queries():
+                plan = queryset.explain()
+                # a scan of some other index, such as a primary key for a join, does not count
+                indexes = sorted({match.group(2) for match in INDEX_NODE_RE.finditer(plan)})
+                if set(indexes) & set(expected_indexes):
+                    self.stdout.write(f"{name}: uses {', '.join(indexes)}")
+                else:
+                    without_index.append(name)
+                    self.stdout.write(
+                        f"{name}: does not use {' or '.join(expected_indexes)}, uses {', '.join(indexes) or 'no index'}"
+                    )
+                if options["show_plans"]:
+                    self.stdout.write(plan)
+
+        if without_index:
+            raise CommandError(f"Queries not using their index: {', '.join(without_index)}")
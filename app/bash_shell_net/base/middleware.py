@@ -0,0 +1,131 @@
+import random
+import time
+from contextlib import ExitStack
+from typing import Callable
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.template.response import SimpleTemplateResponse
+
+import structlog
+
+from bash_shell_net.base.duplicate_queries import DuplicateQueriesError, DuplicateQueryDetector
+from bash_shell_net.base.instrumentation import (
+    get_request_stats,
+    record_template_render,
+    sql_timing_wrapper,
+    start_request_stats,
+    stop_request_stats,
+)
+from bash_shell_net.base.page_cache import (
+    cache_response,
+    get_cached_response,
+    is_cacheable_request,
+    is_cacheable_response,
+)
+
+logger = structlog.get_logger(__name__)
+
+
+class PageCacheMiddleware:
+    """
+    Serves anonymous visitors cached responses of the pages and views which allow it, and caches them when there
+    is not one yet. See bash_shell_net.base.page_cache.
+
+    This must come after csp.middleware.CSPMiddleware so that the nonce used in the html of cached responses is the
+    nonce django-csp puts in the Content-Security-Policy header.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not is_cacheable_request(request):
+            return self.get_response(request)
+
+        if (cached_response := get_cached_response(request)) is not None:
+            return cached_response
+
+        response = self.get_response(request)
+        if is_cacheable_response(request, response):
+            cache_response(request, response)
+        return response
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Measures the SQL queries, template rendering, and cache lookups of a sample of requests and binds them to the
+    structlog context, where django_structlog's request_finished event picks them up. See
+    bash_shell_net.base.instrumentation.
+
+    REQUEST_INSTRUMENTATION_SAMPLE_RATE is the fraction of requests measured, from 0 for none to 1 for every request.
+    This must come after django_structlog.middlewares.RequestMiddleware so that the stats are bound before it logs
+    request_finished.
+
+    Template rendering is only timed for responses rendered after the view returns, such as TemplateResponse from
+    wagtail pages and class based views. Templates rendered inside a view count towards the time of the view.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        sample_rate = settings.REQUEST_INSTRUMENTATION_SAMPLE_RATE
+        if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+            return self.get_response(request)
+
+        stats = start_request_stats()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sql_timing_wrapper))
+                response = self.get_response(request)
+        finally:
+            stop_request_stats()
+
+        structlog.contextvars.bind_contextvars(**stats.as_log_context())
+        return response
+
+    def process_template_response(
+        self, request: HttpRequest, response: SimpleTemplateResponse
+    ) -> SimpleTemplateResponse:
+        if get_request_stats() is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda _response: record_template_render((time.perf_counter() - start) * 1000)
+            )
+        return response
+
+
+class DuplicateQueryMiddleware:
+    """
+    Logs the queries which ran more than DUPLICATE_QUERIES_THRESHOLD times with different parameters during a request,
+    along with where they were run from, or raises DuplicateQueriesError if DUPLICATE_QUERIES_RAISE is set.
+    See bash_shell_net.base.duplicate_queries.
+
+    Paths starting with any of DUPLICATE_QUERIES_IGNORED_PATHS, such as the wagtail admin, are not checked. This
+    keeps a stack for the queries it sees, so it is for development and tests rather than production.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if request.path.startswith(tuple(settings.DUPLICATE_QUERIES_IGNORED_PATHS)):
+            return self.get_response(request)
+
+        with DuplicateQueryDetector() as detector:
+            response = self.get_response(request)
+
+        if duplicates := detector.get_duplicates(settings.DUPLICATE_QUERIES_THRESHOLD):
+            if settings.DUPLICATE_QUERIES_RAISE:
+                raise DuplicateQueriesError(duplicates, f"{request.method} {request.get_full_path()}")
+            for duplicate in duplicates:
+                logger.warning(
+                    "duplicate_queries",
+                    fingerprint=duplicate.fingerprint,
+                    count=duplicate.count,
+                    stacks=duplicate.stacks,
+                )
+        return response
@@ -8,6 +8,8 @@ from django.http import Http404, HttpResponse, HttpResponseRedirect
 
 from wagtail.models import Page
 
+from bash_shell_net.base.page_cache import mark_child_page_uncacheable
+
 
 class WagtailPage(Protocol):
     pk: Any
@@ -56,6 +58,8 @@ class IdAndSlugUrlIndexMixin:
             return HttpResponseRedirect(
                 self.url + self.reverse_subpage(self.get_id_and_slug_url_name(), kwargs={"id": id, "slug": page.slug})
             )
+        # the before_serve_page hooks only saw this index page, so the page actually being served is checked too
+        mark_child_page_uncacheable(request, page)
         # or return blog_page.serve(request, *args, **kwargs) ??
         return page.serve(request, *args, **kwargs)
 
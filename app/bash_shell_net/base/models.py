@@ -39,6 +39,7 @@ class Homepage(BlogPageIndexMixin, Page):
     # then it basically breaks everything, because everything needs to be a child
     # of that.
     template = "base/homepage.html"
+    full_page_cache = True
 
     # subpage_types = ['BlogPost']
 
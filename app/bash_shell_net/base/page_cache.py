@@ -0,0 +1,254 @@
+"""
+Full page caching of responses for anonymous visitors.
+
+Only responses which opted in are cached. Wagtail pages opt in by setting `full_page_cache = True` on the page
+model, which the before_serve_page hook in wagtail_hooks.py checks, and other views opt in with the
+`full_page_cache` decorator. Cached pages are kept until they expire or are purged when a page is published or
+unpublished.
+
+Every path has a generation token in the cache, which is part of the keys of the responses cached for that path
+with any query string. Purging a path just deletes its generation token, so the cache backend does not need to
+support deleting by pattern. Only the query string parameters in PAGE_CACHE_QUERY_PARAMS are part of the keys, so
+that parameters the pages ignore, such as tracking parameters, do not each cache another copy of a page.
+
+django-csp gives every response a new nonce, so the nonce of the response being cached is cut out of the html and
+a new nonce is put in its place each time the cached html is served. The headers set by the view, such as
+X-Robots-Tag or Last-Modified, are cached with the html. Headers which the middleware outside of
+PageCacheMiddleware sets for each response, or which belong to a single visitor, are not.
+"""
+
+import functools
+import hashlib
+import uuid
+from typing import Any, Callable, Iterable
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+
+from wagtail.models import Page, ReferenceIndex
+
+from bash_shell_net.base.instrumentation import record_cache_lookups
+
+PAGE_CACHE_PREFIX = "base:page_cache"
+
+# request attribute set by views whose responses may be cached
+REQUEST_ATTRIBUTE = "full_page_cache"
+
+# lowercase names of the response headers which are not cached with a response
+UNCACHED_HEADERS = {
+    "content-length",
+    "content-security-policy",
+    "content-security-policy-report-only",
+    "set-cookie",
+    "vary",
+    "x-page-cache",
+}
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def generation_cache_key(path: str) -> str:
+    """
+    Cache key of the generation token for `path`, which should not include the query string
+    """
+    return f"{PAGE_CACHE_PREFIX}:generation:{_hash(path)}"
+
+
+def page_cache_key(generation: str, cache_path: str) -> str:
+    """
+    Cache key of the response for `cache_path`, from get_cache_path(), in the generation `generation`
+    """
+    return f"{PAGE_CACHE_PREFIX}:page:{generation}:{_hash(cache_path)}"
+
+
+def get_cache_path(request: HttpRequest) -> str:
+    """
+    Returns the path of `request` with only the query string parameters in PAGE_CACHE_QUERY_PARAMS, sorted by name
+    """
+    params = sorted(
+        (
+            (name, value)
+            for name, values in request.GET.lists()
+            if name in settings.PAGE_CACHE_QUERY_PARAMS
+            for value in values
+        ),
+        # the values of a parameter keep their order, since views use the last one
+        key=lambda param: param[0],
+    )
+    return f"{request.path}?{urlencode(params)}" if params else request.path
+
+
+def mark_cacheable(request: HttpRequest) -> None:
+    """
+    Allows the response to `request` to be cached if it is also an anonymous GET which gets a plain 200 response
+    """
+    setattr(request, REQUEST_ATTRIBUTE, True)
+
+
+def mark_child_page_uncacheable(request: HttpRequest, page: Page) -> None:
+    """
+    For index pages which serve their child pages from their own routes. The before_serve_page hook only saw the
+    index page, whose view restrictions cover its ancestors, so the child page being served is checked here and
+    stops the response from being cached if its model does not allow it or it has view restrictions of its own.
+    Aliases use the restrictions of the page they are an alias of and are never cached this way.
+    """
+    if not getattr(request, REQUEST_ATTRIBUTE, False):
+        return
+    if not getattr(page, "full_page_cache", False) or page.alias_of_id or page.view_restrictions.exists():
+        setattr(request, REQUEST_ATTRIBUTE, False)
+
+
+def full_page_cache(view_func: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+    """
+    Decorator for views, other than wagtail pages, whose responses can be cached by PageCacheMiddleware
+    """
+
+    @functools.wraps(view_func)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        mark_cacheable(request)
+        return view_func(request, *args, **kwargs)
+
+    return wrapper
+
+
+def is_cacheable_request(request: HttpRequest) -> bool:
+    """
+    Whether a cached response may be served for `request`
+    """
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if getattr(request, "is_preview", False):
+        return False
+    user = getattr(request, "user", None)
+    return user is None or not user.is_authenticated
+
+
+def is_cacheable_response(request: HttpRequest, response: HttpResponse) -> bool:
+    """
+    Whether `response` to `request` may be cached and served to other anonymous visitors
+    """
+    if request.method != "GET" or not getattr(request, REQUEST_ATTRIBUTE, False):
+        return False
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    # a csrf token in the html would not match the csrf cookie of anyone else
+    if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return False
+    cache_control = response.get("Cache-Control", "")
+    return "private" not in cache_control and "no-store" not in cache_control
+
+
+def get_csp_nonce(request: HttpRequest) -> str | None:
+    """
+    Returns the nonce of `request` if something used it. Checking does not create one.
+    """
+    nonce = getattr(request, "_csp_nonce", None)
+    return nonce if isinstance(nonce, str) else None
+
+
+def get_cached_response(request: HttpRequest) -> HttpResponse | None:
+    """
+    Returns the cached response for `request`, with a nonce for this request in place of the nonce of the request
+    it was cached from, or None if there is not one.
+    """
+    generation = cache.get(generation_cache_key(request.path))
+    if generation is None:
+        record_cache_lookups(misses=1)
+        return None
+    cached: dict[str, Any] | None = cache.get(page_cache_key(generation, get_cache_path(request)))
+    if cached is None:
+        record_cache_lookups(misses=1)
+        return None
+    record_cache_lookups(hits=1)
+
+    parts = cached["parts"]
+    if len(parts) > 1:
+        # using the nonce makes django-csp add it to the Content-Security-Policy header
+        content = str(request.csp_nonce).join(parts)  # type: ignore[attr-defined]
+    else:
+        content = parts[0]
+    response = HttpResponse(content, content_type=cached["content_type"])
+    # responses cached before the headers were stored with them have none
+    for name, value in cached.get("headers", []):
+        response[name] = value
+    response["X-Page-Cache"] = "HIT"
+    return response
+
+
+def cache_response(request: HttpRequest, response: HttpResponse) -> None:
+    """
+    Caches `response` to serve for later requests to the same path and PAGE_CACHE_QUERY_PARAMS
+    """
+    generation_key = generation_cache_key(request.path)
+    # add() so that a token created by another request at the same time is not replaced
+    cache.add(generation_key, uuid.uuid4().hex, settings.PAGE_CACHE_TIMEOUT)
+    generation = cache.get(generation_key)
+    if generation is None:
+        return
+
+    content = response.content.decode(response.charset)
+    nonce = get_csp_nonce(request)
+    cache.set(
+        page_cache_key(generation, get_cache_path(request)),
+        {
+            "parts": content.split(nonce) if nonce else [content],
+            "content_type": response["Content-Type"],
+            "headers": [(name, value) for name, value in response.items() if name.lower() not in UNCACHED_HEADERS],
+        },
+        settings.PAGE_CACHE_TIMEOUT,
+    )
+
+
+def purge_paths(paths: Iterable[str]) -> None:
+    """
+    Drops the cached responses for `paths`, for every query string
+    """
+    cache.delete_many([generation_cache_key(path) for path in set(paths)])
+
+
+def get_page_path(page: Page) -> str | None:
+    """
+    Returns the path `page` is served at, without the site's root url, or None if it is not routable
+    """
+    url_parts = page.get_url_parts()
+    if url_parts is None:
+        return None
+    return url_parts[2]
+
+
+def get_referencing_pages(page: Page) -> list[Page]:
+    """
+    Returns the specific live pages which link to or otherwise reference `page`, according to wagtail's reference
+    index
+    """
+    referencing_page_ids = (
+        ReferenceIndex.get_references_to(page)
+        .filter(base_content_type=ContentType.objects.get_for_model(Page))
+        .values_list("object_id", flat=True)
+    )
+    return list(Page.objects.filter(pk__in=list(referencing_page_ids)).live().specific())
+
+
+def get_page_purge_paths(page: Page, referencing_pages: list[Page] | None = None) -> set[str]:
+    """
+    Returns the paths to purge when `page` is published or unpublished. That is the page, the pages above it, such
+    as the index pages and the homepage which list it, and the live pages which link to it along with the pages
+    above those. `referencing_pages` are looked up with get_referencing_pages() if they are not given.
+
+    Routes of RoutablePageMixin pages other than the ones to child pages are not included and are only refreshed
+    when they expire.
+    """
+    if referencing_pages is None:
+        referencing_pages = get_referencing_pages(page)
+    pages = [page, *page.get_ancestors().specific()]
+    for referencing_page in referencing_pages:
+        pages += [referencing_page, *referencing_page.get_ancestors().specific()]
+
+    paths = {get_page_path(p) for p in pages if p.depth > 1}
+    paths.update(settings.PAGE_CACHE_SITE_WIDE_PATHS)
+    return {path for path in paths if path}
@@ -0,0 +1,240 @@
+"""
+Keyset, or cursor, pagination.
+
+Rather than counting every row and using OFFSET to get to a page number like django.core.paginator.Paginator,
+each page links to the next and previous pages with a signed token holding the ordering values of the last or first
+item on the page. Fetching any page is then a single query filtered on those values, no matter how deep into
+the list it is.
+"""
+
+import bisect
+import datetime
+import functools
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Callable, Sequence
+
+from django.core import signing
+from django.db.models import Q, QuerySet
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+def _encode_value(value: Any) -> list:
+    # JSON has no date types, so values are tagged with their type to be restored the same way they went in.
+    # The in memory pagination compares them directly, so a date coming back as a string would not work there.
+    if value is None:
+        return ["none", None]
+    if isinstance(value, datetime.datetime):
+        return ["datetime", value.isoformat()]
+    if isinstance(value, datetime.date):
+        return ["date", value.isoformat()]
+    if isinstance(value, Decimal):
+        return ["decimal", str(value)]
+    if isinstance(value, (int, str)):
+        return [type(value).__name__, value]
+    raise TypeError(f"Cannot paginate on values of type {type(value).__name__}")
+
+
+_DECODERS: dict[str, Callable[[Any], Any]] = {
+    "none": lambda value: None,
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "decimal": Decimal,
+    "int": int,
+    "str": str,
+}
+
+
+def _decode_value(value: list) -> Any:
+    type_name, encoded = value
+    return _DECODERS[type_name](encoded)
+
+
+def _compare(a: Any, b: Any) -> int:
+    # Postgres sorts NULL as larger than any value
+    if a == b:
+        return 0
+    if a is None:
+        return 1
+    if b is None:
+        return -1
+    return -1 if a < b else 1
+
+
+def _after_value_q(name: str, value: Any, descending: bool) -> Q | None:
+    # The rows sorting after `value` on a single field, with NULL larger than any value as Postgres sorts it.
+    # None is returned when nothing can sort after it, which is a NULL in ascending order.
+    if descending:
+        return Q(**{f"{name}__isnull": False}) if value is None else Q(**{f"{name}__lt": value})
+    if value is None:
+        return None
+    return Q(**{f"{name}__gt": value}) | Q(**{f"{name}__isnull": True})
+
+
+@dataclass
+class KeysetPage:
+    """
+    A page of results from a KeysetPaginator. This has the parts of django.core.paginator.Page which make sense
+    without page numbers.
+    """
+
+    object_list: list
+    paginator: "KeysetPaginator"
+    has_next: bool
+    has_previous: bool
+    next_cursor: str | None = field(default=None)
+    previous_cursor: str | None = field(default=None)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Paginates a QuerySet or an already sorted list of objects on the fields in `ordering`.
+
+    `ordering` uses the same syntax as QuerySet.order_by(), such as ("-first_published_at", "-id"), and must end in
+    a unique field so that every item has a distinct position. Related fields such as "batch_log_page__brewed_date"
+    are looked up on the objects of the list.
+
+    Lists must already be sorted by `ordering`, with NULLs sorted the way Postgres sorts them. QuerySets are ordered
+    by the paginator, which leaves NULLs where Postgres puts them, after every value in ascending order and before
+    them in descending order.
+    """
+
+    def __init__(self, object_list: QuerySet | Sequence, ordering: Sequence[str], per_page: int, salt: str = ""):
+        self.object_list = object_list
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.salt = f"{__name__}.KeysetPaginator:{salt}"
+
+    def _get_keys(self, obj: Any) -> list:
+        keys = []
+        for field_name in self.ordering:
+            value = obj
+            for attr in field_name.lstrip("-").split("__"):
+                value = getattr(value, attr)
+            keys.append(value)
+        return keys
+
+    def _make_cursor(self, direction: str, keys: list) -> str:
+        return signing.dumps([direction, [_encode_value(value) for value in keys]], salt=self.salt)
+
+    def _read_cursor(self, cursor: str) -> tuple[str, list]:
+        direction, values = signing.loads(cursor, salt=self.salt)
+        if direction not in (NEXT, PREVIOUS) or len(values) != len(self.ordering):
+            raise ValueError("Invalid cursor")
+        return direction, [_decode_value(value) for value in values]
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        """
+        Returns the page following a next cursor or preceding a previous cursor. The first page is returned when
+        there is no cursor or it is not valid, such as from a link to a different list or one which was tampered with.
+        """
+        direction, keys = NEXT, None
+        if cursor:
+            try:
+                direction, keys = self._read_cursor(cursor)
+            except (signing.BadSignature, ValueError, TypeError, KeyError):
+                direction, keys = NEXT, None
+
+        if isinstance(self.object_list, QuerySet):
+            items, has_more = self._get_queryset_items(direction, keys)
+        else:
+            items, has_more = self._get_list_items(direction, keys)
+
+        if direction == NEXT:
+            # anything reached from a cursor has something before it
+            has_next, has_previous = has_more, keys is not None
+        else:
+            has_next, has_previous = True, has_more
+
+        # A cursor past the end of the list, such as when the last items were unpublished, gives an empty page.
+        # Its links then continue from the cursor it was reached by.
+        first_keys = self._get_keys(items[0]) if items else keys
+        last_keys = self._get_keys(items[-1]) if items else keys
+        return KeysetPage(
+            object_list=items,
+            paginator=self,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=self._make_cursor(NEXT, last_keys) if has_next and last_keys is not None else None,
+            previous_cursor=(
+                self._make_cursor(PREVIOUS, first_keys) if has_previous and first_keys is not None else None
+            ),
+        )
+
+    def get_page_queryset(self, after: Any = None) -> QuerySet:
+        """
+        Returns the query page() runs for the first page, or for the page following `after`, an item of the list.
+        This is for looking at the query itself, such as with QuerySet.explain(). Only QuerySets can be used.
+        """
+        keys = None if after is None else self._get_keys(after)
+        return self._get_page_queryset(NEXT, keys)
+
+    def _get_page_queryset(self, direction: str, keys: list | None) -> QuerySet:
+        if not isinstance(self.object_list, QuerySet):
+            raise TypeError("Only QuerySets are paginated with a query")
+        ordering = self.ordering
+        if direction == PREVIOUS:
+            # walk backwards from the cursor and then put the page back in order
+            ordering = tuple(f[1:] if f.startswith("-") else f"-{f}" for f in ordering)
+
+        queryset = self.object_list.order_by(*ordering)
+        if keys is not None:
+            queryset = queryset.filter(self._after_keys_q(ordering, keys))
+        # one more than a page to find out if there is another page
+        return queryset[: self.per_page + 1]
+
+    def _get_queryset_items(self, direction: str, keys: list | None) -> tuple[list, bool]:
+        items = list(self._get_page_queryset(direction, keys))
+        has_more = len(items) > self.per_page
+        items = items[: self.per_page]
+        if direction == PREVIOUS:
+            items.reverse()
+        return items, has_more
+
+    @staticmethod
+    def _after_keys_q(ordering: Sequence[str], keys: list) -> Q:
+        # (a, b, c) after (x, y, z) is a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        # with < in place of > for descending fields
+        q = Q()
+        equal: dict[str, Any] = {}
+        for field_name, value in zip(ordering, keys):
+            name = field_name.lstrip("-")
+            if (after := _after_value_q(name, value, descending=field_name.startswith("-"))) is not None:
+                q |= Q(**equal) & after
+            if value is None:
+                equal[f"{name}__isnull"] = True
+            else:
+                equal[name] = value
+        return q
+
+    def _compare_keys(self, a: list, b: list) -> int:
+        for field_name, a_value, b_value in zip(self.ordering, a, b):
+            if result := _compare(a_value, b_value):
+                return -result if field_name.startswith("-") else result
+        return 0
+
+    def _get_list_items(self, direction: str, keys: list | None) -> tuple[list, bool]:
+        items = list(self.object_list)
+        if keys is None:
+            return items[: self.per_page], len(items) > self.per_page
+
+        sort_key = functools.cmp_to_key(self._compare_keys)
+        item_keys = [sort_key(self._get_keys(item)) for item in items]
+        if direction == NEXT:
+            start = bisect.bisect_right(item_keys, sort_key(keys))
+            return items[start : start + self.per_page], len(items) > start + self.per_page
+
+        end = bisect.bisect_left(item_keys, sort_key(keys))
+        start = max(end - self.per_page, 0)
+        return items[start:end], start > 0
@@ -0,0 +1,21 @@
+from django.dispatch import receiver
+
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished
+
+from bash_shell_net.base.page_cache import get_page_purge_paths, get_referencing_pages, purge_paths
+from bash_shell_net.wagtail_blocks.cache import evict_live_streamfields
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def purge_cached_pages(sender, instance: Page, **kwargs) -> None:
+    """
+    Drop the cached responses which may show `instance` when it is published or unpublished, along with the cached
+    StreamField html of the pages which reference it, since that may show its title or url. Otherwise the purged
+    pages would be rendered again with the old html.
+    """
+    referencing_pages = get_referencing_pages(instance)
+    purge_paths(get_page_purge_paths(instance, referencing_pages))
+    for page in referencing_pages:
+        evict_live_streamfields(page)
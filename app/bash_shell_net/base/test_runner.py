@@ -1,89 +1,138 @@
-"""
-A test runner with slow tests logged. Originally from https://hakibenita.com/timing-tests-in-python-for-fun-and-profit
-and updated to work with Django's DiscoverRunner
-"""
-
-import logging
-import time
-import unittest
-from typing import Any, cast
-from unittest.runner import TextTestResult
-
-from django.test.runner import DiscoverRunner
-
-
-class TimeLoggingTestResult(TextTestResult):
-
-    test_timings: list[tuple[str, float]]
-    _test_started_at: float
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.test_timings = []
-
-    def startTest(self, test):
-        self._test_started_at = time.time()
-        super().startTest(test)
-
-    def addSuccess(self, test):
-        elapsed = time.time() - self._test_started_at
-        name = self.getDescription(test)
-        self.test_timings.append((name, elapsed))
-        super().addSuccess(test)
-
-    def getTestTimings(self) -> list[tuple[str, float]]:
-        return self.test_timings
-
-
-class TimeLoggingTestRunner(unittest.TextTestRunner):
-    stream: Any  # ugh. what is it really?
-    resultclass = TimeLoggingTestResult
-
-    def __init__(self, slow_test_threshold=0.3, *args, **kwargs):
-        self.slow_test_threshold = slow_test_threshold
-        return super().__init__(*args, **kwargs)
-
-    def run(self, test) -> TimeLoggingTestResult:
-        # something is weird here. super().run() returns TestResult
-        # TimeLoggingTestResult is a subclass of TextTestResult which
-        # is a subclass of TestResult yet mypy complains
-        result: TimeLoggingTestResult = cast(TimeLoggingTestResult, super().run(test))
-
-        self.stream.writeln(f"\nSlow Tests (>{self.slow_test_threshold:.03}s):")
-        for name, elapsed in result.getTestTimings():
-            if elapsed > self.slow_test_threshold:
-                self.stream.writeln(f"({elapsed:.03}s) {name}")
-
-        return result
-
-
-class TimedLoggingDiscoverRunner(DiscoverRunner):
-    test_runner = TimeLoggingTestRunner
-
-    @classmethod
-    def add_arguments(self, parser):
-        super().add_arguments(parser)
-        parser.add_argument(
-            "--enable-logging",
-            action="store_true",
-            default=False,
-            help="Enables the python logger",
-        )
-
-    def __init__(self, enable_logging: bool = False, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.enable_logging = enable_logging
-
-    def setup_databases(self, **kwargs):
-        # Force to always delete the database if it exists
-        interactive = self.interactive
-        self.interactive = False
-        try:
-            return super().setup_databases(**kwargs)
-        finally:
-            self.interactive = interactive
-
-    def run_tests(self, *args, **kwargs):
-        if not self.enable_logging:
-            logging.disable(level=logging.CRITICAL)
-        return super().run_tests(*args, **kwargs)
+"""
+A test runner with slow tests logged. Originally from https://hakibenita.com/timing-tests-in-python-for-fun-and-profit
+and updated to work with Django's DiscoverRunner
+"""
+
+import logging
+import time
+import unittest
+from typing import Any, cast
+from unittest.runner import TextTestResult
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+# tests tagged with this are slow and only run with --benchmark or --tag benchmark
+BENCHMARK_TAG = "benchmark"
+DUPLICATE_QUERY_MIDDLEWARE = "bash_shell_net.base.middleware.DuplicateQueryMiddleware"
+
+
+class TimeLoggingTestResult(TextTestResult):
+
+    test_timings: list[tuple[str, float]]
+    _test_started_at: float
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.test_timings = []
+
+    def startTest(self, test):
+        self._test_started_at = time.time()
+        super().startTest(test)
+
+    def addSuccess(self, test):
+        elapsed = time.time() - self._test_started_at
+        name = self.getDescription(test)
+        self.test_timings.append((name, elapsed))
+        super().addSuccess(test)
+
+    def getTestTimings(self) -> list[tuple[str, float]]:
+        return self.test_timings
+
+
+class TimeLoggingTestRunner(unittest.TextTestRunner):
+    stream: Any  # ugh. what is it really?
+    resultclass = TimeLoggingTestResult
+
+    def __init__(self, slow_test_threshold=0.3, *args, **kwargs):
+        self.slow_test_threshold = slow_test_threshold
+        return super().__init__(*args, **kwargs)
+
+    def run(self, test) -> TimeLoggingTestResult:
+        # something is weird here. super().run() returns TestResult
+        # TimeLoggingTestResult is a subclass of TextTestResult which
+        # is a subclass of TestResult yet mypy complains
+        result: TimeLoggingTestResult = cast(TimeLoggingTestResult, super().run(test))
+
+        self.stream.writeln(f"\nSlow Tests (>{self.slow_test_threshold:.03}s):")
+        for name, elapsed in result.getTestTimings():
+            if elapsed > self.slow_test_threshold:
+                self.stream.writeln(f"({elapsed:.03}s) {name}")
+
+        return result
+
+
+class TimedLoggingDiscoverRunner(DiscoverRunner):
+    test_runner = TimeLoggingTestRunner
+
+    @classmethod
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--enable-logging",
+            action="store_true",
+            default=False,
+            help="Enables the python logger",
+        )
+        parser.add_argument(
+            "--benchmark",
+            action="store_true",
+            default=False,
+            help=f"Runs only the tests tagged {BENCHMARK_TAG}, which are otherwise excluded",
+        )
+        parser.add_argument(
+            "--fail-on-duplicate-queries",
+            action="store_true",
+            default=False,
+            help="Adds DuplicateQueryMiddleware, raising an error for any request which repeats a query more than "
+            "DUPLICATE_QUERIES_THRESHOLD times",
+        )
+
+    def __init__(
+        self,
+        enable_logging: bool = False,
+        benchmark: bool = False,
+        fail_on_duplicate_queries: bool = False,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.enable_logging = enable_logging
+        self.fail_on_duplicate_queries = fail_on_duplicate_queries
+        self._duplicate_queries_settings: override_settings | None = None
+        if benchmark:
+            self.tags = {BENCHMARK_TAG}
+        elif BENCHMARK_TAG not in self.tags:
+            self.exclude_tags.add(BENCHMARK_TAG)
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        if self.fail_on_duplicate_queries:
+            middleware = settings.MIDDLEWARE
+            # first, so that queries from every other middleware are counted too
+            if DUPLICATE_QUERY_MIDDLEWARE not in middleware:
+                middleware = [DUPLICATE_QUERY_MIDDLEWARE, *middleware]
+            # overridden rather than assigned so that the settings are put back when the tests finish
+            self._duplicate_queries_settings = override_settings(DUPLICATE_QUERIES_RAISE=True, MIDDLEWARE=middleware)
+            self._duplicate_queries_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        if self._duplicate_queries_settings is not None:
+            self._duplicate_queries_settings.disable()
+            self._duplicate_queries_settings = None
+        super().teardown_test_environment(**kwargs)
+
+    def setup_databases(self, **kwargs):
+        # Force to always delete the database if it exists
+        interactive = self.interactive
+        self.interactive = False
+        try:
+            return super().setup_databases(**kwargs)
+        finally:
+            self.interactive = interactive
+
+    def run_tests(self, *args, **kwargs):
+        if not self.enable_logging:
+            logging.disable(level=logging.CRITICAL)
+        return super().run_tests(*args, **kwargs)
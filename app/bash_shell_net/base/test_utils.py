@@ -1,7 +1,14 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from django.conf import settings
+
 from wagtail.models import Page, Site
 
 import wagtail_factories
 
+from bash_shell_net.base.duplicate_queries import DuplicateQueriesError, DuplicateQueryDetector
+
 
 def add_wagtail_factory_page(
     page_factory: wagtail_factories.PageFactory, parent_page: Page | None = None, **kwargs
@@ -16,3 +23,26 @@ def add_wagtail_factory_page(
         parent_page = site.root_page
     page: Page = parent_page.add_child(instance=page_factory.build(**kwargs))
     return page
+
+
+class DuplicateQueriesTestMixin:
+    """
+    Mixin for TestCase classes to check that code does not run the same query over and over with different
+    parameters.
+
+        with self.assertNoDuplicateQueries():
+            self.client.get(page.url)
+    """
+
+    @contextmanager
+    def assertNoDuplicateQueries(self, threshold: int | None = None) -> Iterator[DuplicateQueryDetector]:
+        """
+        Fails if a query runs more than `threshold` times, or DUPLICATE_QUERIES_THRESHOLD times if it is not given,
+        inside the block. The failure lists each repeated query and where it was run from.
+        """
+        with DuplicateQueryDetector() as detector:
+            yield detector
+        if threshold is None:
+            threshold = settings.DUPLICATE_QUERIES_THRESHOLD
+        if duplicates := detector.get_duplicates(threshold):
+            self.fail(str(DuplicateQueriesError(duplicates)))  # type: ignore[attr-defined]
@@ -0,0 +1,223 @@
+"""
+Query count, render time, and memory benchmarks of the public pages.
+
+These are tagged "benchmark" and are skipped unless the tests are run with --benchmark or --tag benchmark.
+For each site size a site is built with the factories, every page type is requested, and the results are written
+to a JSON file. The test fails if any page goes over its budget.
+
+The tests use the dummy cache, so these are the costs of rendering a page which is not cached.
+
+Environment variables:
+    BENCHMARK_SITE_SIZES: comma separated number of pages in each site to build, default 10,1000. Wagtail pages
+        cannot be bulk created, so each page is added on its own and a site of 50000 pages takes ten minutes or
+        more to build. Larger sites are only built when asked for, such as with 10,1000,50000.
+    BENCHMARK_ITERATIONS: number of timed requests of each page, default 20
+    BENCHMARK_RESULTS_FILE: where the JSON results are written, default bash_shell_net_benchmarks.json in the
+        temp directory
+"""
+
+import datetime
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+
+from django.db import connection, reset_queries, transaction
+from django.test import tag
+from django.test.utils import CaptureQueriesContext
+
+from wagtail.test.utils import WagtailPageTestCase
+
+from bash_shell_net.base.test_runner import BENCHMARK_TAG
+from bash_shell_net.base.test_utils import add_wagtail_factory_page
+from bash_shell_net.blog.factories import BlogPageFactory, BlogPageIndexFactory
+from bash_shell_net.blog.models import rebuild_blog_post_neighbors
+from bash_shell_net.on_tap.factories import (
+    BatchLogIndexPageFactory,
+    BatchLogPageFactory,
+    OnTapPageFactory,
+    RecipeIndexPageFactory,
+    create_default_recipe_page,
+)
+from bash_shell_net.on_tap.models import BatchOnTapRecord
+
+
+@dataclass
+class Budget:
+    queries: int
+    p95_ms: float
+    peak_memory_mb: float
+
+
+@dataclass
+class Result:
+    status_code: int
+    queries: int
+    p50_ms: float
+    p95_ms: float
+    peak_memory_mb: float
+
+
+# The query budgets are the number of queries each page runs now. The time and memory budgets leave room for slower
+# machines. None of them grow with the size of the site, since no page should do more work on a bigger site.
+BUDGETS = {
+    "on tap page": Budget(queries=10, p95_ms=400, peak_memory_mb=10),
+    "recipe page": Budget(queries=17, p95_ms=400, peak_memory_mb=10),
+    "batch log page": Budget(queries=16, p95_ms=400, peak_memory_mb=10),
+    "blog index page": Budget(queries=10, p95_ms=400, peak_memory_mb=10),
+    "blog page": Budget(queries=12, p95_ms=400, peak_memory_mb=10),
+    "sitemap index": Budget(queries=14, p95_ms=400, peak_memory_mb=10),
+    "blog sitemap": Budget(queries=4, p95_ms=400, peak_memory_mb=10),
+    "batch log sitemap": Budget(queries=4, p95_ms=400, peak_memory_mb=10),
+    "recipe sitemap": Budget(queries=4, p95_ms=400, peak_memory_mb=10),
+    "blog feed": Budget(queries=6, p95_ms=400, peak_memory_mb=10),
+}
+
+
+def get_site_sizes() -> list[int]:
+    return [int(size) for size in os.environ.get("BENCHMARK_SITE_SIZES", "10,1000").split(",") if size]
+
+
+def build_site(size: int) -> dict[str, str]:
+    """
+    Builds a site of about `size` pages, half of them blog posts and most of the rest batch logs, and returns the
+    url of each page type to benchmark.
+    """
+    blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+    on_tap_page = add_wagtail_factory_page(OnTapPageFactory)
+    recipe_index_page = add_wagtail_factory_page(RecipeIndexPageFactory, parent_page=on_tap_page)
+    batch_log_index_page = add_wagtail_factory_page(BatchLogIndexPageFactory, parent_page=on_tap_page)
+
+    post_count = max(size // 2, 1)
+    recipe_count = max(size // 10, 1)
+    batch_count = max(size - post_count - recipe_count, 1)
+
+    published_at = datetime.datetime(2015, 1, 1, tzinfo=datetime.timezone.utc)
+    for i in range(post_count):
+        post = add_wagtail_factory_page(
+            BlogPageFactory,
+            parent_page=blog_index_page,
+            first_published_at=published_at + datetime.timedelta(hours=i),
+            last_published_at=published_at + datetime.timedelta(hours=i),
+        )
+    rebuild_blog_post_neighbors()
+
+    recipes = [recipe_index_page.add_child(instance=create_default_recipe_page()) for _ in range(recipe_count)]
+
+    brewed_date = datetime.date(2015, 1, 1)
+    on_tap_records = []
+    for i in range(batch_count):
+        batch = add_wagtail_factory_page(
+            BatchLogPageFactory,
+            parent_page=batch_log_index_page,
+            recipe_page=recipes[i % recipe_count],
+            status="complete",
+            brewed_date=brewed_date + datetime.timedelta(days=i),
+            packaged_date=brewed_date + datetime.timedelta(days=i + 14),
+        )
+        on_tap_date = brewed_date + datetime.timedelta(days=i + 21)
+        # the newest few are still on tap
+        off_tap_date = on_tap_date + datetime.timedelta(days=60) if i < batch_count - 3 else None
+        on_tap_records.append(
+            BatchOnTapRecord(batch_log_page=batch, on_tap_date=on_tap_date, off_tap_date=off_tap_date)
+        )
+    BatchOnTapRecord.objects.bulk_create(on_tap_records)
+
+    return {
+        "on tap page": on_tap_page.get_url(),
+        "recipe page": recipes[-1].get_url(),
+        "batch log page": batch.get_url(),
+        "blog index page": blog_index_page.get_url(),
+        "blog page": post.get_url(),
+        "sitemap index": "/sitemap.xml",
+        "blog sitemap": "/sitemap-blog.xml",
+        "batch log sitemap": "/sitemap-on_tap-batches.xml",
+        "recipe sitemap": "/sitemap-on_tap-recipes.xml",
+        "blog feed": "/feeds/blog/rss/",
+    }
+
+
+@tag(BENCHMARK_TAG)
+class PageBenchmarkTest(WagtailPageTestCase):
+    def measure(self, url: str, iterations: int) -> Result:
+        # the first request pays for things which are only loaded once per process
+        response = self.client.get(url)
+
+        # every request clears the query log, so it is cleared first for the captured queries to line up with it and
+        # they are counted before the next request
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        query_count = len(queries)
+
+        tracemalloc.start()
+        try:
+            self.client.get(url)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            self.client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return Result(
+            status_code=response.status_code,
+            queries=query_count,
+            p50_ms=statistics.median(timings),
+            p95_ms=statistics.quantiles(timings, n=20)[-1],
+            peak_memory_mb=peak_memory / 1024 / 1024,
+        )
+
+    def get_failures(self, name: str, result: Result) -> list[str]:
+        budget = BUDGETS[name]
+        failures = []
+        if result.status_code != 200:
+            failures.append(f"{name} returned {result.status_code}")
+        if result.queries > budget.queries:
+            failures.append(f"{name} ran {result.queries} queries, the budget is {budget.queries}")
+        if result.p95_ms > budget.p95_ms:
+            failures.append(f"{name} took {result.p95_ms:.1f}ms at p95, the budget is {budget.p95_ms:.1f}ms")
+        if result.peak_memory_mb > budget.peak_memory_mb:
+            failures.append(
+                f"{name} peaked at {result.peak_memory_mb:.1f}MB, the budget is {budget.peak_memory_mb:.1f}MB"
+            )
+        return failures
+
+    def test_page_budgets(self):
+        iterations = max(int(os.environ.get("BENCHMARK_ITERATIONS", "20")), 2)
+        results_file = os.environ.get(
+            "BENCHMARK_RESULTS_FILE", os.path.join(tempfile.gettempdir(), "bash_shell_net_benchmarks.json")
+        )
+
+        results: dict[int, dict[str, Result]] = {}
+        failures = []
+        for size in get_site_sizes():
+            # each site is rolled back before building the next one
+            with transaction.atomic():
+                urls = build_site(size)
+                results[size] = {name: self.measure(url, iterations) for name, url in urls.items()}
+                transaction.set_rollback(True)
+            for name, result in results[size].items():
+                failures += [f"{size} pages: {failure}" for failure in self.get_failures(name, result)]
+
+        with open(results_file, "w") as f:
+            json.dump(
+                {
+                    "iterations": iterations,
+                    "budgets": {name: asdict(budget) for name, budget in BUDGETS.items()},
+                    "results": {
+                        size: {name: asdict(result) for name, result in size_results.items()}
+                        for size, size_results in results.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+
+        self.assertEqual([], failures, f"Benchmark results are in {results_file}")
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from wagtail.test.utils import WagtailPageTestCase
+
+from bash_shell_net.base.duplicate_queries import DuplicateQueriesError, DuplicateQueryDetector
+from bash_shell_net.base.test_runner import DUPLICATE_QUERY_MIDDLEWARE
+from bash_shell_net.base.test_utils import DuplicateQueriesTestMixin, add_wagtail_factory_page
+from bash_shell_net.blog.factories import BlogPageFactory, BlogPageIndexFactory
+from bash_shell_net.projects.models import Language
+
+
+class DuplicateQueryDetectorTest(DuplicateQueriesTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.language_ids = [
+            Language.objects.create(name=name, description="").pk for name in ["Python", "Rust", "Bash"]
+        ]
+
+    def get_languages_one_at_a_time(self) -> list[Language]:
+        return [Language.objects.get(pk=pk) for pk in self.language_ids]
+
+    def test_repeated_queries_are_found(self):
+        with DuplicateQueryDetector() as detector:
+            self.get_languages_one_at_a_time()
+            list(Language.objects.all())
+
+        self.assertEqual([], detector.get_duplicates(threshold=3))
+        duplicates = detector.get_duplicates(threshold=2)
+        self.assertEqual(1, len(duplicates))
+        self.assertEqual(3, duplicates[0].count)
+        self.assertIn('WHERE "projects_language"."id" = ?', duplicates[0].fingerprint)
+        # the stacks point at the code which ran the queries, not at django
+        self.assertEqual(2, len(duplicates[0].stacks))
+        self.assertTrue(duplicates[0].stacks[0][-1].startswith(f"{__file__}:"))
+        self.assertTrue(any("in get_languages_one_at_a_time" in frame for frame in duplicates[0].stacks[0]))
+        self.assertFalse(any("/django/" in frame for frame in duplicates[0].stacks[0]))
+
+    def test_assert_no_duplicate_queries(self):
+        with self.assertNoDuplicateQueries(threshold=1):
+            list(Language.objects.all())
+
+        with self.assertRaisesMessage(AssertionError, "3 queries: SELECT"):
+            with self.assertNoDuplicateQueries(threshold=2):
+                self.get_languages_one_at_a_time()
+
+
+class DuplicateQueryMiddlewareTest(DuplicateQueriesTestMixin, WagtailPageTestCase):
+    def setUp(self):
+        super().setUp()
+        blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+        self.blog_page = add_wagtail_factory_page(BlogPageFactory, parent_page=blog_index_page)
+
+    def test_page_has_no_duplicate_queries(self):
+        with self.assertNoDuplicateQueries():
+            self.assertEqual(200, self.client.get(self.blog_page.url).status_code)
+
+    def test_raises_for_repeated_queries(self):
+        with override_settings(
+            MIDDLEWARE=[DUPLICATE_QUERY_MIDDLEWARE, *settings.MIDDLEWARE],
+            DUPLICATE_QUERIES_RAISE=True,
+            DUPLICATE_QUERIES_THRESHOLD=0,
+        ):
+            with self.assertRaisesMessage(DuplicateQueriesError, f"Repeated queries in GET {self.blog_page.url}"):
+                self.client.get(self.blog_page.url)
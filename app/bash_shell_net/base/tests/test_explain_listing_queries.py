@@ -0,0 +1,55 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+
+from wagtail.test.utils import WagtailPageTestCase
+
+from bash_shell_net.base.management.commands.explain_listing_queries import (
+    PAGE_LIVE_PUBLISHED_INDEX,
+    RECORD_CURRENT_INDEX,
+)
+from bash_shell_net.base.test_utils import add_wagtail_factory_page
+from bash_shell_net.blog.factories import BlogPageFactory, BlogPageIndexFactory
+from bash_shell_net.blog.models import BlogPage
+from bash_shell_net.on_tap.factories import (
+    BatchLogIndexPageFactory,
+    BatchLogPageFactory,
+    OnTapPageFactory,
+    RecipeIndexPageFactory,
+    create_default_recipe_page,
+)
+from bash_shell_net.on_tap.models import BatchOnTapRecord
+
+
+class ExplainListingQueriesCommandTest(WagtailPageTestCase):
+    def setUp(self):
+        super().setUp()
+        blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+        post = add_wagtail_factory_page(BlogPageFactory, parent_page=blog_index_page)
+        BlogPage.objects.filter(pk=post.pk).update(
+            first_published_at=datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+        on_tap_page = add_wagtail_factory_page(OnTapPageFactory)
+        batch_log_index_page = add_wagtail_factory_page(BatchLogIndexPageFactory, parent_page=on_tap_page)
+        recipe_index_page = add_wagtail_factory_page(RecipeIndexPageFactory, parent_page=on_tap_page)
+        recipe_page = recipe_index_page.add_child(instance=create_default_recipe_page())
+        batch_log_page = add_wagtail_factory_page(
+            BatchLogPageFactory, parent_page=batch_log_index_page, recipe_page=recipe_page
+        )
+        BatchOnTapRecord.objects.create(batch_log_page=batch_log_page, on_tap_date=datetime.date(2024, 5, 1))
+
+    def test_listing_queries_use_indexes(self):
+        out = StringIO()
+        call_command("explain_listing_queries", disable_seqscan=True, stdout=out)
+        output = out.getvalue()
+        self.assertNotIn("does not use", output)
+        uses = dict(line.split(": uses ", 1) for line in output.splitlines())
+        for name, index in [
+            ("blog index first page", PAGE_LIVE_PUBLISHED_INDEX),
+            ("blog index next page", PAGE_LIVE_PUBLISHED_INDEX),
+            ("on tap current batches", RECORD_CURRENT_INDEX),
+            ("recipe sitemap", PAGE_LIVE_PUBLISHED_INDEX),
+        ]:
+            with self.subTest(name=name):
+                self.assertIn(index, uses[name].split(", "))
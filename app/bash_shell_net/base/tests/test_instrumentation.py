@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from wagtail.test.utils import WagtailPageTestCase
+
+import structlog
+from django_structlog import signals
+
+from bash_shell_net.base.instrumentation import fingerprint_sql
+from bash_shell_net.base.test_utils import add_wagtail_factory_page
+from bash_shell_net.blog.factories import BlogPageFactory, BlogPageIndexFactory
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class FingerprintSqlTest(SimpleTestCase):
+    def test_parameters_are_removed(self):
+        self.assertEqual(
+            'SELECT "blog_blogpage"."page_ptr_id" FROM "blog_blogpage" WHERE "blog_blogpage"."page_ptr_id" IN (...)',
+            fingerprint_sql(
+                'SELECT "blog_blogpage"."page_ptr_id"\n  FROM "blog_blogpage"\n'
+                ' WHERE "blog_blogpage"."page_ptr_id" IN (%s, %s, %s)'
+            ),
+        )
+        self.assertEqual(
+            "SELECT * FROM t WHERE a = ? AND b = ? AND c = ? LIMIT ?",
+            fingerprint_sql("SELECT * FROM t WHERE a = 'it''s' AND b = 1.5 AND c = %s LIMIT 21"),
+        )
+
+    def test_same_shape_has_same_fingerprint(self):
+        self.assertEqual(
+            fingerprint_sql("SELECT * FROM t WHERE id IN (%s)"),
+            fingerprint_sql("SELECT * FROM t WHERE id IN (%s, %s, %s, %s)"),
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, REQUEST_INSTRUMENTATION_SAMPLE_RATE=1)
+class RequestInstrumentationMiddlewareTest(WagtailPageTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+        self.blog_page = add_wagtail_factory_page(BlogPageFactory, parent_page=blog_index_page)
+
+        # django_structlog clears the context once the request is finished, so it is saved when request_finished is
+        # about to be logged
+        self.logged_context: dict = {}
+        signals.bind_extra_request_finished_metadata.connect(self.save_logged_context)
+        self.addCleanup(signals.bind_extra_request_finished_metadata.disconnect, self.save_logged_context)
+
+    def save_logged_context(self, **kwargs) -> None:
+        self.logged_context = structlog.contextvars.get_contextvars()
+
+    def test_stats_are_logged_with_request_finished(self):
+        self.client.get(self.blog_page.url)
+        self.assertGreater(self.logged_context["sql_query_count"], 0)
+        self.assertGreater(self.logged_context["sql_ms"], 0)
+        self.assertIn("SELECT", self.logged_context["sql_slowest_query"])
+        self.assertGreater(self.logged_context["template_ms"], 0)
+        self.assertEqual(0, self.logged_context["cache_hits"])
+        # the full page cache has nothing for the page yet
+        self.assertEqual(1, self.logged_context["cache_misses"])
+
+        self.client.get(self.blog_page.url)
+        self.assertEqual(0, self.logged_context["sql_query_count"])
+        self.assertEqual(0, self.logged_context["template_ms"])
+        self.assertEqual(1, self.logged_context["cache_hits"])
+        self.assertEqual(0, self.logged_context["cache_misses"])
+
+    @override_settings(REQUEST_INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_requests_not_sampled_are_not_measured(self):
+        self.client.get(self.blog_page.url)
+        self.assertIn("request_id", self.logged_context)
+        self.assertNotIn("sql_query_count", self.logged_context)
@@ -0,0 +1,186 @@
+import re
+
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+
+from wagtail.models import PageViewRestriction, Site
+from wagtail.test.utils import WagtailPageTestCase
+
+from csp.constants import NONCE, SELF
+
+from bash_shell_net.base.models import StandardPage
+from bash_shell_net.base.page_cache import (
+    UNCACHED_HEADERS,
+    generation_cache_key,
+    get_cache_path,
+    get_page_purge_paths,
+    page_cache_key,
+)
+from bash_shell_net.base.test_utils import add_wagtail_factory_page
+from bash_shell_net.blog.factories import BlogPageFactory, BlogPageIndexFactory
+from bash_shell_net.on_tap.factories import (
+    BatchLogIndexPageFactory,
+    BatchLogPageFactory,
+    OnTapPageFactory,
+    RecipeIndexPageFactory,
+    RecipePageFactory,
+)
+from bash_shell_net.wagtail_blocks.cache import streamfield_cache_key
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+NONCE_RE = re.compile(r'nonce="([^"]+)"')
+
+
+def get_nonce(html: str) -> str:
+    match = NONCE_RE.search(html)
+    assert match is not None
+    return match.group(1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PageCacheTest(WagtailPageTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+        self.blog_page = add_wagtail_factory_page(BlogPageFactory, parent_page=self.blog_index_page)
+
+    def test_anonymous_get_is_cached(self):
+        first = self.client.get(self.blog_page.url)
+        self.assertEqual(200, first.status_code)
+        self.assertNotIn("X-Page-Cache", first)
+
+        second = self.client.get(self.blog_page.url)
+        self.assertEqual("HIT", second["X-Page-Cache"])
+        self.assertEqual(first["Content-Type"], second["Content-Type"])
+        # the cached html gets a new nonce for each response
+        first_nonce = get_nonce(first.content.decode())
+        second_nonce = get_nonce(second.content.decode())
+        self.assertNotEqual(first_nonce, second_nonce)
+        self.assertEqual(
+            first.content.decode().replace(first_nonce, ""), second.content.decode().replace(second_nonce, "")
+        )
+        self.assertEqual({second_nonce}, set(NONCE_RE.findall(second.content.decode())))
+
+    def test_only_query_params_which_change_the_page_are_cached_separately(self):
+        self.client.get(self.blog_index_page.url)
+        # parameters the page ignores get the page cached without them
+        self.assertEqual("HIT", self.client.get(self.blog_index_page.url, {"utm_source": "foo"})["X-Page-Cache"])
+
+        self.assertNotIn("X-Page-Cache", self.client.get(self.blog_index_page.url, {"cursor": "foo", "bar": "baz"}))
+        self.assertEqual("HIT", self.client.get(f"{self.blog_index_page.url}?x=1&cursor=foo")["X-Page-Cache"])
+
+    def test_get_cache_path(self):
+        request_factory = RequestFactory()
+        for query_string, expected in [
+            ("", "/foo/"),
+            ("utm_source=bar&fbclid=baz", "/foo/"),
+            ("scale_unit=gal&utm_source=bar&cursor=abc", "/foo/?cursor=abc&scale_unit=gal"),
+            ("cursor=b&scale_volume=5&cursor=a", "/foo/?cursor=b&cursor=a&scale_volume=5"),
+            ("p=2", "/foo/?p=2"),
+        ]:
+            with self.subTest(query_string=query_string):
+                self.assertEqual(expected, get_cache_path(request_factory.get(f"/foo/?{query_string}")))
+
+    @override_settings(CONTENT_SECURITY_POLICY={"DIRECTIVES": {"default-src": [SELF], "style-src": [SELF, NONCE]}})
+    def test_csp_header_has_nonce_of_cached_html(self):
+        self.client.get(self.blog_page.url)
+        response = self.client.get(self.blog_page.url)
+        self.assertEqual("HIT", response["X-Page-Cache"])
+        nonce = get_nonce(response.content.decode())
+        self.assertIn(f"'nonce-{nonce}'", response["Content-Security-Policy"])
+
+    def test_logged_in_users_are_not_cached(self):
+        self.login()
+        self.client.get(self.blog_page.url)
+        self.assertNotIn("X-Page-Cache", self.client.get(self.blog_page.url))
+        self.client.logout()
+        self.assertNotIn("X-Page-Cache", self.client.get(self.blog_page.url))
+
+    def test_only_allowed_pages_are_cached(self):
+        root_page = Site.objects.get(is_default_site=True).root_page
+        standard_page = root_page.add_child(instance=StandardPage(title="About", slug="about"))
+        self.client.get(standard_page.url)
+        self.assertNotIn("X-Page-Cache", self.client.get(standard_page.url))
+
+        PageViewRestriction.objects.create(
+            page=self.blog_index_page, restriction_type=PageViewRestriction.PASSWORD, password="foobar"
+        )
+        self.client.get(self.blog_page.url)
+        self.assertNotIn("X-Page-Cache", self.client.get(self.blog_page.url))
+
+    def test_restricted_child_pages_are_not_cached(self):
+        # the blog page is served by a route of the index page, which has no view restrictions of its own
+        PageViewRestriction.objects.create(
+            page=self.blog_page, restriction_type=PageViewRestriction.PASSWORD, password="foobar"
+        )
+        self.client.get(self.blog_page.url)
+        self.assertNotIn("X-Page-Cache", self.client.get(self.blog_page.url))
+        self.client.get(self.blog_index_page.url)
+        self.assertEqual("HIT", self.client.get(self.blog_index_page.url)["X-Page-Cache"])
+
+    def test_sitemaps_are_cached(self):
+        first = self.client.get("/sitemap-blog.xml")
+        second = self.client.get("/sitemap-blog.xml")
+        self.assertEqual("HIT", second["X-Page-Cache"])
+        # headers set by the view are cached with the content
+        self.assertEqual(first["X-Robots-Tag"], second["X-Robots-Tag"])
+
+    def test_per_response_headers_are_not_cached(self):
+        self.client.get(self.blog_page.url)
+        generation = cache.get(generation_cache_key(self.blog_page.url))
+        cached = cache.get(page_cache_key(generation, self.blog_page.url))
+        header_names = {name.lower() for name, _value in cached["headers"]}
+        self.assertIn("content-type", header_names)
+        self.assertFalse(header_names & UNCACHED_HEADERS)
+
+    def test_publish_purges_page_and_ancestors(self):
+        other_page = add_wagtail_factory_page(BlogPageFactory, parent_page=self.blog_index_page)
+        for url in [self.blog_page.url, self.blog_index_page.url, other_page.url, "/sitemap-blog.xml"]:
+            self.client.get(url)
+            self.assertEqual("HIT", self.client.get(url)["X-Page-Cache"])
+
+        self.blog_page.save_revision().publish()
+        for url in [self.blog_page.url, self.blog_index_page.url, "/sitemap-blog.xml"]:
+            with self.subTest(url=url):
+                self.assertNotIn("X-Page-Cache", self.client.get(url))
+        self.assertEqual("HIT", self.client.get(other_page.url)["X-Page-Cache"])
+
+        self.blog_page.unpublish()
+        self.assertEqual(404, self.client.get(self.blog_page.url).status_code)
+        self.assertIsNone(cache.get(generation_cache_key(self.blog_index_page.url)))
+
+    def test_purge_paths_include_referencing_pages(self):
+        on_tap_page = add_wagtail_factory_page(OnTapPageFactory)
+        recipe_index_page = add_wagtail_factory_page(RecipeIndexPageFactory, parent_page=on_tap_page)
+        batch_log_index_page = add_wagtail_factory_page(BatchLogIndexPageFactory, parent_page=on_tap_page)
+        recipe_page = add_wagtail_factory_page(RecipePageFactory, parent_page=recipe_index_page)
+        # the reference index is updated when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            batch_log_page = add_wagtail_factory_page(
+                BatchLogPageFactory, parent_page=batch_log_index_page, recipe_page=recipe_page
+            )
+
+        paths = get_page_purge_paths(recipe_page)
+        for page in [recipe_page, recipe_index_page, on_tap_page, batch_log_page, batch_log_index_page]:
+            with self.subTest(page=page):
+                self.assertIn(page.url, paths)
+        self.assertIn("/sitemap-on_tap-recipes.xml", paths)
+
+    def test_publish_evicts_streamfields_of_referencing_pages(self):
+        on_tap_page = add_wagtail_factory_page(OnTapPageFactory)
+        recipe_index_page = add_wagtail_factory_page(RecipeIndexPageFactory, parent_page=on_tap_page)
+        batch_log_index_page = add_wagtail_factory_page(BatchLogIndexPageFactory, parent_page=on_tap_page)
+        recipe_page = add_wagtail_factory_page(RecipePageFactory, parent_page=recipe_index_page)
+        with self.captureOnCommitCallbacks(execute=True):
+            batch_log_page = add_wagtail_factory_page(
+                BatchLogPageFactory, parent_page=batch_log_index_page, recipe_page=recipe_page
+            )
+            batch_log_page.save_revision().publish()
+        batch_log_page.refresh_from_db()
+        key = streamfield_cache_key(batch_log_page.pk, batch_log_page.live_revision_id, "body")
+        cache.set(key, "<p>old recipe title</p>")
+
+        recipe_page.save_revision().publish()
+        self.assertIsNone(cache.get(key))
@@ -0,0 +1,140 @@
+import datetime
+from dataclasses import dataclass
+
+from django.test import SimpleTestCase
+
+from wagtail.test.utils import WagtailPageTestCase
+
+from bash_shell_net.base.pagination import KeysetPaginator
+from bash_shell_net.base.test_utils import add_wagtail_factory_page
+from bash_shell_net.blog.factories import BlogPageFactory, BlogPageIndexFactory
+from bash_shell_net.blog.models import BlogPage
+
+
+@dataclass
+class Item:
+    pk: int
+    brewed_date: datetime.date | None
+
+
+class KeysetPaginatorListTest(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        # sorted as ("-brewed_date", "pk") would be in Postgres, with NULLs first
+        self.items = [
+            Item(pk=7, brewed_date=None),
+            Item(pk=2, brewed_date=datetime.date(2024, 5, 1)),
+            Item(pk=5, brewed_date=datetime.date(2024, 5, 1)),
+            Item(pk=1, brewed_date=datetime.date(2024, 3, 1)),
+            Item(pk=3, brewed_date=datetime.date(2023, 1, 1)),
+        ]
+        self.paginator = KeysetPaginator(self.items, ordering=("-brewed_date", "pk"), per_page=2)
+
+    def test_walk_forward_and_back(self):
+        first = self.paginator.page()
+        self.assertEqual(self.items[0:2], first.object_list)
+        self.assertTrue(first.has_next)
+        self.assertFalse(first.has_previous)
+        self.assertIsNone(first.previous_cursor)
+
+        second = self.paginator.page(first.next_cursor)
+        self.assertEqual(self.items[2:4], second.object_list)
+        self.assertTrue(second.has_next)
+        self.assertTrue(second.has_previous)
+
+        third = self.paginator.page(second.next_cursor)
+        self.assertEqual(self.items[4:], third.object_list)
+        self.assertFalse(third.has_next)
+        self.assertIsNone(third.next_cursor)
+
+        self.assertEqual(self.items[2:4], self.paginator.page(third.previous_cursor).object_list)
+        back_to_first = self.paginator.page(second.previous_cursor)
+        self.assertEqual(self.items[0:2], back_to_first.object_list)
+        self.assertFalse(back_to_first.has_previous)
+        self.assertTrue(back_to_first.has_next)
+
+    def test_cursor_is_stable(self):
+        cursor = self.paginator.page().next_cursor
+        self.assertEqual(cursor, self.paginator.page().next_cursor)
+        # items added before the cursor do not shift the following page
+        self.items.insert(0, Item(pk=9, brewed_date=None))
+        self.assertEqual([self.items[3], self.items[4]], self.paginator.page(cursor).object_list)
+
+    def test_cursor_past_the_end(self):
+        cursor = self.paginator.page(self.paginator.page().next_cursor).next_cursor
+        # the items after the cursor went away, such as by being unpublished
+        del self.items[4:]
+        page = self.paginator.page(cursor)
+        self.assertEqual([], page.object_list)
+        self.assertFalse(page.has_next)
+        self.assertIsNone(page.next_cursor)
+        self.assertTrue(page.has_previous)
+        self.assertIsNotNone(page.previous_cursor)
+        self.assertEqual(self.items[1:3], self.paginator.page(page.previous_cursor).object_list)
+
+    def test_invalid_cursor_returns_first_page(self):
+        cursor = self.paginator.page().next_cursor
+        assert cursor is not None
+        other_paginator = KeysetPaginator(self.items, ordering=("-brewed_date", "pk"), per_page=2, salt="other")
+        for bad_cursor in ["nonsense", cursor[:-1], "1"]:
+            with self.subTest(cursor=bad_cursor):
+                self.assertEqual(self.items[0:2], self.paginator.page(bad_cursor).object_list)
+        self.assertEqual(self.items[0:2], other_paginator.page(cursor).object_list)
+
+
+class KeysetPaginatorQuerySetTest(WagtailPageTestCase):
+    def setUp(self):
+        super().setUp()
+        blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+        published_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        for days in [0, 1, 1, 2, 3]:
+            page = add_wagtail_factory_page(BlogPageFactory, parent_page=blog_index_page)
+            BlogPage.objects.filter(pk=page.pk).update(first_published_at=published_at + datetime.timedelta(days=days))
+        self.posts = BlogPage.objects.live().order_by("-first_published_at", "-id")
+
+    def test_walk_forward_and_back(self):
+        paginator = KeysetPaginator(self.posts, ordering=("-first_published_at", "-id"), per_page=2)
+        expected = list(self.posts)
+        with self.assertNumQueries(1):
+            first = paginator.page()
+        self.assertEqual(expected[0:2], first.object_list)
+
+        with self.assertNumQueries(1):
+            second = paginator.page(first.next_cursor)
+        self.assertEqual(expected[2:4], second.object_list)
+        self.assertTrue(second.has_next)
+        self.assertTrue(second.has_previous)
+
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(expected[4:], third.object_list)
+        self.assertFalse(third.has_next)
+
+        back_to_first = paginator.page(second.previous_cursor)
+        self.assertEqual(expected[0:2], back_to_first.object_list)
+        self.assertFalse(back_to_first.has_previous)
+
+    def test_get_page_queryset(self):
+        paginator = KeysetPaginator(self.posts, ordering=("-first_published_at", "-id"), per_page=2)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        # one more than a page is fetched to tell if there is a next page
+        self.assertEqual(first.object_list, list(paginator.get_page_queryset())[:2])
+        self.assertEqual(list(self.posts[2:5]), list(paginator.get_page_queryset(after=first.object_list[-1])))
+        self.assertEqual(second.object_list, list(paginator.get_page_queryset(after=first.object_list[-1]))[:2])
+
+    def test_null_values(self):
+        # NULLs sort first in descending order and last in ascending order, as Postgres sorts them
+        BlogPage.objects.filter(pk__in=[post.pk for post in list(self.posts)[1:3]]).update(first_published_at=None)
+        for ordering in [("-first_published_at", "-id"), ("first_published_at", "id")]:
+            with self.subTest(ordering=ordering):
+                expected = list(self.posts.order_by(*ordering))
+                paginator = KeysetPaginator(self.posts, ordering=ordering, per_page=1)
+                pages = [paginator.page()]
+                while pages[-1].has_next:
+                    pages.append(paginator.page(pages[-1].next_cursor))
+                self.assertEqual(expected, [page.object_list[0] for page in pages])
+
+                backwards = [pages[-1]]
+                while backwards[-1].has_previous:
+                    backwards.append(paginator.page(backwards[-1].previous_cursor))
+                self.assertEqual(expected[::-1], [page.object_list[0] for page in backwards])
@@ -1,10 +1,15 @@
+import datetime
+
+from django.contrib.sitemaps import Sitemap
 from django.test import TestCase
 
 from freezegun import freeze_time
 
 from bash_shell_net.blog.factories import BlogPageFactory
+from bash_shell_net.blog.models import BlogPage
 from bash_shell_net.on_tap.factories import BatchLogPageFactory, OnTapPageFactory, RecipePageFactory
 from bash_shell_net.projects.factories import ActiveProjectFactory
+from config.sitemaps import BlogSitemap
 
 
 class SiteMapTest(TestCase):
@@ -31,3 +36,26 @@ class SiteMapTest(TestCase):
         self.assertEqual(200, r.status_code)
         expected = b'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n<sitemap><loc>https://example.com/sitemap-on_tap.xml</loc></sitemap><sitemap><loc>https://example.com/sitemap-on_tap-batches.xml</loc></sitemap><sitemap><loc>https://example.com/sitemap-on_tap-recipes.xml</loc></sitemap><sitemap><loc>http://example.com/sitemap-blog.xml</loc></sitemap><sitemap><loc>http://example.com/sitemap-project.xml</loc></sitemap><sitemap><loc>http://example.com/sitemap-projects.xml</loc><lastmod>2022-11-18T00:00:00+00:00</lastmod></sitemap>\n</sitemapindex>\n'
         self.assertEqual(expected, r.content)
+
+    def test_latest_lastmod_matches_max_of_items(self):
+        """
+        PageSitemap finds the lastmod of the sitemap index with a query rather than loading every page, and must
+        give the same value as Sitemap.get_latest_lastmod() calling lastmod() on each page
+        """
+        self.assertIsNone(BlogSitemap().get_latest_lastmod())
+
+        published_at = datetime.datetime(2022, 11, 18, tzinfo=datetime.timezone.utc)
+        posts = [BlogPageFactory() for _ in range(3)]
+        for days, post in enumerate(posts):
+            BlogPage.objects.filter(pk=post.pk).update(last_published_at=published_at - datetime.timedelta(days=days))
+        self.assertEqual(published_at, BlogSitemap().get_latest_lastmod())
+        self.assertEqual(Sitemap.get_latest_lastmod(BlogSitemap()), BlogSitemap().get_latest_lastmod())
+        r = self.client.get("/sitemap.xml")
+        self.assertIn(
+            b"<loc>http://example.com/sitemap-blog.xml</loc><lastmod>2022-11-18T00:00:00+00:00</lastmod>", r.content
+        )
+
+        # a page without a lastmod leaves the sitemap without one
+        BlogPage.objects.filter(pk=posts[1].pk).update(last_published_at=None)
+        self.assertIsNone(Sitemap.get_latest_lastmod(BlogSitemap()))
+        self.assertIsNone(BlogSitemap().get_latest_lastmod())
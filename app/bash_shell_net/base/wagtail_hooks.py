@@ -0,0 +1,17 @@
+from django.http import HttpRequest
+
+from wagtail import hooks
+from wagtail.models import Page
+
+from bash_shell_net.base.page_cache import mark_cacheable
+
+
+@hooks.register("before_serve_page")
+def allow_full_page_cache(page: Page, request: HttpRequest, serve_args, serve_kwargs) -> None:
+    """
+    Lets PageCacheMiddleware cache pages whose model sets `full_page_cache = True`, unless the page has view
+    restrictions, since whether those can be seen depends on the visitor. Child pages served from the routes of
+    IdAndSlugUrlIndexMixin pages are checked again by the route with mark_child_page_uncacheable().
+    """
+    if getattr(page, "full_page_cache", False) and not page.get_view_restrictions().exists():
+        mark_cacheable(request)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BlogConfig(AppConfig):
     name = "bash_shell_net.blog"
+
+    def ready(self) -> None:
+        from bash_shell_net.blog import signals  # noqa: F401
@@ -14,6 +14,9 @@ class BlogFeedRss(Feed):
     def items(self):
         return BlogPage.objects.live().order_by("-first_published_at")[:5]
 
+    def item_link(self, item):
+        return item.get_url()
+
     def item_title(self, item):
         return item.title
 
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def set_neighbors(apps, schema_editor):
+    # the same as blog.models.rebuild_blog_post_neighbors() for the posts as they are now
+    BlogPage = apps.get_model("blog", "BlogPage")
+    live_ids = list(
+        BlogPage.objects.filter(live=True, first_published_at__isnull=False)
+        .order_by("first_published_at", "id")
+        .values_list("id", flat=True)
+    )
+    posts = [
+        BlogPage(
+            pk=pk,
+            previous_post_id=live_ids[position - 1] if position > 0 else None,
+            next_post_id=live_ids[position + 1] if position + 1 < len(live_ids) else None,
+        )
+        for position, pk in enumerate(live_ids)
+    ]
+    BlogPage.objects.bulk_update(posts, ["previous_post", "next_post"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0010_alter_blogpage_body"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogpage",
+            name="next_post",
+            field=models.ForeignKey(
+                blank=True,
+                default=None,
+                editable=False,
+                help_text="The next newer live post. Set automatically when posts are published or unpublished.",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="blog.blogpage",
+            ),
+        ),
+        migrations.AddField(
+            model_name="blogpage",
+            name="previous_post",
+            field=models.ForeignKey(
+                blank=True,
+                default=None,
+                editable=False,
+                help_text="The next older live post. Set automatically when posts are published or unpublished.",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="blog.blogpage",
+            ),
+        ),
+        migrations.RunPython(set_neighbors, migrations.RunPython.noop),
+    ]
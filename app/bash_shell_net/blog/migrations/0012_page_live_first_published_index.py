@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    The blog listings and feed and all of the sitemaps filter live pages and order them by first_published_at and
+    id, which are columns of wagtailcore_page. Django cannot add an index to a model from another app, so it is
+    created with SQL.
+    """
+
+    dependencies = [
+        ("blog", "0011_blogpage_previous_post_next_post"),
+        ("wagtailcore", "0094_alter_page_locale"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                "CREATE INDEX IF NOT EXISTS wagtailcore_page_live_published_idx "
+                "ON wagtailcore_page (first_published_at DESC, id DESC) WHERE live"
+            ),
+            reverse_sql="DROP INDEX IF EXISTS wagtailcore_page_live_published_idx",
+        ),
+    ]
@@ -1,4 +1,3 @@
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.db import models
 from django.db.models import Q
 from django.http import HttpResponse
@@ -13,6 +12,7 @@ from wagtail.models import Page
 from wagtail.search import index
 
 from bash_shell_net.base.mixins import IdAndSlugUrlIndexMixin, IdAndSlugUrlMixin
+from bash_shell_net.base.pagination import KeysetPaginator
 from bash_shell_net.wagtail_blocks.fields import STANDARD_STREAMFIELD_FIELDS
 
 
@@ -25,17 +25,16 @@ class BlogPageTag(TaggedItemBase):
 
 
 class BlogPageIndexMixin:
+    def get_posts_paginator(self) -> KeysetPaginator:
+        """
+        Returns the paginator of the live posts under this page, newest first
+        """
+        posts = BlogPage.objects.descendant_of(self).live()
+        return KeysetPaginator(posts, ordering=("-first_published_at", "-id"), per_page=15, salt="blog.posts")
+
     def _get_context(self, request, context):
-        posts = BlogPage.objects.descendant_of(self).live().order_by("-first_published_at", "-last_published_at")
-        paginator = Paginator(posts, 15)
-        page_number = request.GET.get("page")
-        try:
-            page = paginator.page(page_number)
-        except PageNotAnInteger:
-            page = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            page = paginator.page(paginator.num_pages)
+        paginator = self.get_posts_paginator()
+        page = paginator.page(request.GET.get("cursor"))
 
         # make the variable 'resources' available on the template
         context["paginator"] = paginator
@@ -52,6 +51,7 @@ class BlogPageIndex(RoutablePageMixin, IdAndSlugUrlIndexMixin, BlogPageIndexMixi
     # For pagination, look here: https://stackoverflow.com/questions/40365500/pagination-in-wagtail
     # and for general: https://github.com/wagtail/bakerydemo/blob/master/bakerydemo/blog/models.py#L133
     template = "blog/post_index.html"
+    full_page_cache = True
     id_and_slug_url_name = "blog_post_by_id_and_slug"
 
     subpage_types = ["blog.BlogPage"]
@@ -87,6 +87,7 @@ class BlogPageIndex(RoutablePageMixin, IdAndSlugUrlIndexMixin, BlogPageIndexMixi
 class BlogPage(IdAndSlugUrlMixin, Page):
 
     template = "blog/post_detail.html"
+    full_page_cache = True
     id_and_slug_url_name = "blog_post_by_id_and_slug"
 
     parent_page_types = ["BlogPageIndex"]
@@ -108,6 +109,33 @@ class BlogPage(IdAndSlugUrlMixin, Page):
         default=None,
         use_json_field=True,
     )
+    # The neighboring live posts, kept up to date by refresh_blog_post_neighbors() so that viewing a post does not
+    # need to search for them.
+    previous_post: models.ForeignKey["BlogPage | None", "BlogPage | None"] = models.ForeignKey(
+        "blog.BlogPage",
+        blank=True,
+        null=True,
+        default=None,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        help_text="The next older live post. Set automatically when posts are published or unpublished.",
+    )
+    next_post: models.ForeignKey["BlogPage | None", "BlogPage | None"] = models.ForeignKey(
+        "blog.BlogPage",
+        blank=True,
+        null=True,
+        default=None,
+        editable=False,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        help_text="The next newer live post. Set automatically when posts are published or unpublished.",
+    )
+    # these are not references an editor made
+    previous_post.wagtail_reference_index_ignore = True  # type: ignore[attr-defined]
+    next_post.wagtail_reference_index_ignore = True  # type: ignore[attr-defined]
+
+    exclude_fields_in_copy = ["previous_post", "next_post"]
 
     content_panels = Page.content_panels + [FieldPanel("body")]
     promote_panels = Page.promote_panels + [
@@ -130,33 +158,117 @@ class BlogPage(IdAndSlugUrlMixin, Page):
     def __str__(self):
         return self.title
 
+    def with_content_json(self, content):
+        """
+        Keeps the current previous and next posts when restoring a revision, since they are set from the other
+        posts rather than being part of the revision.
+        """
+        obj = super().with_content_json(content)
+        obj.previous_post_id = self.previous_post_id
+        obj.next_post_id = self.next_post_id
+        return obj
+
     def get_context(self, request):
         context = super().get_context(request)
 
-        if self.first_published_at and self.pk:
-            # TODO: Is this really going to happen? Same first published but id lower? or higher?
-            # I think it would work just as well to just make this:
-            # BP.live().filter(first_published_at__lte=self.first_published_at).exclude(pk=self.pk).order_by('-first_published_at', 'id')
-            previous_post_q = Q(first_published_at=self.first_published_at, id__lt=self.id)
-            previous_post_q = previous_post_q | Q(first_published_at__lt=self.first_published_at)
-            previous_post = (
-                BlogPage.objects.live()
-                .filter(previous_post_q)
-                .exclude(pk=self.pk)
-                .order_by("-first_published_at", "id")
-                .first()
-            )
+        if self.live and self.first_published_at:
+            neighbor_ids = [pk for pk in (self.previous_post_id, self.next_post_id) if pk]
+            neighbors = {post.pk: post for post in BlogPage.objects.live().filter(pk__in=neighbor_ids)}
+            previous_post = neighbors.get(self.previous_post_id)
+            next_post = neighbors.get(self.next_post_id)
         else:
+            # previews of posts which have not been published yet come after the newest post
             previous_post = BlogPage.objects.live().order_by("-first_published_at", "id").first()
-
-        if self.first_published_at and self.pk:
-            next_post_q = Q(first_published_at=self.first_published_at, id__gt=self.id)
-            # is there a better way to handle this being used in unpublished previews?
-            next_post_q = next_post_q | Q(first_published_at__gt=self.first_published_at)
-            next_post = BlogPage.objects.live().filter(next_post_q)
-            next_post = next_post.exclude(pk=self.pk).order_by("first_published_at", "-id").first()
-        else:
             next_post = None
         context["previous_post"] = previous_post
         context["next_post"] = next_post
         return context
+
+
+def _live_posts() -> models.QuerySet["BlogPage"]:
+    return BlogPage.objects.live().filter(first_published_at__isnull=False)
+
+
+def get_blog_post_neighbor_ids(post: BlogPage) -> tuple[int | None, int | None]:
+    """
+    Returns the ids of the live posts right before and after `post`, ordered by first_published_at and then id,
+    whether or not `post` is live itself
+    """
+    posts = _live_posts().exclude(pk=post.pk)
+    before = Q(first_published_at__lt=post.first_published_at) | Q(
+        first_published_at=post.first_published_at, id__lt=post.pk
+    )
+    previous_post_id = posts.filter(before).order_by("-first_published_at", "-id").values_list("id", flat=True)
+    next_post_id = posts.exclude(before).order_by("first_published_at", "id").values_list("id", flat=True)
+    return previous_post_id.first(), next_post_id.first()
+
+
+def refresh_blog_post_neighbors(post: BlogPage) -> list[int]:
+    """
+    Updates the previous and next posts of `post` and of the live posts on either side of it. This should be run
+    whenever a post is published, unpublished, or deleted. The other posts' links are expected to be correct
+    already, as set by this and by rebuild_blog_post_neighbors().
+
+    Only the posts whose previous or next post changed are updated. Their ids are returned.
+    """
+    # the links stored on `post` are not used, since unpublishing saves whatever the instance had
+    if saved_post := BlogPage.objects.filter(pk=post.pk).only("live", "first_published_at").first():
+        post = saved_post
+    is_live = bool(saved_post and saved_post.live and saved_post.first_published_at)
+
+    links: dict[int, dict[str, int | None]] = {}
+    if saved_post:
+        links[post.pk] = {"previous_post_id": None, "next_post_id": None}
+    if post.first_published_at:
+        previous_post_id, next_post_id = get_blog_post_neighbor_ids(post)
+        if is_live:
+            links[post.pk] = {"previous_post_id": previous_post_id, "next_post_id": next_post_id}
+        # the posts on either side of a post which was unpublished or deleted are next to each other now
+        if previous_post_id:
+            links[previous_post_id] = {"next_post_id": post.pk if is_live else next_post_id}
+        if next_post_id:
+            links[next_post_id] = {"previous_post_id": post.pk if is_live else previous_post_id}
+
+    # posts which still link to `post` from where it was before, such as if its first_published_at changed
+    moved_from = _live_posts().filter(Q(previous_post=post.pk) | Q(next_post=post.pk)).exclude(pk__in=links)
+    for neighbor in moved_from.only("first_published_at"):
+        previous_post_id, next_post_id = get_blog_post_neighbor_ids(neighbor)
+        links[neighbor.pk] = {"previous_post_id": previous_post_id, "next_post_id": next_post_id}
+
+    changed = []
+    for neighbor in BlogPage.objects.filter(pk__in=links).only("previous_post", "next_post"):
+        new_links = links[neighbor.pk]
+        if any(getattr(neighbor, name) != value for name, value in new_links.items()):
+            for name, value in new_links.items():
+                setattr(neighbor, name, value)
+            changed.append(neighbor)
+    BlogPage.objects.bulk_update(changed, ["previous_post", "next_post"])
+    return [neighbor.pk for neighbor in changed]
+
+
+def rebuild_blog_post_neighbors() -> list[int]:
+    """
+    Sets the previous and next posts of every live BlogPage, ordered by first_published_at and then id, and clears
+    them on posts which are not live. This is for filling in the links of posts which were not published the usual
+    way, such as ones loaded into the database, since refresh_blog_post_neighbors() only looks at one post.
+
+    Only the posts whose previous or next post changed are updated. Their ids are returned.
+    """
+    posts = list(
+        _live_posts().order_by("first_published_at", "id").values_list("id", "previous_post_id", "next_post_id")
+    )
+    live_ids = [pk for pk, _, _ in posts]
+    changed = []
+    for position, (pk, previous_post_id, next_post_id) in enumerate(posts):
+        new_previous_post_id = live_ids[position - 1] if position > 0 else None
+        new_next_post_id = live_ids[position + 1] if position + 1 < len(live_ids) else None
+        if (previous_post_id, next_post_id) != (new_previous_post_id, new_next_post_id):
+            changed.append(BlogPage(pk=pk, previous_post_id=new_previous_post_id, next_post_id=new_next_post_id))
+    BlogPage.objects.bulk_update(changed, ["previous_post", "next_post"])
+
+    not_live = BlogPage.objects.exclude(pk__in=live_ids).filter(
+        Q(previous_post__isnull=False) | Q(next_post__isnull=False)
+    )
+    not_live_ids = list(not_live.values_list("pk", flat=True))
+    BlogPage.objects.filter(pk__in=not_live_ids).update(previous_post=None, next_post=None)
+    return [post.pk for post in changed] + not_live_ids
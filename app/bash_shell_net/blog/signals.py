@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from wagtail.signals import page_published, page_unpublished
+
+from bash_shell_net.base.page_cache import get_page_path, purge_paths
+from bash_shell_net.blog.models import BlogPage, refresh_blog_post_neighbors
+
+
+@receiver(page_published, sender=BlogPage)
+@receiver(page_unpublished, sender=BlogPage)
+@receiver(post_delete, sender=BlogPage)
+def refresh_neighbors(sender, instance: BlogPage, **kwargs) -> None:
+    """
+    Update the previous and next posts of a post and of the posts around it when it is published, unpublished, or
+    deleted, and drop the cached pages of the posts whose links changed.
+    """
+    changed_ids = refresh_blog_post_neighbors(instance)
+    paths = [get_page_path(post) for post in BlogPage.objects.filter(pk__in=changed_ids)]
+    purge_paths(path for path in paths if path)
@@ -1,17 +1,76 @@
+import functools
+import hashlib
+import json
+import threading
+from typing import Literal, Sequence
+
 from django import template
 from django.conf import settings
+from django.core.cache import cache
 from django.template.defaultfilters import stringfilter
 from django.utils.safestring import mark_safe
 
 import markdown
+import pygments
+
+from bash_shell_net.base.instrumentation import record_cache_lookups
 
 register = template.Library()
 
+MARKDOWN_CACHE_PREFIX = "blog:markdown"
+
+# the output formats markdown.Markdown() accepts
+MarkdownOutputFormat = Literal["xhtml", "html"]
+
+# Markdown instances are not safe to share between threads, so each thread gets its own
+_markdown_instances = threading.local()
+
+
+def get_markdown(extensions: Sequence[str], output_format: MarkdownOutputFormat) -> markdown.Markdown:
+    """
+    Returns this thread's Markdown instance for `extensions` and `output_format`. Setting up the extensions,
+    codehilite in particular, is a large part of converting short markdown, so instances are reused. They must be
+    reset before each use.
+    """
+    instances = _markdown_instances.__dict__.setdefault("instances", {})
+    key = (tuple(extensions), output_format)
+    if (md := instances.get(key)) is None:
+        md = instances[key] = markdown.Markdown(extensions=list(extensions), output_format=output_format)
+    return md
+
+
+def markdown_cache_key(value: str, extensions: Sequence[str], output_format: MarkdownOutputFormat) -> str:
+    """
+    Cache key for the html converted from the markdown `value`. The markdown and pygments versions are part of
+    the hash since codehilite highlights code blocks with pygments.
+    """
+    content = json.dumps(
+        [value, list(extensions), output_format, markdown.__version__, pygments.__version__], sort_keys=True
+    )
+    return f"{MARKDOWN_CACHE_PREFIX}:{hashlib.sha256(content.encode()).hexdigest()}"
+
+
+@functools.lru_cache(maxsize=256)
+def convert_markdown(value: str, extensions: tuple[str, ...], output_format: MarkdownOutputFormat) -> str:
+    """
+    Returns the markdown `value` converted to html, from the cache when it has been converted before.
+    """
+    cache_key = markdown_cache_key(value, extensions, output_format)
+    if (html := cache.get(cache_key)) is not None:
+        record_cache_lookups(hits=1)
+        return html
+    record_cache_lookups(misses=1)
+    md = get_markdown(extensions, output_format)
+    md.reset()
+    html = md.convert(value)
+    cache.set(cache_key, html, settings.BLOG_MARKDOWN_CACHE_TIMEOUT)
+    return html
+
 
 @register.filter
 @stringfilter
 def render_markdown(value):
-    return markdown.markdown(value, output_format="html", extensions=settings.MARKDOWN_EXTENSIONS)
+    return convert_markdown(value, tuple(settings.MARKDOWN_EXTENSIONS), "html")
 
 
 @register.tag(name="markdown")
@@ -45,4 +104,5 @@ class MarkdownNode(template.Node):
 
     def render(self, context):
         value = self.nodelist.render(context)
-        return mark_safe(markdown.markdown(value, extensions=settings.MARKDOWN_EXTENSIONS))
+        # markdown.markdown() defaults to xhtml
+        return mark_safe(convert_markdown(value, tuple(settings.MARKDOWN_EXTENSIONS), "xhtml"))
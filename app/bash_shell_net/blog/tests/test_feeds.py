@@ -0,0 +1,13 @@
+from wagtail.test.utils import WagtailPageTestCase
+
+from bash_shell_net.base.test_utils import add_wagtail_factory_page
+from bash_shell_net.blog.factories import BlogPageFactory, BlogPageIndexFactory
+
+
+class BlogFeedRssTest(WagtailPageTestCase):
+    def test_feed_links_to_posts(self):
+        blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+        blog_page = add_wagtail_factory_page(BlogPageFactory, parent_page=blog_index_page)
+        response = self.client.get("/feeds/blog/rss/")
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, f"<link>http://example.com{blog_page.url}</link>")
@@ -4,7 +4,7 @@ from wagtail.test.utils import WagtailPageTestCase
 
 from bash_shell_net.base.test_utils import add_wagtail_factory_page
 from bash_shell_net.blog.factories import BlogPageFactory, BlogPageIndexFactory
-from bash_shell_net.blog.models import BlogPage, BlogPageIndex
+from bash_shell_net.blog.models import BlogPage, BlogPageIndex, rebuild_blog_post_neighbors
 
 
 class BlogPageTest(WagtailPageTestCase):
@@ -32,3 +32,73 @@ class BlogPageTest(WagtailPageTestCase):
         Test creating a BlogPage under the BlogPageIndex via form with expected data creates the page.
         """
         pass
+
+
+class BlogPageNeighborsTest(WagtailPageTestCase):
+    """
+    Tests the previous and next posts of BlogPage
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+        self.posts = []
+        for _ in range(3):
+            post = add_wagtail_factory_page(BlogPageFactory, parent_page=self.blog_index_page, live=False)
+            post.save_revision().publish()
+            self.posts.append(BlogPage.objects.get(pk=post.pk))
+
+    def get_neighbors(self, post: BlogPage) -> tuple[BlogPage | None, BlogPage | None]:
+        post = BlogPage.objects.get(pk=post.pk)
+        return post.previous_post, post.next_post
+
+    def test_neighbors_set_on_publish(self):
+        oldest, middle, newest = self.posts
+        self.assertEqual((None, middle), self.get_neighbors(oldest))
+        self.assertEqual((oldest, newest), self.get_neighbors(middle))
+        self.assertEqual((middle, None), self.get_neighbors(newest))
+
+        # republishing keeps the neighbors rather than restoring them from the revision
+        oldest.save_revision().publish()
+        self.assertEqual((None, middle), self.get_neighbors(oldest))
+
+    def test_neighbors_updated_on_unpublish_and_delete(self):
+        oldest, middle, newest = self.posts
+        middle.unpublish()
+        self.assertEqual((None, newest), self.get_neighbors(oldest))
+        self.assertEqual((oldest, None), self.get_neighbors(newest))
+        self.assertEqual((None, None), self.get_neighbors(middle))
+
+        middle.save_revision().publish()
+        self.assertEqual((oldest, newest), self.get_neighbors(middle))
+
+        newest.delete()
+        self.assertEqual((oldest, None), self.get_neighbors(middle))
+
+    def test_only_the_post_and_its_neighbors_are_updated(self):
+        oldest, middle, newest = self.posts
+        # links which are wrong but would only be fixed by looking at every post
+        BlogPage.objects.filter(pk=oldest.pk).update(previous_post=newest)
+
+        post = add_wagtail_factory_page(BlogPageFactory, parent_page=self.blog_index_page, live=False)
+        post.save_revision().publish()
+        self.assertEqual((middle, post), self.get_neighbors(newest))
+        self.assertEqual((newest, None), self.get_neighbors(post))
+        self.assertEqual((newest, middle), self.get_neighbors(oldest))
+
+        rebuild_blog_post_neighbors()
+        self.assertEqual((None, middle), self.get_neighbors(oldest))
+
+    def test_get_context(self):
+        oldest, middle, newest = self.posts
+        request = self.client.get(middle.url).wsgi_request
+        middle = BlogPage.objects.get(pk=middle.pk)
+        with self.assertNumQueries(1):
+            context = middle.get_context(request)
+        self.assertEqual(oldest, context["previous_post"])
+        self.assertEqual(newest, context["next_post"])
+
+        draft = add_wagtail_factory_page(BlogPageFactory, parent_page=self.blog_index_page, live=False)
+        context = draft.get_context(request)
+        self.assertEqual(newest, context["previous_post"])
+        self.assertIsNone(context["next_post"])
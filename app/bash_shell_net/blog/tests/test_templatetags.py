@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+import markdown
+
+from bash_shell_net.blog.templatetags.blog_tags import (
+    convert_markdown,
+    get_markdown,
+    markdown_cache_key,
+    render_markdown,
+)
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+MARKDOWN = """
+# Heading
+
+Some text with a footnote[^1].
+
+    :::python
+    print('foobar')
+
+[^1]: The footnote.
+"""
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MarkdownTest(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        convert_markdown.cache_clear()
+
+    def test_matches_markdown(self):
+        expected = markdown.markdown(MARKDOWN, output_format="html", extensions=settings.MARKDOWN_EXTENSIONS)
+        self.assertEqual(expected, render_markdown(MARKDOWN))
+        # converting again with the reused instance does not carry over footnotes, toc ids, etc.
+        convert_markdown.cache_clear()
+        cache.clear()
+        self.assertEqual(expected, render_markdown(MARKDOWN))
+
+        expected = markdown.markdown(MARKDOWN, extensions=settings.MARKDOWN_EXTENSIONS)
+        rendered = Template("{% load blog_tags %}{% markdown %}" + MARKDOWN + "{% endmarkdown %}").render(Context())
+        self.assertEqual(expected, rendered)
+
+    def test_markdown_instances_are_reused(self):
+        extensions = tuple(settings.MARKDOWN_EXTENSIONS)
+        self.assertIs(get_markdown(extensions, "html"), get_markdown(extensions, "html"))
+        self.assertIsNot(get_markdown(extensions, "html"), get_markdown(extensions, "xhtml"))
+        self.assertIsNot(get_markdown(extensions, "html"), get_markdown(extensions[:1], "html"))
+
+    def test_render_is_cached(self):
+        extensions = tuple(settings.MARKDOWN_EXTENSIONS)
+        with mock.patch("bash_shell_net.blog.templatetags.blog_tags.get_markdown") as get_markdown_mock:
+            get_markdown_mock.return_value.convert.return_value = "<p>converted</p>"
+            self.assertEqual("<p>converted</p>", render_markdown("foobar"))
+            self.assertEqual("<p>converted</p>", render_markdown("foobar"))
+            get_markdown_mock.return_value.convert.assert_called_once_with("foobar")
+
+            # another worker, without the in-process cache, uses the shared cache
+            convert_markdown.cache_clear()
+            self.assertEqual("<p>converted</p>", render_markdown("foobar"))
+            get_markdown_mock.return_value.convert.assert_called_once()
+
+        self.assertEqual("<p>converted</p>", cache.get(markdown_cache_key("foobar", extensions, "html")))
+        self.assertNotEqual(
+            markdown_cache_key("foobar", extensions, "html"), markdown_cache_key("foobar", extensions, "xhtml")
+        )
+        self.assertNotEqual(
+            markdown_cache_key("foobar", extensions, "html"), markdown_cache_key("foobar", extensions[:1], "html")
+        )
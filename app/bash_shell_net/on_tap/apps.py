@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class OnTapConfig(AppConfig):
     name = "bash_shell_net.on_tap"
+
+    def ready(self) -> None:
+        from bash_shell_net.on_tap import signals  # noqa: F401
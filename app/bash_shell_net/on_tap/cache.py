@@ -0,0 +1,20 @@
+from decimal import Decimal
+
+SCALED_RECIPE_CACHE_PREFIX = "on_tap:scaled_recipe"
+
+
+def scaled_recipe_cache_key(recipe_page_id: int, revision_id: int, volume: Decimal, unit: str) -> str:
+    """
+    Cache key for the rendered ingredients of a RecipePage revision scaled to `volume` of `unit`.
+
+    volume should already be normalized, such as by RecipePage.get_scale_from_request(), so that 5, 5.0 and 5.00
+    gallons all share a key.
+    """
+    return f"{SCALED_RECIPE_CACHE_PREFIX}:{recipe_page_id}:{revision_id}:{volume}:{unit}"
+
+
+def scaled_recipe_cache_pattern(recipe_page_id: int) -> str:
+    """
+    Pattern matching every cached scaled recipe for a RecipePage, regardless of revision
+    """
+    return f"{SCALED_RECIPE_CACHE_PREFIX}:{recipe_page_id}:*"
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from bash_shell_net.on_tap.models import RecipeFermentable, RecipeHop
+
+
+class Command(BaseCommand):
+    help = "Sets amount_in_grams on recipe fermentables and hops which were saved before it existed."
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            default=False,
+            help="Recalculate amount_in_grams for every row rather than only rows where it is not set.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options) -> None:
+        for model in (RecipeFermentable, RecipeHop):
+            queryset = model.objects.all().order_by("pk")
+            if not options["all"]:
+                queryset = queryset.filter(amount_in_grams=None)
+
+            to_update = []
+            updated = 0
+            for ingredient in queryset.iterator(chunk_size=options["batch_size"]):
+                ingredient.amount_in_grams = ingredient.calculate_amount_in_grams()
+                to_update.append(ingredient)
+                if len(to_update) >= options["batch_size"]:
+                    updated += model.objects.bulk_update(to_update, ["amount_in_grams"])
+                    to_update = []
+            if to_update:
+                updated += model.objects.bulk_update(to_update, ["amount_in_grams"])
+
+            self.stdout.write(f"Updated amount_in_grams for {updated} {model._meta.verbose_name_plural}.")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from bash_shell_net.on_tap.models import RecipePage
+
+
+class Command(BaseCommand):
+    help = "Recalculates the statistics such as color_srm which are stored on every RecipePage."
+
+    def handle(self, *args, **options) -> None:
+        updated = 0
+        for recipe_page in RecipePage.objects.all().iterator(chunk_size=100):
+            recipe_page.update_recipe_statistics_fields()
+            # update() rather than save() so that this does not go through wagtail's page validation or
+            # touch updated_at. The ingredients in the database are those of the live revision already.
+            RecipePage.objects_no_prefetch.filter(pk=recipe_page.pk).update(
+                color_srm=recipe_page.color_srm,
+                grain_pounds=recipe_page.grain_pounds,
+                fermentable_pounds_per_gallon=recipe_page.fermentable_pounds_per_gallon,
+            )
+            updated += 1
+        self.stdout.write(f"Updated statistics for {updated} recipe pages.")
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("on_tap", "0014_remove_batchlogpage_on_tap_batc_on_tap__2daee1_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipepage",
+            name="color_srm",
+            field=models.SmallIntegerField(
+                blank=True, default=None, editable=False, help_text="Estimated color in SRM.", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipepage",
+            name="fermentable_pounds_per_gallon",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=3,
+                default=None,
+                editable=False,
+                help_text="Total weight of fermentables in pounds per gallon of the batch.",
+                max_digits=8,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipepage",
+            name="grain_pounds",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=3,
+                default=None,
+                editable=False,
+                help_text="Total weight of grains in pounds.",
+                max_digits=8,
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipepage",
+            index=models.Index(fields=["color_srm"], name="on_tap_reci_color_s_1c84c8_idx"),
+        ),
+    ]
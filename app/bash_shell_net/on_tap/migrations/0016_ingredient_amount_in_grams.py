@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("on_tap", "0015_recipepage_statistics"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipefermentable",
+            name="amount_in_grams",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=12,
+                default=None,
+                editable=False,
+                help_text="The amount converted to grams. Set automatically on save.",
+                max_digits=20,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipehop",
+            name="amount_in_grams",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=12,
+                default=None,
+                editable=False,
+                help_text="The amount converted to grams. Set automatically on save.",
+                max_digits=20,
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("on_tap", "0016_ingredient_amount_in_grams"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="batchontaprecord",
+            index=models.Index(
+                fields=["batch_log_page", "-on_tap_date", "off_tap_date"], name="on_tap_record_batch_dates_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="batchontaprecord",
+            index=models.Index(
+                condition=models.Q(("off_tap_date__isnull", True)),
+                fields=["-on_tap_date", "batch_log_page"],
+                name="on_tap_record_current_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="batchontaprecord",
+            index=models.Index(
+                condition=models.Q(("never_on_tap", True)), fields=["batch_log_page"], name="on_tap_record_never_idx"
+            ),
+        ),
+    ]
@@ -1,18 +1,21 @@
 import copy
+import datetime
+from dataclasses import dataclass
 from decimal import Decimal
-from enum import Enum
 from typing import TYPE_CHECKING, Any
 
-from django.core.paginator import EmptyPage
-from django.core.paginator import Page as PaginatorPage
-from django.core.paginator import PageNotAnInteger, Paginator
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
-from django.db.models import F, Q, QuerySet
+from django.db.models import Case, DecimalField, F, OuterRef, Q, QuerySet, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf, Power, Round
 from django.http import HttpRequest, HttpResponse
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.safestring import mark_safe
 
 from modelcluster.contrib.taggit import ClusterTaggableManager
-from modelcluster.fields import ParentalKey, create_deferring_foreign_related_manager
+from modelcluster.fields import ParentalKey
 from taggit.models import TaggedItemBase
 from wagtail.admin.panels import FieldPanel, FieldRowPanel, InlinePanel, MultiFieldPanel
 from wagtail.contrib.routable_page.models import RoutablePageMixin, route
@@ -21,8 +24,21 @@ from wagtail.models import BasePageManager, Orderable, PageManager, PageQuerySet
 from wagtail.search import index
 from wagtail.snippets.models import register_snippet
 
+from bash_shell_net.base.instrumentation import record_cache_lookups
 from bash_shell_net.base.mixins import IdAndSlugUrlIndexMixin, IdAndSlugUrlMixin
+from bash_shell_net.base.pagination import KeysetPage, KeysetPaginator
+from bash_shell_net.on_tap.cache import scaled_recipe_cache_key
 from bash_shell_net.on_tap.forms import BatchLogPageForm
+from bash_shell_net.on_tap.units import (
+    VolumeToGallonsConverter,
+    VolumeUnit,
+    WeightToGramsConverter,
+    WeightUnits,
+    convert,
+    convert_each,
+    convert_volume_to_gallons,
+    convert_weight_to_grams,
+)
 from bash_shell_net.wagtail_blocks.fields import STANDARD_STREAMFIELD_FIELDS
 
 if TYPE_CHECKING:
@@ -39,38 +55,6 @@ else:
     from wagtail.models import Page
 
 
-class VolumeToGallonsConverter(Enum):
-    """
-    Multipliers to convert from other volume units to gallons.
-
-    Multiply other volumes times these to convert to gallons. 4 quarts = 1 gallon, so multiple quarts by 0.25, etc.
-    """
-
-    # TODO: Similarly to VolumeUnit, making this a models.Choices subclass like
-    # VolumeToGallonsConverter(decimal.Decimal, models.Choices):
-    # might be a good idea.
-    GALLON = Decimal(1)
-    FLUID_OZ = Decimal("0.0078125")
-    QUART = Decimal("0.25")
-    LITER = Decimal("0.26417287")
-
-
-class WeightUnits(models.TextChoices):
-    GRAMS = "g", "Gram"
-    OUNCES = "oz", "Ounce"
-    POUNDS = "lbs", "Pound"
-    KILOGRAMS = "kg", "Kilogram"
-
-
-class VolumeUnit(models.TextChoices):
-    TEASPOON = "tsp", "Teaspoon"
-    TABLESPOON = "tbsp", "Tablespoon"
-    FLUID_OZ = "fl_oz", "Fluid Oz"
-    LITER = "l", "Liter"
-    QUART = "quart"
-    GALLON = "gal", "Gallon"
-
-
 class RecipeType:
     """
     The type of beer recipe
@@ -82,12 +66,33 @@ class RecipeType:
     PARTIAL_MASH = "partial_mash"
 
 
-def convert_volume_to_gallons(volume: Decimal, unit: VolumeUnit) -> Decimal:
+def calculate_srm_from_mcu(total_mcu: Decimal) -> int:
     """
-    Converts the batch volume to gallons for use in SRM estimation using Morey's equation
+    Returns the estimated color in SRM for the total Malt Color Units using Morey's equation of
+    SRM = 1.4922 * (MCU ^ 0.6859).
     """
-    # Probably makes sense to live on either VolumeUnit or VolumeToGallonsConverter now.
-    return volume * VolumeToGallonsConverter[unit.name].value
+    srm = Decimal("1.4922") * (total_mcu ** Decimal("0.6859"))
+    return int(srm.quantize(Decimal("1")))
+
+
+@dataclass(frozen=True)
+class RecipeStatistics:
+    """
+    Values calculated from the fermentables of a RecipePage.
+
+    total_mcu and color_srm are None when the recipe has no usable batch size to calculate them against.
+    """
+
+    total_mcu: Decimal | None
+    color_srm: int | None
+    grain_pounds: Decimal
+    fermentable_pounds: Decimal
+    fermentable_pounds_per_gallon: Decimal | None
+
+
+# RecipePage pk -> a counter bumped whenever one of its fermentables is saved or deleted. Statistics cached on a
+# RecipePage instance are only used while the counter for its pk is unchanged.
+_fermentable_generations: dict[int, int] = {}
 
 
 class ScalableAmountMixin:
@@ -109,6 +114,43 @@ class ScalableAmountMixin:
         super().__setattr__(name, value)
 
 
+class CanonicalWeightMixin:
+    """
+    Keeps `amount_in_grams` up to date with `amount` and `amount_units` whenever the model is saved so that weights
+    can be totaled in the database regardless of the units they were entered in.
+    """
+
+    def save(self, *args, **kwargs) -> None:
+        self.amount_in_grams = self.calculate_amount_in_grams()
+        if (update_fields := kwargs.get("update_fields")) is not None:
+            kwargs["update_fields"] = {*update_fields, "amount_in_grams"}
+        super().save(*args, **kwargs)  # type: ignore[misc]
+
+    def calculate_amount_in_grams(self) -> Decimal | None:
+        """
+        Returns the amount in grams, or None when there is no amount or its units are not a weight.
+        """
+        if self.amount is None or not self.amount_units:  # type: ignore[attr-defined]
+            return None
+        try:
+            return convert_weight_to_grams(self.amount, self.amount_units)  # type: ignore[attr-defined]
+        except ValueError:
+            return None
+
+
+def canonical_weight_field() -> DecimalField:
+    # enough decimal places to hold any amount converted from ounces or pounds without rounding
+    return models.DecimalField(
+        max_digits=20,
+        decimal_places=12,
+        blank=True,
+        null=True,
+        default=None,
+        editable=False,
+        help_text="The amount converted to grams. Set automatically on save.",
+    )
+
+
 class RecipePageTag(TaggedItemBase):
     tagged_items: Any
     content_object: Any = ParentalKey("on_tap.RecipePage", on_delete=models.CASCADE, related_name="tagged_items")
@@ -117,7 +159,7 @@ class RecipePageTag(TaggedItemBase):
         return f"{self.content_object} tagged {self.tag}"
 
 
-class RecipeHop(ScalableAmountMixin, Orderable, models.Model):
+class RecipeHop(CanonicalWeightMixin, ScalableAmountMixin, Orderable, models.Model):
     """
     A single amount of hops in a recipe
     """
@@ -158,6 +200,7 @@ class RecipeHop(ScalableAmountMixin, Orderable, models.Model):
     alpha_acid_percent = models.DecimalField(max_digits=6, decimal_places=3, blank=False, null=False)
     amount = models.DecimalField(max_digits=6, decimal_places=2, blank=False, null=False)
     amount_units = models.CharField(max_length=5, choices=(("g", "Grams"), ("oz", "Ounces")))
+    amount_in_grams = canonical_weight_field()
     # use_step maps to BeerXML <USE>
     use_step = models.CharField(choices=USE_STEP_CHOICES, max_length=15, blank=False)
     use_time = models.IntegerField(
@@ -195,10 +238,8 @@ class RecipeHop(ScalableAmountMixin, Orderable, models.Model):
         return self.name
 
     def weight_in_ounces(self) -> Decimal:
-        if self.amount_units == "g":
-            return self.amount * Decimal("0.035274")
-        # for now, must be oz
-        return self.amount
+        # amounts in units which cannot be converted have always been treated as ounces already
+        return convert(self.amount, self.amount_units, WeightUnits.OUNCES, default_ratio=Decimal(1))
 
 
 class FermentableType(models.TextChoices):
@@ -209,7 +250,7 @@ class FermentableType(models.TextChoices):
     ADJUNCT = "adjunct", "Adjunct"
 
 
-class RecipeFermentable(ScalableAmountMixin, Orderable, models.Model):
+class RecipeFermentable(CanonicalWeightMixin, ScalableAmountMixin, Orderable, models.Model):
     """
     A fermentable such as a grain or malt extract used in a recipe
 
@@ -240,7 +281,7 @@ class RecipeFermentable(ScalableAmountMixin, Orderable, models.Model):
         blank=False,
         choices=UNIT_CHOICES,
     )
-    # may add a static amount in kilograms to auto sort by amount
+    amount_in_grams = canonical_weight_field()
     notes = RichTextField(
         blank=True,
         default="",
@@ -284,21 +325,32 @@ class RecipeFermentable(ScalableAmountMixin, Orderable, models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs) -> None:
+        # CanonicalWeightMixin.save() sets amount_in_grams
+        super().save(*args, **kwargs)
+        self._clear_recipe_page_statistics()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._clear_recipe_page_statistics()
+        return result
+
     def weight_in_pounds(self) -> Decimal:
         """
         Returns the weight in Pounds
         """
-        # I should maybe just convert to oz or g on save, then return converted value as desired
-        # that would also let me do things like use db sum() methods instead of iterating to get totals
-        # Keep it dumb and simple for now
-        if self.amount_units == "kg":
-            return self.amount * Decimal("2.20462262")
-        elif self.amount_units == "oz":
-            return self.amount / Decimal("16.0")
-        elif self.amount_units == "g":
-            # grams to kilograms then kilograms to pounds
-            return (self.amount / Decimal("1000")) * Decimal("2.2042262")
-        return self.amount
+        # amount_in_grams is what to use for totals in the database. The pound conversions keep their original
+        # ratios so that the displayed recipe numbers do not shift.
+        # amounts in units which cannot be converted have always been treated as pounds already
+        return convert(self.amount, self.amount_units, WeightUnits.POUNDS, default_ratio=Decimal(1))
+
+    def _clear_recipe_page_statistics(self) -> None:
+        # Other RecipePage instances for the same page cannot be reached from here, so bump the generation their
+        # cached statistics are checked against. The page this fermentable is attached to is cleared right away.
+        if self.recipe_page_id is not None:
+            _fermentable_generations[self.recipe_page_id] = _fermentable_generations.get(self.recipe_page_id, 0) + 1
+        if RecipeFermentable.recipe_page.is_cached(self):
+            self.recipe_page.clear_recipe_statistics()
 
     def calculate_mcu(self, gallons: Decimal) -> Decimal:
         """
@@ -657,7 +709,92 @@ class BaseRecipePageManager(PageManager):
         )
 
 
-RecipePageManager: BaseRecipePageManager = BaseRecipePageManager.from_queryset(PageQuerySet)
+def _sum_by_recipe_page(queryset: QuerySet, expression: Any, recipe_page: str = "pk") -> Coalesce:
+    """
+    Returns a subquery totaling `expression` over the rows of queryset which belong to the RecipePage referenced
+    by the `recipe_page` field of the outer query.
+    """
+    output_field: models.DecimalField = models.DecimalField(max_digits=30, decimal_places=12)
+    total = (
+        queryset.filter(recipe_page=OuterRef(recipe_page))
+        .order_by()
+        .values("recipe_page")
+        .annotate(total=Sum(expression, output_field=output_field))
+        .values("total")
+    )
+    return Coalesce(Subquery(total, output_field=output_field), Value(Decimal(0)), output_field=output_field)
+
+
+def batch_volume_in_gallons_expression(volume: str = "batch_size", volume_units: str = "volume_units") -> Case:
+    """
+    Database expression equivalent of convert_volume_to_gallons() for the named volume and units fields.
+    Units which have no conversion to gallons result in NULL.
+    """
+    return Case(
+        *[
+            When(**{volume_units: str(VolumeUnit[converter.name])}, then=F(volume) * Value(converter.value))
+            for converter in VolumeToGallonsConverter
+        ],
+        default=None,
+        output_field=models.DecimalField(max_digits=20, decimal_places=10),
+    )
+
+
+def _fermentable_color_pounds_expression(recipe_page: str = "pk") -> Any:
+    """
+    Database expression for the sum of pounds * color of the fermentables of a RecipePage. Dividing it by the
+    volume in gallons gives the total MCU.
+    """
+    return _sum_by_recipe_page(
+        RecipeFermentable.objects.all(),
+        F("amount_in_grams") * Coalesce(F("color"), Value(Decimal(0))),
+        recipe_page=recipe_page,
+    ) / Value(WeightToGramsConverter.POUNDS.value)
+
+
+def srm_expression(total_mcu: Any) -> Cast:
+    """
+    Database expression equivalent of calculate_srm_from_mcu()
+    """
+    return Cast(
+        Round(Value(Decimal("1.4922")) * Power(total_mcu, Value(Decimal("0.6859")))),
+        output_field=models.IntegerField(),
+    )
+
+
+class RecipePageQuerySet(PageQuerySet):
+    def with_ingredient_totals(self) -> "RecipePageQuerySet":
+        """
+        Annotates each RecipePage with totals calculated in the database from the canonical amount_in_grams of its
+        ingredients: total_fermentable_grams, total_grain_grams, total_hop_grams and total_mcu.
+
+        total_mcu is NULL when the batch size is 0.
+        """
+        fermentables = RecipeFermentable.objects.all()
+        return self.annotate(
+            total_fermentable_grams=_sum_by_recipe_page(fermentables, F("amount_in_grams")),
+            total_grain_grams=_sum_by_recipe_page(
+                fermentables.filter(type=FermentableType.GRAIN), F("amount_in_grams")
+            ),
+            total_hop_grams=_sum_by_recipe_page(RecipeHop.objects.all(), F("amount_in_grams")),
+            total_mcu=(
+                _fermentable_color_pounds_expression() / NullIf(batch_volume_in_gallons_expression(), Value(Decimal(0)))
+            ),
+        )
+
+    def with_srm(self) -> "RecipePageQuerySet":
+        """
+        Annotates each RecipePage with `estimated_srm`, the same value as calculate_color_srm() but calculated
+        in the database, along with the totals from with_ingredient_totals().
+
+        The database uses amount_in_grams so a recipe with fermentables measured in grams may occasionally round
+        to a different SRM than calculate_color_srm(), which uses the conversions in weight_in_pounds().
+        """
+        return self.with_ingredient_totals().annotate(estimated_srm=srm_expression(F("total_mcu")))
+
+
+RecipePageManager: BaseRecipePageManager = BaseRecipePageManager.from_queryset(RecipePageQuerySet)
+RecipePageNoPrefetchManager = BasePageManager.from_queryset(RecipePageQuerySet)
 
 
 class RecipePage(IdAndSlugUrlMixin, Page):  # type: ignore[django-manager-missing]
@@ -670,6 +807,7 @@ class RecipePage(IdAndSlugUrlMixin, Page):  # type: ignore[django-manager-missin
     # Tempted to move much of this to a snippet and then the page could just include the snippet.
 
     template = "on_tap/recipe_detail.html"
+    full_page_cache = True
 
     RECIPE_TYPE_CHOICES = (
         (RecipeType.ALL_GRAIN, "All Grain"),
@@ -741,6 +879,30 @@ class RecipePage(IdAndSlugUrlMixin, Page):  # type: ignore[django-manager-missin
     # and on http://howtobrew.com/book/section-1/hops/hop-bittering-calculations
     ibus_tinseth = models.DecimalField(default=Decimal(0), max_digits=5, decimal_places=2)
 
+    # Denormalized from the fermentables by update_recipe_statistics_fields() whenever the page is saved or published
+    # so that listings can sort and filter on them without loading every fermentable.
+    color_srm = models.SmallIntegerField(
+        blank=True, null=True, default=None, editable=False, help_text="Estimated color in SRM."
+    )
+    grain_pounds = models.DecimalField(
+        blank=True,
+        null=True,
+        default=None,
+        editable=False,
+        max_digits=8,
+        decimal_places=3,
+        help_text="Total weight of grains in pounds.",
+    )
+    fermentable_pounds_per_gallon = models.DecimalField(
+        blank=True,
+        null=True,
+        default=None,
+        editable=False,
+        max_digits=8,
+        decimal_places=3,
+        help_text="Total weight of fermentables in pounds per gallon of the batch.",
+    )
+
     notes = RichTextField(
         blank=True,
         default="",
@@ -853,6 +1015,8 @@ class RecipePage(IdAndSlugUrlMixin, Page):  # type: ignore[django-manager-missin
         ),
         index.FilterField("recipe_type"),
         index.FilterField("tags"),
+        index.FilterField("color_srm"),
+        index.FilterField("grain_pounds"),
     ]
 
     subpage_types: list[str] = []
@@ -860,24 +1024,78 @@ class RecipePage(IdAndSlugUrlMixin, Page):  # type: ignore[django-manager-missin
         "on_tap.RecipeIndexPage",
     ]
 
+    SCALABLE_INGREDIENT_RELATIONS = ("fermentables", "hops", "miscellaneous_ingredients", "yeasts")
+
     objects: BaseRecipePageManager = RecipePageManager()
-    objects_no_prefetch: BasePageManager = PageManager()
+    objects_no_prefetch: BasePageManager = RecipePageNoPrefetchManager()
 
     class Meta:
         indexes = [
             models.Index(fields=["recipe_type"]),
+            models.Index(fields=["color_srm"]),
         ]
 
     def __str__(self) -> str:
         return self.title
 
+    def save(self, *args, **kwargs):
+        # ingredients may have been edited in memory, such as from the wagtail edit form
+        self.clear_recipe_statistics()
+        # Wagtail saves drafts using update_fields without touching the live content, so only refresh the stored
+        # statistics on a full save, such as when the page is created or a revision is published.
+        if kwargs.get("update_fields") is None:
+            self.update_recipe_statistics_fields()
+        return super().save(*args, **kwargs)
+
     def get_context(self, request):
         context = super().get_context(request)
+        if scale := self.get_scale_from_request(request):
+            context["scaled_ingredients_html"] = self.render_scaled_ingredients(*scale, request=request)
+        return context
+
+    def get_scale_from_request(self, request: HttpRequest) -> tuple[Decimal, VolumeUnit] | None:
+        """
+        Returns the normalized volume and unit to scale to from the `scale_volume` and `scale_unit` query params,
+        or None if the recipe should not be scaled, such as when the params are missing or invalid.
+        """
         scale_volume = request.GET.get("scale_volume", None)
         scale_unit = request.GET.get("scale_unit", None)
-        if scale_volume and scale_unit:
-            self.scale_to_volume(Decimal(scale_volume), VolumeUnit(scale_unit))
-        return context
+        if not (scale_volume and scale_unit):
+            return None
+
+        try:
+            # batch_size only has 2 decimal places, so there is no point in keeping more than that
+            volume = Decimal(scale_volume).quantize(Decimal("0.01"))
+            unit = VolumeUnit(scale_unit)
+            # both must be convertible to gallons to calculate the scale factor
+            if volume <= 0 or convert_volume_to_gallons(volume, unit) <= 0 or self.batch_volume_in_gallons() <= 0:
+                return None
+        except (ArithmeticError, KeyError, ValueError):
+            return None
+        return volume, unit
+
+    def render_scaled_ingredients(self, volume: Decimal, unit: VolumeUnit, request: HttpRequest | None = None) -> str:
+        """
+        Returns the ingredients section of the recipe template rendered for this recipe scaled to `volume` of `unit`.
+
+        The rendered html is cached per live revision, volume and unit since the On Tap page links to recipes scaled
+        to the same few batch volumes over and over. Previews and pages which are not live are not cached.
+        """
+        cache_key = None
+        if self.live and self.live_revision_id and not getattr(request, "is_preview", False):
+            cache_key = scaled_recipe_cache_key(self.pk, self.live_revision_id, volume, str(unit))
+            if (html := cache.get(cache_key)) is not None:
+                record_cache_lookups(hits=1)
+                return mark_safe(html)
+            record_cache_lookups(misses=1)
+
+        html = render_to_string(
+            "on_tap/includes/recipe_ingredients.html",
+            {"page": self.get_scaled_recipe(volume, unit)},
+        )
+        if cache_key:
+            cache.set(cache_key, html, settings.ON_TAP_SCALED_RECIPE_CACHE_TIMEOUT)
+        return mark_safe(html)
 
     def batch_volume_in_gallons(self) -> Decimal:
         """
@@ -885,65 +1103,145 @@ class RecipePage(IdAndSlugUrlMixin, Page):  # type: ignore[django-manager-missin
         """
         return convert_volume_to_gallons(volume=self.batch_size, unit=VolumeUnit(self.volume_units))
 
+    def get_recipe_statistics(self) -> RecipeStatistics:
+        """
+        Returns the RecipeStatistics for this recipe, calculating them the first time they are needed.
+
+        The recipe templates call calculate_color_srm() and friends several times per render, so the results are
+        kept on the instance. The cached values are dropped by scale_to_volume(), by saving the page and when one of
+        its fermentables is saved or deleted, even through a different instance of the page. They are also
+        recalculated if the batch size or units change.
+        """
+        cache_key = (self.batch_size, self.volume_units, _fermentable_generations.get(self.pk, 0))
+        cached: tuple[tuple[Decimal, str, int], RecipeStatistics] | None = self.__dict__.get("_recipe_statistics")
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+
+        statistics = self._calculate_recipe_statistics()
+        self._recipe_statistics = (cache_key, statistics)
+        return statistics
+
+    def clear_recipe_statistics(self) -> None:
+        """
+        Drops any statistics cached by get_recipe_statistics() so that they are recalculated on next use.
+        """
+        self.__dict__.pop("_recipe_statistics", None)
+
+    def _calculate_recipe_statistics(self) -> RecipeStatistics:
+        gallons = self.batch_volume_in_gallons()
+        fermentables = list(self.fermentables.all())
+        # RecipeFermentable.calculate_mcu() only fails on the volume when there is a fermentable to calculate, so
+        # a recipe without any has 0 MCU whatever its batch size
+        total_mcu: Decimal | None = Decimal("0") if gallons > Decimal("0") or not fermentables else None
+        grain_pounds = Decimal("0")
+        fermentable_pounds = Decimal("0")
+
+        # same conversion as RecipeFermentable.weight_in_pounds(), with the ratio for each unit looked up once
+        weights_in_pounds = convert_each(
+            ((f.amount, f.amount_units) for f in fermentables), WeightUnits.POUNDS, default_ratio=Decimal(1)
+        )
+        for fermentable, pounds in zip(fermentables, weights_in_pounds):
+            if total_mcu is not None:
+                # matches RecipeFermentable.calculate_mcu()
+                total_mcu += (pounds * (fermentable.color or Decimal(0))) / gallons
+            fermentable_pounds += pounds
+            # filtered here rather than with fermentables.filter(type=...) so that prefetched fermentables get used
+            if fermentable.type == FermentableType.GRAIN:
+                grain_pounds += pounds
+
+        return RecipeStatistics(
+            total_mcu=total_mcu,
+            color_srm=calculate_srm_from_mcu(total_mcu) if total_mcu is not None else None,
+            grain_pounds=grain_pounds,
+            fermentable_pounds=fermentable_pounds,
+            fermentable_pounds_per_gallon=fermentable_pounds / gallons if gallons > Decimal("0") else None,
+        )
+
+    def update_recipe_statistics_fields(self) -> None:
+        """
+        Copies the current recipe statistics onto the denormalized fields stored with the page so that they
+        can be used for sorting and filtering in the database. Does not save the page.
+
+        Drafts may be saved without valid volume units, which the statistics cannot be calculated without. The
+        fields are cleared for those rather than failing the save.
+        """
+        try:
+            statistics = self.get_recipe_statistics()
+        except (ArithmeticError, ValueError):
+            self.color_srm = None
+            self.grain_pounds = None
+            self.fermentable_pounds_per_gallon = None
+            return
+        self.color_srm = statistics.color_srm
+        self.grain_pounds = statistics.grain_pounds.quantize(Decimal("0.001"))
+        if statistics.fermentable_pounds_per_gallon is not None:
+            self.fermentable_pounds_per_gallon = statistics.fermentable_pounds_per_gallon.quantize(Decimal("0.001"))
+        else:
+            self.fermentable_pounds_per_gallon = None
+
+    def calculate_total_mcu(self) -> Decimal:
+        """
+        Returns the total Malt Color Units of all fermentables for use in Morey's equation.
+        """
+        total_mcu = self.get_recipe_statistics().total_mcu
+        if total_mcu is None:
+            # what RecipeFermentable.calculate_mcu() raises for the first fermentable
+            raise ValueError("gallons must be a positive number greater than 0")
+        return total_mcu
+
     def calculate_color_srm(self) -> int:
         """
         Returns the estimated color in SRM using Morey's equation of SRM = 1.4922 * (MCU ^ 0.6859).
         """
         # TODO: maybe just store this like I am with everything else, grabbing the value from other software.
         # It was fun to learn and is here now, though.
-        total_mcu = Decimal("0")
-
-        for fermentable in self.fermentables.all():
-            total_mcu += fermentable.calculate_mcu(self.batch_volume_in_gallons())
-
-        srm = Decimal("1.4922") * (total_mcu ** Decimal("0.6859"))
-        return int(srm.quantize(Decimal("1")))
+        return calculate_srm_from_mcu(self.calculate_total_mcu())
 
     def calculate_grain_pounds(self) -> Decimal:
         """
         Returns the total weight of grains in pounds
         """
         # TODO: not sure where to put this on UI yet.
-        weight = Decimal("0")
-        for fermentable in self.fermentables.filter(type=FermentableType.GRAIN):
-            weight += fermentable.weight_in_pounds()
-        return weight
+        return self.get_recipe_statistics().grain_pounds
 
     def scale_to_volume(self, target_volume: Decimal, unit: VolumeUnit) -> None:
+        """
+        Scales the volumes and all ingredient amounts of this instance to the target volume and units.
+
+        The scaled ingredients are copies of the already loaded (or prefetched) ingredients held in memory by
+        modelcluster, so this does not query the database when the ingredients were prefetched. The scaled
+        page is for display and should not be saved.
+        """
+        self.clear_recipe_statistics()
+        batch_volume_gallons = self.batch_volume_in_gallons()
         target_volume_gallons = convert_volume_to_gallons(volume=target_volume, unit=unit)
-        scale_factor = target_volume_gallons / self.batch_volume_in_gallons()
-        volume_difference = target_volume_gallons - self.batch_volume_in_gallons()
+        scale_factor = target_volume_gallons / batch_volume_gallons
+        volume_difference = target_volume_gallons - batch_volume_gallons
 
         self.batch_size = target_volume
         self.boil_size = self.boil_size + volume_difference  # TODO: check this
         # TODO: set specified volume units
         self.volume_units = unit
 
-        # setting these like this keeps the modified values from the cached queryset
-        # rather than a new query the next time self.fermentables.all() (or hops, etc)
-        # gets called to iterate later.
-        # relying on these having ScalableAmountMixin on them to allow this scaled value to be accessed as `amount`
-        # I'm sure I'm doing something unspeakable with that mixin + this here and it's a lot of magic, but it serves my current purpose nicely
-        # model_cluster.FakeQuerySet mucks with this stuff, so need to call `get_live_queryset()` first, otherwise this method works once
-        # but not on any further calls
-        self.fermentables: create_deferring_foreign_related_manager.DeferringRelatedManager = (  # type: ignore
-            self.fermentables.get_live_queryset().annotate(scaled_amount=F("amount") * scale_factor).all()  # type: ignore
-        )
-        self.hops: create_deferring_foreign_related_manager.DeferringRelatedManager = (  # type: ignore
-            self.hops.get_live_queryset().all().annotate(scaled_amount=F("amount") * scale_factor)  # type: ignore
-        )
-
-        self.miscellaneous_ingredients: create_deferring_foreign_related_manager.DeferringRelatedManager = (  # type: ignore
-            self.miscellaneous_ingredients.get_live_queryset().all().annotate(scaled_amount=F("amount") * scale_factor)  # type: ignore
-        )
-        self.yeasts: create_deferring_foreign_related_manager.DeferringRelatedManager = (  # type: ignore
-            self.yeasts.get_live_queryset().all().annotate(scaled_amount=F("amount") * scale_factor)  # type: ignore
-        )
+        # copy.copy() shares the dict modelcluster keeps in memory ingredients in with the original instance.
+        # Give this instance its own so that scaling a copy does not scale the original as well.
+        self._cluster_related_objects = dict(getattr(self, "_cluster_related_objects", {}))
+        for relation_name in self.SCALABLE_INGREDIENT_RELATIONS:
+            manager = getattr(self, relation_name)
+            # relying on these having ScalableAmountMixin on them so that the scaled value is also used as `amount`
+            manager.set([self._scale_ingredient(ingredient, scale_factor) for ingredient in manager.all()])
+
+    @staticmethod
+    def _scale_ingredient(ingredient: ScalableAmountMixin, scale_factor: Decimal) -> Any:
+        scaled_ingredient = copy.copy(ingredient)
+        if ingredient.amount is not None:  # type: ignore[attr-defined]
+            scaled_ingredient.scaled_amount = ingredient.amount * scale_factor  # type: ignore[attr-defined]
+        return scaled_ingredient
 
     def get_scaled_recipe(self, target_volume: Decimal, unit: VolumeUnit) -> "RecipePage":
         """
-        Returns a copy of self with volumes scaled to the target volume and units and all ingredient querysets annotated and set up
-        for their amounts scaled accordingly
+        Returns a copy of self with volumes and ingredient amounts scaled to the target volume and units. self is
+        left unchanged.
         """
         scaled_recipe = copy.copy(self)
         scaled_recipe.scale_to_volume(target_volume, unit)
@@ -972,7 +1270,41 @@ class BaseBatchLogPagePageManager(PageManager):
         return super().get_queryset().live().prefetch_related("tagged_items__tag").select_related("recipe_page")
 
 
-BatchLogPageManager = BaseBatchLogPagePageManager.from_queryset(PageQuerySet)
+class BatchLogPageQuerySet(PageQuerySet):
+    def with_srm(self) -> "BatchLogPageQuerySet":
+        """
+        Annotates each BatchLogPage with `estimated_srm`, the same value as get_actual_or_expected_srm() but
+        calculated in the database using a single query for any number of batches.
+        """
+        recipe_gallons = NullIf(
+            batch_volume_in_gallons_expression("recipe_page__batch_size", "recipe_page__volume_units"),
+            Value(Decimal(0)),
+        )
+        # a batch brewed to a different target volume than the recipe used scaled amounts of every fermentable
+        scale_factor = Case(
+            When(Q(target_post_boil_volume=None) | Q(target_post_boil_volume=0), then=Value(Decimal(1))),
+            default=batch_volume_in_gallons_expression("target_post_boil_volume") / recipe_gallons,
+            output_field=models.DecimalField(max_digits=30, decimal_places=12),
+        )
+        color_pounds = _fermentable_color_pounds_expression(recipe_page="recipe_page")
+        return self.annotate(
+            estimated_srm=Case(
+                When(
+                    Q(post_boil_volume=None) | Q(post_boil_volume=0),
+                    then=srm_expression(color_pounds / recipe_gallons),
+                ),
+                default=srm_expression(
+                    color_pounds
+                    * scale_factor
+                    / NullIf(batch_volume_in_gallons_expression("post_boil_volume"), Value(Decimal(0)))
+                ),
+                output_field=models.IntegerField(),
+            )
+        )
+
+
+BatchLogPageManager = BaseBatchLogPagePageManager.from_queryset(BatchLogPageQuerySet)
+BatchLogPageNoPrefetchManager = BasePageManager.from_queryset(BatchLogPageQuerySet)
 
 
 class BatchLogPage(IdAndSlugUrlMixin, Page):  # type: ignore
@@ -984,6 +1316,7 @@ class BatchLogPage(IdAndSlugUrlMixin, Page):  # type: ignore
     """
 
     template = "on_tap/batch_log.html"
+    full_page_cache = True
     id_and_slug_url_name = "on_tap_batch_log_by_id_and_slug"
 
     tags = ClusterTaggableManager(through=BatchLogPageTag, blank=True)
@@ -1098,7 +1431,7 @@ class BatchLogPage(IdAndSlugUrlMixin, Page):  # type: ignore
     ]
 
     objects: BaseBatchLogPagePageManager = BatchLogPageManager()
-    objects_no_prefetch: BasePageManager = PageManager()
+    objects_no_prefetch: BasePageManager = BatchLogPageNoPrefetchManager()
 
     class Meta:
         indexes = [
@@ -1123,11 +1456,28 @@ class BatchLogPage(IdAndSlugUrlMixin, Page):  # type: ignore
     def recipe_scaled_to_target_volume(self) -> RecipePage:
         """
         Returns a new RecipePage matching self.recipe_page which has been scaled to the batches target volume.
+
+        The scaled recipe is kept on this instance and reused until the recipe or volumes it was scaled with change,
+        since the context and the SRM calculation both need it for every view of the batch.
         """
-        if self.uses_scaled_recipe:
-            assert isinstance(self.target_post_boil_volume, Decimal)
-            return self.recipe_page.get_scaled_recipe(self.target_post_boil_volume, VolumeUnit(self.volume_units))
-        return self.recipe_page
+        if not self.uses_scaled_recipe:
+            return self.recipe_page
+
+        assert isinstance(self.target_post_boil_volume, Decimal)
+        recipe_page = self.recipe_page
+        scaled_with = (
+            recipe_page.batch_size,
+            recipe_page.volume_units,
+            self.target_post_boil_volume,
+            self.volume_units,
+        )
+        cached = self.__dict__.get("_scaled_recipe")
+        if cached is not None and cached[0] is recipe_page and cached[1] == scaled_with:
+            return cached[2]
+
+        scaled_recipe = recipe_page.get_scaled_recipe(self.target_post_boil_volume, VolumeUnit(self.volume_units))
+        self._scaled_recipe = (recipe_page, scaled_with, scaled_recipe)
+        return scaled_recipe
 
     def get_abv(self) -> Decimal:
         """
@@ -1175,25 +1525,14 @@ class BatchLogPage(IdAndSlugUrlMixin, Page):  # type: ignore
         """
         # TODO: maybe just store this like I am with everything else, grabbing the value from other software.
         # It was fun to learn and is here now, though.
-        # TODO: I have this method in 2 places - can I de-duplicate it without just having a fairly pointless one line
-        # function? Maybe a calculate_color_srm(fermentables: Iterable[RecipeFermentable], volume: Decimal) which
-        # takes volume in gallons
         # TODO: Handle an actual batch which has been scaled up or down to a different intended volume
         total_mcu = Decimal("0")
-        if self.uses_scaled_recipe:
-            # we know self.target_post_boil_volume is a Decimal here because of the checks in self.uses_scaled_recipe
-            # but mypy doesn't seem to know that
-            assert isinstance(self.target_post_boil_volume, Decimal)
-            recipe_page = self.recipe_page.get_scaled_recipe(
-                self.target_post_boil_volume, VolumeUnit(self.volume_units)
-            )
-        else:
-            recipe_page = self.recipe_page
+        recipe_page = self.recipe_scaled_to_target_volume()
+        post_boil_gallons = self.post_boil_volume_as_gallons()
         for fermentable in recipe_page.fermentables.all():
-            total_mcu += fermentable.calculate_mcu(self.post_boil_volume_as_gallons())
+            total_mcu += fermentable.calculate_mcu(post_boil_gallons)
 
-        srm = Decimal("1.4922") * (total_mcu ** Decimal("0.6859"))
-        return int(srm.quantize(Decimal("1")))
+        return calculate_srm_from_mcu(total_mcu)
 
     def get_actual_or_expected_srm(self) -> int:
         """
@@ -1207,12 +1546,7 @@ class BatchLogPage(IdAndSlugUrlMixin, Page):  # type: ignore
     def get_context(self, request: HttpRequest) -> dict[str, Any]:
         context = super().get_context(request)
         context["calculated_srm"] = self.get_actual_or_expected_srm()
-        if self.target_post_boil_volume:
-            context["recipe_page"] = self.recipe_page.get_scaled_recipe(
-                self.target_post_boil_volume, VolumeUnit(self.volume_units)
-            )
-        else:
-            context["recipe_page"] = self.recipe_page
+        context["recipe_page"] = self.recipe_scaled_to_target_volume()
         return context
 
 
@@ -1223,7 +1557,20 @@ class BatchOnTapRecord(models.Model):
     never_on_tap = models.BooleanField(blank=True, default=False)
 
     class Meta:
-        indexes = [models.Index(fields=["on_tap_date", "off_tap_date"])]
+        indexes = [
+            models.Index(fields=["on_tap_date", "off_tap_date"]),
+            # the records of each batch, which OnTapPage.load_dashboard() joins to the batches
+            models.Index(
+                fields=["batch_log_page", "-on_tap_date", "off_tap_date"], name="on_tap_record_batch_dates_idx"
+            ),
+            # what is on tap now
+            models.Index(
+                fields=["-on_tap_date", "batch_log_page"],
+                condition=Q(off_tap_date__isnull=True),
+                name="on_tap_record_current_idx",
+            ),
+            models.Index(fields=["batch_log_page"], condition=Q(never_on_tap=True), name="on_tap_record_never_idx"),
+        ]
         ordering = ("-on_tap_date", "-off_tap_date")
 
     def __str__(self) -> str:
@@ -1233,6 +1580,30 @@ class BatchOnTapRecord(models.Model):
         return val
 
 
+@dataclass
+class OnTapDashboard:
+    """
+    The on tap and upcoming batches shown on an OnTapPage, as loaded by OnTapPage.load_dashboard().
+
+    The lists are in the same order as the querysets from OnTapPage.get_on_tap_batches() and
+    OnTapPage.get_upcoming_batches().
+    """
+
+    on_tap: list[BatchOnTapRecord]
+    upcoming: list[BatchLogPage]
+
+
+# the BatchOnTapRecord fields which OnTapPage.get_dashboard_batches() annotates on each batch
+DASHBOARD_RECORD_FIELDS = ["id", "on_tap_date", "off_tap_date", "never_on_tap"]
+
+
+def _sort_descending(items: list, key: Any, nulls_first: bool) -> None:
+    # Sorts in place the way Postgres orders DESC, which puts NULLs first unless told otherwise.
+    # list.sort() is stable with reverse=True as well, so sorting by each key from least to most significant
+    # gives the same result as ordering by all of them at once.
+    items.sort(key=lambda item: ((key(item) is None) == nulls_first, key(item) or datetime.date.min), reverse=True)
+
+
 class OnTapPage(Page):  # type: ignore
     """
     The main On Tap index
@@ -1243,6 +1614,7 @@ class OnTapPage(Page):  # type: ignore
     # For now, as I am the only user, I will keep this simple.
 
     template = "on_tap/on_tap.html"
+    full_page_cache = True
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1300,42 +1672,104 @@ class OnTapPage(Page):  # type: ignore
                 batch_log_page__in=BatchLogPage.objects.descendant_of(self).live(),
             )
             .select_related("batch_log_page__recipe_page__style")
-            .order_by("-batch_log_page__brewed_date", "-on_tap_date")
+            .order_by("-batch_log_page__brewed_date", "-on_tap_date", "-pk")
         )
 
-    def paginate(
-        self: "OnTapPage", queryset: "QuerySet[BatchOnTapRecord]", page_number: int = 1
-    ) -> tuple[Paginator, PaginatorPage]:
-        paginator = Paginator(queryset, 25)
-        try:
-            page = paginator.page(page_number)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            page = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            page = paginator.page(paginator.num_pages)
+    def get_dashboard_batches(self: "OnTapPage") -> "QuerySet[BatchLogPage]":
+        """
+        Returns the query load_dashboard() uses. Each live BatchLogPage under this page which is on tap has one row
+        per current BatchOnTapRecord, with the fields of the record annotated as on_tap_record_<field>, and each one
+        which has never had a BatchOnTapRecord has a single row. Batches which are only in the past batches are left
+        out, so the query does not grow with the history of batches.
+        """
+        return (
+            BatchLogPage.objects_no_prefetch.descendant_of(self)
+            .live()
+            .filter(
+                Q(on_tap_records=None)
+                | Q(on_tap_records__off_tap_date=None, on_tap_records__on_tap_date__lte=timezone.now().date())
+            )
+            .select_related("recipe_page__style")
+            # the filter's LEFT OUTER JOIN is reused, giving one row per current on tap record and a single row of
+            # NULLs for batches without one
+            .annotate(**{f"on_tap_record_{field}": F(f"on_tap_records__{field}") for field in DASHBOARD_RECORD_FIELDS})
+        )
+
+    def load_dashboard(self: "OnTapPage") -> OnTapDashboard:
+        """
+        Loads the on tap and upcoming batches in a single query and sorts them into an OnTapDashboard.
+
+        The live BatchLogPages under this page are fetched once, joined to their current BatchOnTapRecords, rather
+        than running get_on_tap_batches() and get_upcoming_batches() which each search the page tree for the batches
+        again.
+
+        The past batches are not part of this query, so the On Tap page runs this query plus one more for the page
+        of past batches from paginate(). Those need their own ORDER BY and LIMIT, starting from the cursor, to load
+        a single page. Including them here would mean loading every past batch, which is the cost the keyset
+        pagination removed, or a UNION with a sliced subquery, which would only save a round trip to the database.
+        """
+        batches = self.get_dashboard_batches()
+
+        batches_by_id: dict[int, BatchLogPage] = {}
+        on_tap: list[BatchOnTapRecord] = []
+        for row in batches:
+            # the same BatchLogPage is returned once per on tap record, but only one instance needs to be kept
+            batch = batches_by_id.setdefault(row.pk, row)
+            if row.on_tap_record_id is None:
+                continue
+
+            record = BatchOnTapRecord.from_db(
+                batches.db,
+                ["batch_log_page_id", *DASHBOARD_RECORD_FIELDS],
+                # from_db() expects the values in the order the fields are defined on the model
+                [
+                    row.pk if field.attname == "batch_log_page_id" else getattr(row, f"on_tap_record_{field.attname}")
+                    for field in BatchOnTapRecord._meta.fields
+                    if field.concrete
+                ],
+            )
+            record.batch_log_page = batch
+            on_tap.append(record)
+
+        upcoming = [batch for batch in batches_by_id.values() if batch.on_tap_record_id is None]
+
+        on_tap.sort(key=lambda record: record.pk)
+        _sort_descending(on_tap, key=lambda record: record.on_tap_date, nulls_first=True)
 
-        return (paginator, page)
+        upcoming.sort(key=lambda batch: batch.pk)
+        _sort_descending(upcoming, key=lambda batch: batch.brewed_date, nulls_first=False)
+
+        return OnTapDashboard(on_tap=on_tap, upcoming=upcoming)
+
+    def paginate(
+        self: "OnTapPage",
+        past_batches: "QuerySet[BatchOnTapRecord]",
+        cursor: str | None = None,
+    ) -> tuple[KeysetPaginator, KeysetPage]:
+        """
+        Returns the page of past batches for the cursor from the Newer Brews or Older Brews links, such as from
+        get_past_batches(). Only the batches of that page are loaded.
+        """
+        paginator = KeysetPaginator(
+            past_batches,
+            ordering=("-batch_log_page__brewed_date", "-on_tap_date", "-pk"),
+            per_page=25,
+            salt="on_tap.past_batches",
+        )
+        return (paginator, paginator.page(cursor))
 
     def get_context(self: "OnTapPage", request: HttpRequest) -> dict:
         context = super().get_context(request)
-        currently_on_tap = self.get_on_tap_batches()
-
-        try:
-            page_number = int(request.GET.get("page", 1))
-        except Exception:
-            page_number = 1
+        dashboard = self.load_dashboard()
+        past_batches_paginator, past_batches_page = self.paginate(self.get_past_batches(), request.GET.get("cursor"))
 
-        if page_number == 1:
-            upcoming_batches: QuerySet[BatchLogPage] | None = self.get_upcoming_batches()
+        if not past_batches_page.has_previous:
+            upcoming_batches: list[BatchLogPage] | None = dashboard.upcoming
         else:
             upcoming_batches = None
-        past_batches = self.get_past_batches()
-        past_batches_paginator, past_batches_page = self.paginate(past_batches, page_number)
         context.update(
             {
-                "currently_on_tap": currently_on_tap,
+                "currently_on_tap": dashboard.on_tap,
                 "upcoming_batches": upcoming_batches,
                 "past_batches": past_batches_page.object_list,
                 # not the page being viewed, but the paginator page. This is a confusing name in the template context.
@@ -1354,6 +1788,7 @@ class RecipeIndexPage(RoutablePageMixin, IdAndSlugUrlIndexMixin, Page):  # type:
     """
 
     template = "on_tap/recipe_index.html"
+    full_page_cache = True
     id_and_slug_url_name = "on_tap_recipe_by_id_and_slug"
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -1389,6 +1824,7 @@ class BatchLogIndexPage(RoutablePageMixin, IdAndSlugUrlIndexMixin, Page):
     """
 
     template = "on_tap/recipe_index.html"
+    full_page_cache = True
     id_and_slug_url_name = "on_tap_batch_log_by_id_and_slug"
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,17 @@
+from django.dispatch import receiver
+
+from wagtail.signals import page_published, page_unpublished
+
+from bash_shell_net.base.cache import delete_cache_pattern
+from bash_shell_net.on_tap.cache import scaled_recipe_cache_pattern
+from bash_shell_net.on_tap.models import RecipePage
+
+
+@receiver(page_published, sender=RecipePage)
+@receiver(page_unpublished, sender=RecipePage)
+def evict_scaled_recipes(sender, instance: RecipePage, **kwargs) -> None:
+    """
+    Drop the cached scaled ingredients of a recipe when it is republished or unpublished. The cache keys include the
+    live revision id, so this just clears out entries which would otherwise sit there unused until they expire.
+    """
+    delete_cache_pattern(scaled_recipe_cache_pattern(instance.pk))
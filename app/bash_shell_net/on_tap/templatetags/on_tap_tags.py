@@ -1,3 +1,6 @@
+import math
+from typing import Any
+
 from django import template
 
 import structlog
@@ -6,60 +9,99 @@ register = template.Library()
 
 logger = structlog.getLogger(__name__)
 
+# Colors for whole SRM values from 0 to 40, from https://www.brewersfriend.com/color-calculator/
+SRM_COLORS = (
+    "#FFF4D4",
+    "#FFE699",
+    "#FFD878",
+    "#FFCA5A",
+    "#FFBF42",
+    "#FBB123",
+    "#F8A600",
+    "#F39C00",
+    "#EA8F00",
+    "#E58500",
+    "#DE7C00",
+    "#D77200",
+    "#CF6900",
+    "#CB6200",
+    "#C35900",
+    "#BB5100",
+    "#B54C00",
+    "#B04500",
+    "#A63E00",
+    "#A13700",
+    "#9B3200",
+    "#952D00",
+    "#8E2900",
+    "#882300",
+    "#821E00",
+    "#7B1A00",
+    "#771900",
+    "#701400",
+    "#6A0E00",
+    "#660D00",
+    "#5E0B00",
+    "#5A0A02",
+    "#600903",
+    "#520907",
+    "#4C0505",
+    "#470606",
+    "#420607",
+    "#3D0708",
+    "#370607",
+    "#2D0607",
+    "#1F0506",
+)
+MAX_SRM = len(SRM_COLORS) - 1
+
+_SRM_RGB = tuple(tuple(int(color[i : i + 2], 16) for i in (1, 3, 5)) for color in SRM_COLORS)
+
+
+def _parse_srm(srm: Any) -> float | None:
+    if srm is None or isinstance(srm, bool):
+        return None
+    if isinstance(srm, str):
+        srm = srm.strip()
+        if not srm:
+            return None
+    try:
+        value = float(srm)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
 
 @register.filter
-def srm_to_hex(srm: int | str) -> str:
+def srm_to_hex(srm: Any) -> str:
     """
-    Takes an srm value as an int such as 1 or string such as '1' and returns a hex color code for it.
+    Takes an srm value such as 1, 1.5, Decimal("1.50") or '1' and returns a hex color code for it. As a template
+    filter, it may be given any value.
 
-    Colors from https://www.brewersfriend.com/color-calculator/
+    Fractional values are blended between the colors of the whole values on either side and values outside of
+    0 to 40 get the color of 0 or 40. An empty string is returned for anything which is not a number.
     """
-    mapping = {
-        0: "#FFF4D4",
-        1: "#FFE699",
-        2: "#FFD878",
-        3: "#FFCA5A",
-        4: "#FFBF42",
-        5: "#FBB123",
-        6: "#F8A600",
-        7: "#F39C00",
-        8: "#EA8F00",
-        9: "#E58500",
-        10: "#DE7C00",
-        11: "#D77200",
-        12: "#CF6900",
-        13: "#CB6200",
-        14: "#C35900",
-        15: "#BB5100",
-        16: "#B54C00",
-        17: "#B04500",
-        18: "#A63E00",
-        19: "#A13700",
-        20: "#9B3200",
-        21: "#952D00",
-        22: "#8E2900",
-        23: "#882300",
-        24: "#821E00",
-        25: "#7B1A00",
-        26: "#771900",
-        27: "#701400",
-        28: "#6A0E00",
-        29: "#660D00",
-        30: "#5E0B00",
-        31: "#5A0A02",
-        32: "#600903",
-        33: "#520907",
-        34: "#4C0505",
-        35: "#470606",
-        36: "#420607",
-        37: "#3D0708",
-        38: "#370607",
-        39: "#2D0607",
-        40: "#1F0506",
-    }
-    try:
-        return mapping.get(int(srm), mapping[40])
-    except Exception as e:
-        logger.exception(e)
+    value = _parse_srm(srm)
+    if value is None:
+        return ""
+    value = min(max(value, 0), MAX_SRM)
+    lower = int(value)
+    fraction = value - lower
+    if not fraction:
+        return SRM_COLORS[lower]
+    low, high = _SRM_RGB[lower], _SRM_RGB[lower + 1]
+    return "#" + "".join(f"{round(a + (b - a) * fraction):02X}" for a, b in zip(low, high))
+
 
-    return ""
+@register.filter
+def srm_gradient(style, direction: str = "to right") -> str:
+    """
+    Returns the css linear-gradient() from the minimum to the maximum color of a BeverageStyle, such as
+    `background-image: {{ page.style|srm_gradient }};`. The gradient starts at 0 or ends at 40 when the style
+    does not have a minimum or maximum color, or there is no style.
+    """
+    color_min = getattr(style, "color_min", None)
+    color_max = getattr(style, "color_max", None)
+    start = srm_to_hex(color_min if color_min is not None else 0) or SRM_COLORS[0]
+    end = srm_to_hex(color_max if color_max is not None else MAX_SRM) or SRM_COLORS[MAX_SRM]
+    return f"linear-gradient({direction}, {start}, {end})"
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+
+from wagtail.test.utils import WagtailPageTestCase
+
+from bash_shell_net.base.test_utils import add_wagtail_factory_page
+from bash_shell_net.on_tap.factories import OnTapPageFactory, RecipeIndexPageFactory, create_default_recipe_page
+from bash_shell_net.on_tap.models import RecipeFermentable, RecipeHop, RecipePage
+
+
+class UpdateRecipeStatisticsCommandTest(WagtailPageTestCase):
+    def setUp(self):
+        super().setUp()
+        on_tap_page = add_wagtail_factory_page(OnTapPageFactory)
+        recipe_index_page = add_wagtail_factory_page(RecipeIndexPageFactory, parent_page=on_tap_page)
+        self.recipe_page: RecipePage = recipe_index_page.add_child(instance=create_default_recipe_page())
+
+    def test_updates_recipe_statistics(self):
+        RecipePage.objects_no_prefetch.filter(pk=self.recipe_page.pk).update(
+            color_srm=None, grain_pounds=None, fermentable_pounds_per_gallon=None
+        )
+        out = StringIO()
+        call_command("update_recipe_statistics", stdout=out)
+        self.assertIn("Updated statistics for 1 recipe pages.", out.getvalue())
+
+        self.recipe_page.refresh_from_db()
+        self.assertEqual(26, self.recipe_page.color_srm)
+        self.assertEqual(Decimal("4.819"), self.recipe_page.grain_pounds)
+        self.assertEqual(Decimal("1.928"), self.recipe_page.fermentable_pounds_per_gallon)
+
+
+class BackfillIngredientWeightsCommandTest(WagtailPageTestCase):
+    def setUp(self):
+        super().setUp()
+        on_tap_page = add_wagtail_factory_page(OnTapPageFactory)
+        recipe_index_page = add_wagtail_factory_page(RecipeIndexPageFactory, parent_page=on_tap_page)
+        self.recipe_page: RecipePage = recipe_index_page.add_child(instance=create_default_recipe_page())
+
+    def test_backfills_amount_in_grams(self):
+        RecipeFermentable.objects.update(amount_in_grams=None)
+        RecipeHop.objects.update(amount_in_grams=None)
+        out = StringIO()
+        call_command("backfill_ingredient_weights", stdout=out)
+        self.assertIn("Updated amount_in_grams for 6 recipe fermentables.", out.getvalue())
+        self.assertIn("Updated amount_in_grams for 1 recipe hops.", out.getvalue())
+        self.assertFalse(RecipeFermentable.objects.filter(amount_in_grams=None).exists())
+        self.assertEqual(Decimal("19.8446661875"), RecipeHop.objects.get().amount_in_grams)
+
+        # only rows missing a value are touched by default
+        out = StringIO()
+        call_command("backfill_ingredient_weights", stdout=out)
+        self.assertIn("Updated amount_in_grams for 0 recipe fermentables.", out.getvalue())
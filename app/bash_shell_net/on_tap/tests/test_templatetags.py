@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from bash_shell_net.on_tap.models import BeverageStyle
+from bash_shell_net.on_tap.templatetags.on_tap_tags import SRM_COLORS, srm_gradient, srm_to_hex
+
+
+class SrmToHexTest(SimpleTestCase):
+    def test_whole_values(self):
+        for srm in range(41):
+            with self.subTest(srm=srm):
+                self.assertEqual(SRM_COLORS[srm], srm_to_hex(srm))
+                self.assertEqual(SRM_COLORS[srm], srm_to_hex(str(srm)))
+                self.assertEqual(SRM_COLORS[srm], srm_to_hex(Decimal(srm).quantize(Decimal("0.01"))))
+
+    def test_fractional_values_are_interpolated(self):
+        # halfway between #FFF4D4 and #FFE699
+        self.assertEqual("#FFEDB6", srm_to_hex(Decimal("0.5")))
+        self.assertEqual("#FFEDB6", srm_to_hex("0.5"))
+        self.assertEqual(srm_to_hex(7), srm_to_hex(7.0))
+
+    def test_clamps_out_of_range_values(self):
+        self.assertEqual(SRM_COLORS[0], srm_to_hex(-3))
+        self.assertEqual(SRM_COLORS[40], srm_to_hex(41))
+        self.assertEqual(SRM_COLORS[40], srm_to_hex("1000"))
+
+    def test_invalid_values(self):
+        for srm in [None, "", "dark", float("nan"), float("inf"), [1]]:
+            with self.subTest(srm=srm):
+                self.assertEqual("", srm_to_hex(srm))
+
+    def test_srm_gradient(self):
+        style = BeverageStyle(color_min=Decimal("3.00"), color_max=Decimal("6.00"))
+        self.assertEqual(f"linear-gradient(to right, {SRM_COLORS[3]}, {SRM_COLORS[6]})", srm_gradient(style))
+        self.assertEqual(f"linear-gradient(to right, {SRM_COLORS[0]}, {SRM_COLORS[40]})", srm_gradient(None))
+        self.assertEqual(
+            f"linear-gradient(to right, {SRM_COLORS[0]}, {SRM_COLORS[6]})",
+            srm_gradient(BeverageStyle(color_max=Decimal("6.00"))),
+        )
+        rendered = Template("{% load on_tap_tags %}{{ style|srm_gradient:'to left' }}").render(
+            Context({"style": style})
+        )
+        self.assertEqual(f"linear-gradient(to left, {SRM_COLORS[3]}, {SRM_COLORS[6]})", rendered)
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from bash_shell_net.on_tap.models import RecipeFermentable, RecipeHop
+from bash_shell_net.on_tap.units import (
+    VolumeToGallonsConverter,
+    VolumeUnit,
+    WeightToGramsConverter,
+    WeightUnits,
+    conversion_ratio,
+    convert,
+    convert_each,
+    convert_many,
+    convert_volume_to_gallons,
+    convert_weight_to_grams,
+)
+
+AMOUNTS = [Decimal("0"), Decimal("0.388"), Decimal("1.500"), Decimal("3.600"), Decimal("8.00"), Decimal("1234.567")]
+
+
+class ConversionTest(SimpleTestCase):
+    def test_convert_volume_to_gallons_matches_converter(self):
+        for unit in [VolumeUnit.GALLON, VolumeUnit.QUART, VolumeUnit.FLUID_OZ, VolumeUnit.LITER]:
+            for amount in AMOUNTS:
+                with self.subTest(unit=unit, amount=amount):
+                    expected = amount * VolumeToGallonsConverter[unit.name].value
+                    result = convert_volume_to_gallons(amount, unit)
+                    self.assertEqual(expected, result)
+                    self.assertEqual(expected.as_tuple(), result.as_tuple())
+
+    def test_convert_weight_to_grams_matches_converter(self):
+        for unit in WeightUnits:
+            for amount in AMOUNTS:
+                with self.subTest(unit=unit, amount=amount):
+                    expected = amount * WeightToGramsConverter[unit.name].value
+                    result = convert_weight_to_grams(amount, unit)
+                    self.assertEqual(expected, result)
+                    self.assertEqual(expected.as_tuple(), result.as_tuple())
+
+        self.assertEqual(
+            convert_weight_to_grams(Decimal("3.600"), WeightUnits.POUNDS),
+            convert_weight_to_grams(Decimal("3.600"), "lb"),
+        )
+
+    def test_weight_in_pounds_matches_original_conversion(self):
+        def original_weight_in_pounds(amount: Decimal, amount_units: str) -> Decimal:
+            if amount_units == "kg":
+                return amount * Decimal("2.20462262")
+            elif amount_units == "oz":
+                return amount / Decimal("16.0")
+            elif amount_units == "g":
+                return (amount / Decimal("1000")) * Decimal("2.2042262")
+            return amount
+
+        for unit in ["lb", "oz", "g", "kg"]:
+            for amount in AMOUNTS:
+                with self.subTest(unit=unit, amount=amount):
+                    fermentable = RecipeFermentable(amount=amount, amount_units=unit)
+                    self.assertEqual(original_weight_in_pounds(amount, unit), fermentable.weight_in_pounds())
+
+    def test_weight_in_ounces_matches_original_conversion(self):
+        for unit in ["oz", "g"]:
+            for amount in AMOUNTS:
+                with self.subTest(unit=unit, amount=amount):
+                    expected = amount * Decimal("0.035274") if unit == "g" else amount
+                    self.assertEqual(expected, RecipeHop(amount=amount, amount_units=unit).weight_in_ounces())
+
+    def test_all_unit_pairs_have_ratios(self):
+        for units in [VolumeUnit.values, WeightUnits.values]:
+            for from_unit in units:
+                for to_unit in units:
+                    with self.subTest(from_unit=from_unit, to_unit=to_unit):
+                        self.assertGreater(conversion_ratio(from_unit, to_unit), 0)
+
+        self.assertEqual(Decimal(1), conversion_ratio(VolumeUnit.LITER, VolumeUnit.LITER))
+        self.assertEqual(Decimal(3), conversion_ratio(VolumeUnit.TABLESPOON, VolumeUnit.TEASPOON))
+        self.assertEqual(Decimal(32), conversion_ratio(VolumeUnit.QUART, VolumeUnit.FLUID_OZ))
+        self.assertEqual(Decimal(16), conversion_ratio(WeightUnits.POUNDS, WeightUnits.OUNCES))
+
+    def test_incompatible_units(self):
+        with self.assertRaises(ValueError):
+            conversion_ratio(VolumeUnit.GALLON, WeightUnits.POUNDS)
+        with self.assertRaises(ValueError):
+            convert(Decimal("1"), "bushel", VolumeUnit.GALLON)
+
+    def test_default_ratio(self):
+        self.assertEqual(Decimal(1), conversion_ratio(VolumeUnit.GALLON, WeightUnits.POUNDS, Decimal(1)))
+        self.assertEqual(Decimal("2.5"), convert(Decimal("2.5"), "bushel", WeightUnits.POUNDS, Decimal(1)))
+        self.assertEqual(
+            [Decimal("2.5"), Decimal("0.5")],
+            convert_each([(Decimal("2.5"), "bushel"), (Decimal("8"), "oz")], WeightUnits.POUNDS, Decimal(1)),
+        )
+
+    def test_unknown_units_keep_original_fallback(self):
+        """
+        Test that amounts in units which cannot be converted are returned unchanged, as they always have been
+        """
+        fermentable = RecipeFermentable(amount=Decimal("3.600"), amount_units="bushel")
+        self.assertEqual(Decimal("3.600"), fermentable.weight_in_pounds())
+        self.assertIsNone(fermentable.calculate_amount_in_grams())
+        self.assertEqual(Decimal("0.7"), RecipeHop(amount=Decimal("0.7"), amount_units="tsp").weight_in_ounces())
+
+    def test_convert_many(self):
+        self.assertEqual(
+            [convert(amount, VolumeUnit.LITER, VolumeUnit.GALLON) for amount in AMOUNTS],
+            convert_many(AMOUNTS, VolumeUnit.LITER, VolumeUnit.GALLON),
+        )
+        self.assertEqual([], convert_many([], WeightUnits.GRAMS, WeightUnits.POUNDS))
+
+    def test_convert_each(self):
+        amounts = [(Decimal("3.600"), "lb"), (Decimal("8.00"), "oz"), (Decimal("500"), "g"), (Decimal("1.5"), "kg")]
+        self.assertEqual(
+            [RecipeFermentable(amount=amount, amount_units=unit).weight_in_pounds() for amount, unit in amounts],
+            convert_each(amounts, WeightUnits.POUNDS),
+        )
@@ -0,0 +1,167 @@
+"""
+Volume and weight units used by recipes and batches along with the conversions between them.
+
+Every conversion between two units of the same kind is a single precomputed ratio, so converting an amount
+is one Decimal multiply and a dict lookup rather than an Enum lookup or a chain of unit checks.
+"""
+
+from decimal import Decimal
+from enum import Enum
+from fractions import Fraction
+from typing import Iterable
+
+from django.db import models
+
+
+class VolumeUnit(models.TextChoices):
+    TEASPOON = "tsp", "Teaspoon"
+    TABLESPOON = "tbsp", "Tablespoon"
+    FLUID_OZ = "fl_oz", "Fluid Oz"
+    LITER = "l", "Liter"
+    QUART = "quart"
+    GALLON = "gal", "Gallon"
+
+
+class VolumeToGallonsConverter(Enum):
+    """
+    Multipliers to convert from other volume units to gallons.
+
+    Multiply other volumes times these to convert to gallons. 4 quarts = 1 gallon, so multiple quarts by 0.25, etc.
+    """
+
+    # TODO: Similarly to VolumeUnit, making this a models.Choices subclass like
+    # VolumeToGallonsConverter(decimal.Decimal, models.Choices):
+    # might be a good idea.
+    GALLON = Decimal(1)
+    FLUID_OZ = Decimal("0.0078125")
+    QUART = Decimal("0.25")
+    LITER = Decimal("0.26417287")
+
+
+class WeightUnits(models.TextChoices):
+    GRAMS = "g", "Gram"
+    OUNCES = "oz", "Ounce"
+    POUNDS = "lbs", "Pound"
+    KILOGRAMS = "kg", "Kilogram"
+
+
+class WeightToGramsConverter(Enum):
+    """
+    Multipliers to convert from other weight units to grams.
+
+    Grams are the canonical unit ingredient weights are stored in for use in database aggregates.
+    """
+
+    GRAMS = Decimal(1)
+    OUNCES = Decimal("28.349523125")
+    POUNDS = Decimal("453.59237")
+    KILOGRAMS = Decimal(1000)
+
+
+# Teaspoons and tablespoons are not used for batch volumes, so they are not part of VolumeToGallonsConverter,
+# which is also used to convert batch volumes in the database.
+_GALLONS_PER_VOLUME_UNIT: dict[str, Decimal | Fraction] = {
+    **{VolumeUnit[converter.name]: converter.value for converter in VolumeToGallonsConverter},
+    VolumeUnit.TABLESPOON: Fraction(1, 256),
+    VolumeUnit.TEASPOON: Fraction(1, 768),
+}
+
+_GRAMS_PER_WEIGHT_UNIT: dict[str, Decimal | Fraction] = {WeightUnits[c.name]: c.value for c in WeightToGramsConverter}
+
+# The pound and ounce conversions used for displaying recipes have always used these ratios. They are kept
+# so that displayed amounts and estimated colors do not change. amount_in_grams and everything else uses the
+# exact ratios from WeightToGramsConverter.
+_LEGACY_WEIGHT_RATIOS: dict[tuple[str, str], Decimal] = {
+    (WeightUnits.KILOGRAMS, WeightUnits.POUNDS): Decimal("2.20462262"),
+    (WeightUnits.OUNCES, WeightUnits.POUNDS): Decimal("0.0625"),
+    (WeightUnits.GRAMS, WeightUnits.POUNDS): Decimal("0.0022042262"),
+    (WeightUnits.GRAMS, WeightUnits.OUNCES): Decimal("0.035274"),
+}
+
+# Ingredient unit choices spell some units differently than WeightUnits does
+UNIT_ALIASES: dict[str, str] = {"lb": WeightUnits.POUNDS}
+
+
+def _build_ratios(to_base: dict[str, Decimal | Fraction]) -> dict[tuple[str, str], Decimal]:
+    ratios: dict[tuple[str, str], Decimal] = {}
+    for from_unit, from_base in to_base.items():
+        for to_unit, to_base_value in to_base.items():
+            if from_unit == to_unit:
+                ratio = Decimal(1)
+            elif to_base_value == 1 and isinstance(from_base, Decimal):
+                # keep the multiplier exactly as written when converting to the base unit
+                ratio = from_base
+            else:
+                # divided as fractions so that ratios such as tablespoons to teaspoons come out exact
+                fraction = Fraction(from_base) / Fraction(to_base_value)
+                ratio = Decimal(fraction.numerator) / Decimal(fraction.denominator)
+            ratios[(from_unit, to_unit)] = ratio
+    return ratios
+
+
+CONVERSION_RATIOS: dict[tuple[str, str], Decimal] = {
+    **_build_ratios(_GALLONS_PER_VOLUME_UNIT),
+    **_build_ratios(_GRAMS_PER_WEIGHT_UNIT),
+    **_LEGACY_WEIGHT_RATIOS,
+}
+
+
+def conversion_ratio(from_unit: str, to_unit: str, default: Decimal | None = None) -> Decimal:
+    """
+    Returns the multiplier to convert an amount in from_unit to to_unit.
+
+    Raises ValueError when the units cannot be converted between, such as a volume to a weight, unless a
+    `default` ratio to use for those is given.
+    """
+    try:
+        return CONVERSION_RATIOS[(UNIT_ALIASES.get(from_unit, from_unit), UNIT_ALIASES.get(to_unit, to_unit))]
+    except KeyError:
+        if default is not None:
+            return default
+        raise ValueError(f"Cannot convert from {from_unit!r} to {to_unit!r}") from None
+
+
+def convert(amount: Decimal, from_unit: str, to_unit: str, default_ratio: Decimal | None = None) -> Decimal:
+    """
+    Converts amount from from_unit to to_unit. See conversion_ratio() for `default_ratio`.
+    """
+    return amount * conversion_ratio(from_unit, to_unit, default_ratio)
+
+
+def convert_many(amounts: Iterable[Decimal], from_unit: str, to_unit: str) -> list[Decimal]:
+    """
+    Converts every amount in amounts from from_unit to to_unit, looking the ratio up once.
+    """
+    ratio = conversion_ratio(from_unit, to_unit)
+    return [amount * ratio for amount in amounts]
+
+
+def convert_each(
+    amounts: Iterable[tuple[Decimal, str]], to_unit: str, default_ratio: Decimal | None = None
+) -> list[Decimal]:
+    """
+    Converts a list of (amount, unit) pairs, such as the amounts and units of a recipe's ingredients, to to_unit,
+    looking the ratio up once per distinct unit. See conversion_ratio() for `default_ratio`.
+    """
+    ratios: dict[str, Decimal] = {}
+    converted: list[Decimal] = []
+    for amount, unit in amounts:
+        if (ratio := ratios.get(unit)) is None:
+            ratio = ratios[unit] = conversion_ratio(unit, to_unit, default_ratio)
+        converted.append(amount * ratio)
+    return converted
+
+
+def convert_volume_to_gallons(volume: Decimal, unit: VolumeUnit) -> Decimal:
+    """
+    Converts the batch volume to gallons for use in SRM estimation using Morey's equation
+    """
+    return convert(volume, unit, VolumeUnit.GALLON)
+
+
+def convert_weight_to_grams(weight: Decimal, unit: str) -> Decimal:
+    """
+    Converts a weight to grams. unit should be a WeightUnits value, although "lb" as used by the ingredient
+    unit choices is accepted for pounds as well.
+    """
+    return convert(weight, unit, WeightUnits.GRAMS)
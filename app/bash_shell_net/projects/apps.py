@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ProjectsConfig(AppConfig):
     name = "bash_shell_net.projects"
+
+    def ready(self) -> None:
+        from bash_shell_net.projects import signals  # noqa: F401
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bash_shell_net.base.instrumentation import record_cache_lookups
+from bash_shell_net.projects.models import Language
+
+PROJECT_LANGUAGES_CACHE_KEY = "projects:languages"
+
+# (expires at, languages) for this process, so that most requests do not need to go to the shared cache either
+_local_languages: dict[str, tuple[float, list[Language]]] = {}
+
+
+def get_project_languages() -> list[Language]:
+    """
+    Returns every Language ordered by name.
+
+    The list is cached in the shared cache until a Language is saved or deleted, and in each process for
+    PROJECTS_LANGUAGES_LOCAL_CACHE_TIMEOUT seconds. Other processes can show the old list for up to that long after
+    a change.
+    """
+    now = time.monotonic()
+    local = _local_languages.get(PROJECT_LANGUAGES_CACHE_KEY)
+    if local is not None and local[0] > now:
+        return local[1]
+
+    languages = cache.get(PROJECT_LANGUAGES_CACHE_KEY)
+    record_cache_lookups(hits=int(languages is not None), misses=int(languages is None))
+    if languages is None:
+        languages = list(Language.objects.all().order_by("name"))
+        cache.set(PROJECT_LANGUAGES_CACHE_KEY, languages, settings.PROJECTS_LANGUAGES_CACHE_TIMEOUT)
+    _local_languages[PROJECT_LANGUAGES_CACHE_KEY] = (now + settings.PROJECTS_LANGUAGES_LOCAL_CACHE_TIMEOUT, languages)
+    return languages
+
+
+def clear_project_languages_cache() -> None:
+    """
+    Drops the cached languages from the shared cache and from this process
+    """
+    _local_languages.pop(PROJECT_LANGUAGES_CACHE_KEY, None)
+    cache.delete(PROJECT_LANGUAGES_CACHE_KEY)
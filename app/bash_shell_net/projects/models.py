@@ -34,6 +34,36 @@ class Language(models.Model):
         return self.name
 
 
+class ProjectQuerySet(models.QuerySet):
+    def active(self) -> "ProjectQuerySet":
+        return self.filter(is_active=True)
+
+    def for_list(self) -> "ProjectQuerySet":
+        """
+        Projects with what the project list shows of them loaded in the same query
+        """
+        return self.select_related("primary_language")
+
+    def for_detail(self) -> "ProjectQuerySet":
+        """
+        Projects with everything the project detail page shows of them prefetched.
+
+        `project_news` is prefetched with only the published news, newest first, so `project.project_news.all()`
+        on these projects does not include unpublished news.
+        """
+        return self.select_related("primary_language").prefetch_related(
+            "other_languages",
+            models.Prefetch(
+                "project_hosting_services",
+                queryset=ProjectHostingService.objects.select_related("hosting_service"),
+            ),
+            models.Prefetch(
+                "project_news",
+                queryset=ProjectNews.objects.filter(is_published=True).order_by("-created_date"),
+            ),
+        )
+
+
 class Project(models.Model):
     """
     A software development project
@@ -59,6 +89,8 @@ class Project(models.Model):
     is_active = models.BooleanField(blank=True, default=False)
     slug = models.SlugField(blank=True, max_length=50, default="")
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         ordering = ("name",)
 
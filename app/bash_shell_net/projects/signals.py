@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bash_shell_net.projects.cache import clear_project_languages_cache
+from bash_shell_net.projects.models import Language
+
+
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+def evict_project_languages(sender, instance: Language, **kwargs) -> None:
+    """
+    Drop the cached list of languages when one is added, changed, or deleted
+    """
+    clear_project_languages_cache()
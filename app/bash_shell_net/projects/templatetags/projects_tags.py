@@ -1,12 +1,7 @@
 from django import template
 
-from ..models import Language
+from ..cache import get_project_languages
 
 register = template.Library()
 
-
-def get_project_languages():
-    return Language.objects.all().order_by("name")
-
-
 register.simple_tag(get_project_languages)
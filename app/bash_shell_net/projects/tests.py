@@ -1,9 +1,16 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.template import Context, Template
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
+from bash_shell_net.projects.cache import clear_project_languages_cache, get_project_languages
 from bash_shell_net.projects.factories import ActiveProjectFactory, ProjectFactory
-from bash_shell_net.projects.models import HostingService, Language, Project, ProjectNews
+from bash_shell_net.projects.models import HostingService, Language, Project, ProjectHostingService, ProjectNews
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 
 class HostingServiceTests(TestCase):
@@ -134,3 +141,102 @@ class ProjectNewsTest(TestCase):
         news = ProjectNews(project=self.project, content="test")
         news.save()
         self.assertFalse(news.is_published)
+
+
+class ProjectViewQueryCountTest(TestCase):
+    """
+    The project views should not make more queries as there are more projects, languages, hosts, or news
+    """
+
+    def add_project(self, number: int) -> Project:
+        project = ActiveProjectFactory.create(
+            name=f"Project {number}",
+            primary_language=Language.objects.create(name=f"Language {number}", description=""),
+        )
+        project.other_languages.add(Language.objects.create(name=f"Other Language {number}", description=""))
+        hosting_service = HostingService.objects.create(name=f"Host {number}")
+        ProjectHostingService.objects.create(
+            project=project,
+            hosting_service=hosting_service,
+            project_url="https://example.com/",
+            public_vcs_uri="https://example.com/project.git",
+            vcs=ProjectHostingService.VersionControlSystems.GIT,
+        )
+        ProjectNews.objects.create(project=project, title=f"News {number}", content="Some news", is_published=True)
+        ProjectNews.objects.create(project=project, title=f"Draft {number}", content="Not yet", is_published=False)
+        return project
+
+    def test_list_view_query_count(self) -> None:
+        self.add_project(0)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("projects_project_list"))
+        self.assertEqual(1, len(response.context["project_list"]))
+
+        for number in range(1, 6):
+            self.add_project(number)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("projects_project_list"))
+        self.assertEqual(6, len(response.context["project_list"]))
+
+    def test_detail_view_query_count(self) -> None:
+        project = self.add_project(0)
+        with self.assertNumQueries(4):
+            response = self.client.get(project.get_absolute_url())
+        self.assertEqual(["News 0"], [news.title for news in response.context["project_news"]])
+
+        for number in range(1, 4):
+            other_project = self.add_project(number)
+            ProjectHostingService.objects.filter(project=other_project).update(project=project)
+            ProjectNews.objects.filter(project=other_project).update(project=project)
+        with self.assertNumQueries(4):
+            response = self.client.get(project.get_absolute_url())
+        self.assertEqual(4, response.context["project_news"].count())
+        self.assertContains(response, "Host 3")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProjectLanguagesCacheTest(TestCase):
+    """Tests the cached get_project_languages template tag"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        clear_project_languages_cache()
+        self.python = Language.objects.create(name="Python")
+        Language.objects.create(name="Elixir")
+
+    def tearDown(self) -> None:
+        clear_project_languages_cache()
+        super().tearDown()
+
+    def test_languages_are_cached(self) -> None:
+        with self.assertNumQueries(1):
+            self.assertEqual(["Elixir", "Python"], [language.name for language in get_project_languages()])
+        with self.assertNumQueries(0):
+            rendered = Template(
+                "{% load projects_tags %}{% get_project_languages as languages %}"
+                "{% for language in languages %}{{ language.name }} {% endfor %}"
+            ).render(Context())
+        self.assertEqual("Elixir Python ", rendered)
+
+        # the process keeps its own copy for a short time, then goes back to the shared cache
+        cache.clear()
+        with self.assertNumQueries(0):
+            get_project_languages()
+        with mock.patch("bash_shell_net.projects.cache.time.monotonic", return_value=10**9):
+            with self.assertNumQueries(1):
+                get_project_languages()
+            with self.assertNumQueries(0):
+                get_project_languages()
+
+    def test_saving_or_deleting_a_language_clears_the_cache(self) -> None:
+        get_project_languages()
+        Language.objects.create(name="Go")
+        with self.assertNumQueries(1):
+            self.assertEqual(["Elixir", "Go", "Python"], [language.name for language in get_project_languages()])
+
+        self.python.name = "Python 3"
+        self.python.save()
+        self.assertEqual(["Elixir", "Go", "Python 3"], [language.name for language in get_project_languages()])
+
+        self.python.delete()
+        self.assertEqual(["Elixir", "Go"], [language.name for language in get_project_languages()])
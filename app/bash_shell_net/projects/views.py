@@ -9,17 +9,18 @@ class ProjectListView(ListView):
     """
 
     model = Project
-    queryset = Project.objects.filter(is_active=True).order_by("primary_language__name", "name")
+    queryset = Project.objects.active().for_list().order_by("primary_language__name", "name")
     template_name = "projects/projects_list.html"
 
 
 class ProjectDetailView(DetailView):
     model = Project
-    queryset = Project.objects.filter(is_active=True)
+    queryset = Project.objects.active().for_detail()
     template_name = "projects/project_detail.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context.update({"project_news": self.object.project_news.filter(is_published=True).order_by("-created_date")})
+        # only the published news is prefetched by for_detail()
+        context.update({"project_news": self.object.project_news.all()})
 
         return context
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class WagtailBlocksConfig(AppConfig):
+    name = "bash_shell_net.wagtail_blocks"
+
+    def ready(self) -> None:
+        from bash_shell_net.wagtail_blocks import signals  # noqa: F401
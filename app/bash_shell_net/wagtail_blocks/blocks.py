@@ -2,14 +2,20 @@
 Extra wagtail blocks for the site.
 """
 
+from typing import Any, Iterator
+
 from django.utils.safestring import mark_safe
 
 from wagtail import blocks
 from wagtail.images.blocks import ImageChooserBlock
 
-from pygments import highlight
-from pygments.formatters import get_formatter_by_name
-from pygments.lexers import get_lexer_by_name, guess_lexer
+from bash_shell_net.wagtail_blocks.highlight import (
+    HIGHLIGHT_VERSION,
+    highlight_code,
+    highlight_code_batch,
+    resolve_language,
+    warm_highlighting_pools,
+)
 
 
 class LineNumberStyle:
@@ -52,6 +58,17 @@ class CodeHighlightLanguage:
     YAML = "yaml"
 
 
+class CodeBlockValue(blocks.StructValue):
+    """
+    Value of a CodeBlock, which also carries the highlighted html stored with the block, if there was any.
+    """
+
+    # {"version": HIGHLIGHT_VERSION, "html": "..."} as stored by CodeBlock.get_prep_value()
+    highlighted: dict | None = None
+    # the language detected when the block was saved with CodeHighlightLanguage.AUTO
+    resolved_language: str | None = None
+
+
 class CodeBlock(blocks.StructBlock):
     """
     Code block with pygments based code highlighting for wagtail
@@ -111,36 +128,145 @@ class CodeBlock(blocks.StructBlock):
 
         icon = "code"
         template = "wagtail_blocks/codeblock.html"
+        value_class = CodeBlockValue
+
+    def to_python(self, value):
+        struct_value = super().to_python(value)
+        struct_value.highlighted = value.get("highlighted")
+        struct_value.resolved_language = value.get("resolved_language")
+        return struct_value
+
+    def bulk_to_python(self, values):
+        struct_values = super().bulk_to_python(values)
+        for struct_value, value in zip(struct_values, values):
+            struct_value.highlighted = value.get("highlighted")
+            struct_value.resolved_language = value.get("resolved_language")
+        return struct_values
+
+    def get_prep_value(self, value):
+        """
+        Stores the highlighted html along with the block's fields so that pages do not need to highlight the code
+        when they are viewed. When the language is CodeHighlightLanguage.AUTO, the detected language is stored
+        as well.
+        """
+        prep_value = super().get_prep_value(value)
+        language = value.get("language") or ""
+        if language == CodeHighlightLanguage.AUTO:
+            # detected again on every save, since the code or filename may have changed since it was loaded
+            language = prep_value["resolved_language"] = resolve_language(self._get_src(value), value.get("filename"))
+        prep_value["highlighted"] = {"version": HIGHLIGHT_VERSION, "html": self.highlight(value, language)}
+        return prep_value
+
+    def _get_src(self, value) -> str:
+        return (value.get("code") or "").strip("\n")
+
+    def get_language(self, value) -> str:
+        """
+        Returns the pygments lexer name to highlight `value` with. For CodeHighlightLanguage.AUTO this is the
+        language detected when the block was saved, or detected now for blocks which have not been saved.
+        """
+        if language := value.get("language"):
+            return language
+        return getattr(value, "resolved_language", None) or resolve_language(
+            self._get_src(value), value.get("filename")
+        )
+
+    def highlight(self, value, language: str | None = None) -> str:
+        """
+        Returns the html for the code of `value` highlighted by pygments.
+        """
+        if language is None:
+            language = self.get_language(value)
+        return highlight_code(self._get_src(value), language, value["line_numbers"])
+
+    def get_prerendered_html(self, value) -> str | None:
+        """
+        Returns the html stored with the block by get_prep_value() if it was highlighted by the current version of
+        pygments with the current formatter options.
+        """
+        highlighted = getattr(value, "highlighted", None)
+        if highlighted and highlighted.get("version") == HIGHLIGHT_VERSION:
+            return highlighted.get("html")
+        return None
+
+    def needs_prerender(self, value) -> bool:
+        """
+        Whether `value` is missing any of the values get_prep_value() stores, or has html highlighted by an old
+        version of pygments or with other formatter options.
+        """
+        if self.get_prerendered_html(value) is None:
+            return True
+        return not value.get("language") and not getattr(value, "resolved_language", None)
 
     def get_context(self, value, parent_context=None):
         context = super().get_context(value, parent_context=parent_context)
-        src = value.get("code") or ""
-        src = src.strip("\n")
-        lang = value.get("language") or ""
-        line_numbers = value["line_numbers"]
-
-        if lang:
-            lexer = get_lexer_by_name(lang)
-        else:
-            lexer = guess_lexer(src)
-        formatter = get_formatter_by_name(
-            "html",
-            linenos=line_numbers,
-            cssclass="codehilite",
-            style="default",
-            noclasses=False,
-        )
+        if (html := self.get_prerendered_html(value)) is None:
+            html = self.highlight(value)
+
         context.update(
             {
                 "filename": value.get("filename"),
                 "display_filename": value.get("display_filename"),
                 "language": value.get("lang"),
-                "code": mark_safe(highlight(src, lexer, formatter)),
+                "code": mark_safe(html),
             }
         )
         return context
 
 
+def find_code_blocks(block: blocks.Block, value: Any) -> Iterator[tuple["CodeBlock", CodeBlockValue]]:
+    """
+    Yields each CodeBlock and its value found in `value` of `block`, including those nested in StructBlocks,
+    ListBlocks and StreamBlocks.
+    """
+    if value is None:
+        return
+    if isinstance(block, CodeBlock):
+        yield block, value
+    elif isinstance(block, blocks.StreamBlock):
+        for child in value:
+            yield from find_code_blocks(child.block, child.value)
+    elif isinstance(block, blocks.ListBlock):
+        for item in value:
+            yield from find_code_blocks(block.child_block, item)
+    elif isinstance(block, blocks.StructBlock):
+        for name, child_block in block.child_blocks.items():
+            yield from find_code_blocks(child_block, value.get(name))
+
+
+def highlight_code_blocks(stream_value: blocks.StreamValue) -> None:
+    """
+    Highlights every code block in `stream_value` which does not have current html stored with it in one batch,
+    rather than one at a time as each block is rendered. The html is set on the block values, so rendering the
+    StreamField afterwards, such as with `{% include_block %}`, uses it without highlighting anything.
+    """
+    pending = []
+    for block, value in find_code_blocks(stream_value.stream_block, stream_value):
+        if block.get_prerendered_html(value) is None:
+            language = block.get_language(value)
+            if not value.get("language"):
+                value.resolved_language = language
+            pending.append((value, (block._get_src(value), language, value["line_numbers"])))
+
+    if not pending:
+        return
+    highlighted = highlight_code_batch(item for _, item in pending)
+    for value, item in pending:
+        value.highlighted = {"version": HIGHLIGHT_VERSION, "html": highlighted[item]}
+
+
+def warm_code_block_highlighting() -> None:
+    """
+    Builds the shared lexers and formatters for every language and line number style a CodeBlock can be set to.
+    The web server calls this when it starts, from config/wsgi.py, so that management commands and tests do not
+    pay for it.
+    """
+    warm_highlighting_pools(
+        languages=[language for language, _ in CodeBlock.LANGUAGE_CHOICES],
+        line_number_styles=[line_numbers for line_numbers, _ in CodeBlock.LINE_NUMBER_CHOICES],
+    )
+
+
 class DetailImageChooserBlock(blocks.StructBlock):
     """
     ImageBlock with more meta details
@@ -0,0 +1,70 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.utils.safestring import SafeString, mark_safe
+
+from wagtail.fields import StreamField
+from wagtail.models import Page
+
+from bash_shell_net.base.instrumentation import record_cache_lookups
+from bash_shell_net.wagtail_blocks.blocks import highlight_code_blocks
+
+STREAMFIELD_CACHE_PREFIX = "wagtail_blocks:streamfield"
+
+
+def streamfield_cache_key(page_id: int, revision_id: int, field_name: str) -> str:
+    """
+    Cache key for the rendered html of the StreamField `field_name` of a page revision
+    """
+    return f"{STREAMFIELD_CACHE_PREFIX}:{page_id}:{revision_id}:{field_name}"
+
+
+def streamfield_cache_pattern(page_id: int) -> str:
+    """
+    Pattern matching every cached StreamField of a page, regardless of revision or field
+    """
+    return f"{STREAMFIELD_CACHE_PREFIX}:{page_id}:*"
+
+
+def evict_live_streamfields(page: Page) -> None:
+    """
+    Drops the cached html of every StreamField of the live revision of `page`, which should be the specific page.
+    This works with any cache backend, unlike deleting streamfield_cache_pattern(), since the keys are known.
+    """
+    if not page.live_revision_id:
+        return
+    field_names = [field.name for field in page._meta.fields if isinstance(field, StreamField)]
+    cache.delete_many([streamfield_cache_key(page.pk, page.live_revision_id, name) for name in field_names])
+
+
+def render_streamfield(
+    page: Page, field_name: str, context: dict[str, Any] | None = None, request: HttpRequest | None = None
+) -> SafeString:
+    """
+    Renders the StreamField `field_name` of `page` the same way `{% include_block %}` does, caching the html per
+    live revision of the page.
+
+    Previews and pages which are not live are rendered without the cache since the page may not match the live
+    revision. The blocks should not depend on anything in `context` other than the page, or the first rendering
+    of them will be what every request gets. Code blocks without stored html are highlighted together before
+    rendering.
+    """
+    value = getattr(page, field_name)
+    if value is None:
+        return mark_safe("")
+
+    cache_key = None
+    if page.live and page.live_revision_id and not getattr(request, "is_preview", False):
+        cache_key = streamfield_cache_key(page.pk, page.live_revision_id, field_name)
+        if (html := cache.get(cache_key)) is not None:
+            record_cache_lookups(hits=1)
+            return mark_safe(html)
+        record_cache_lookups(misses=1)
+
+    highlight_code_blocks(value)
+    html = value.render_as_block(context=context)
+    if cache_key:
+        cache.set(cache_key, str(html), settings.WAGTAIL_BLOCKS_STREAMFIELD_CACHE_TIMEOUT)
+    return mark_safe(html)
@@ -0,0 +1,207 @@
+"""
+Pygments highlighting for CodeBlock with the results cached by content.
+
+Highlighting the same code with the same options always gives the same html, so the results are kept in the
+Django cache keyed by a hash of the code, the options and the pygments version. Only the first worker to see
+a snippet has to wait on Pygments.
+"""
+
+import functools
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+import pygments
+from pygments import highlight
+from pygments.formatter import Formatter
+from pygments.formatters import get_formatter_by_name
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name, get_lexer_for_filename, guess_lexer
+from pygments.util import ClassNotFound
+
+from bash_shell_net.base.instrumentation import record_cache_lookups
+
+HIGHLIGHT_CACHE_PREFIX = "wagtail_blocks:highlight"
+
+# options for the pygments HtmlFormatter other than line numbers, which are set per block
+FORMATTER_OPTIONS = {
+    "cssclass": "codehilite",
+    "style": "default",
+    "noclasses": False,
+}
+
+
+# Stored with html highlighted ahead of time, such as by CodeBlock.get_prep_value(), so that html highlighted by
+# a different pygments version or with different formatter options can be recognized and highlighted again.
+HIGHLIGHT_VERSION = hashlib.sha256(
+    json.dumps([FORMATTER_OPTIONS, pygments.__version__], sort_keys=True).encode()
+).hexdigest()[:12]
+
+
+# the pygments lexer for code which no other lexer could be found for
+PLAIN_TEXT_LANGUAGE = "text"
+
+# interpreters from a #! line and the pygments lexer to use for them
+SHEBANG_LANGUAGES = {
+    "bash": "bash",
+    "sh": "bash",
+    "zsh": "bash",
+    "node": "javascript",
+    "perl": "perl",
+    "php": "php",
+    "python": "python",
+    "ruby": "ruby",
+}
+
+
+def _get_alias(lexer: Lexer) -> str | None:
+    # the name get_lexer() looks the lexer up by. A few lexers, mostly ones only used by other lexers, have none.
+    return lexer.aliases[0] if lexer.aliases else None
+
+
+def _language_from_filename(code: str, filename: str) -> str | None:
+    if not filename:
+        return None
+    try:
+        return _get_alias(get_lexer_for_filename(filename, code=code))
+    except ClassNotFound:
+        return None
+
+
+def _language_from_content(code: str) -> str | None:
+    first_line = code.lstrip().split("\n", 1)[0]
+    if first_line.startswith("<?php"):
+        return "php"
+    if not first_line.startswith("#!"):
+        return None
+    command = first_line[2:].split()
+    if not command:
+        return None
+    interpreter = os.path.basename(command[0])
+    if interpreter == "env" and len(command) > 1:
+        interpreter = command[1]
+    # python3, python3.12, etc.
+    return SHEBANG_LANGUAGES.get(interpreter.rstrip("0123456789."))
+
+
+def resolve_language(code: str, filename: str = "") -> str:
+    """
+    Returns the name of the pygments lexer to highlight `code` with when no language was chosen for it.
+
+    The extension of `filename` is checked first, then the #! line of the code, and only when neither of those
+    work is pygments.lexers.guess_lexer() used. guess_lexer() runs every lexer pygments has against the code,
+    which is slow enough that this should be done once when the code is saved rather than when it is viewed.
+    """
+    language = _language_from_filename(code, filename) or _language_from_content(code)
+    if language:
+        return language
+    return _get_alias(guess_lexer(code)) or PLAIN_TEXT_LANGUAGE
+
+
+def highlight_cache_key(code: str, language: str, line_numbers: str) -> str:
+    """
+    Cache key for the highlighted html of `code`. The pygments version and formatter options are part of the hash
+    so that upgrading pygments or changing the options does not serve html highlighted the old way.
+    """
+    content = json.dumps([code, language, line_numbers, FORMATTER_OPTIONS, pygments.__version__], sort_keys=True)
+    return f"{HIGHLIGHT_CACHE_PREFIX}:{hashlib.sha256(content.encode()).hexdigest()}"
+
+
+@functools.cache
+def get_lexer(language: str) -> Lexer:
+    """
+    Returns the shared pygments lexer for `language`. Lexers keep no state between uses, so one instance of each
+    is built per process rather than looking up the lexer class and parsing its options for every code block.
+    """
+    return get_lexer_by_name(language)
+
+
+@functools.cache
+def get_formatter(line_numbers: str) -> Formatter:
+    """
+    Returns the shared pygments html formatter for the line number style `line_numbers`
+    """
+    return get_formatter_by_name("html", linenos=line_numbers, **FORMATTER_OPTIONS)
+
+
+def warm_highlighting_pools(languages: Iterable[str], line_number_styles: Iterable[str]) -> None:
+    """
+    Builds the shared lexers and formatters ahead of time, such as when the app is ready, so that the first
+    requests to show code do not have to.
+    """
+    for language in languages:
+        if language:
+            get_lexer(language)
+    for line_numbers in line_number_styles:
+        get_formatter(line_numbers)
+
+
+def render_highlighted_code(code: str, language: str, line_numbers: str) -> str:
+    """
+    Highlights `code` with pygments, guessing the language if `language` is empty. Does not use the cache.
+    """
+    if language:
+        lexer = get_lexer(language)
+    else:
+        lexer = guess_lexer(code)
+    return highlight(code, lexer, get_formatter(line_numbers))
+
+
+def highlight_code(code: str, language: str, line_numbers: str) -> str:
+    """
+    Returns `code` highlighted as html, from the cache when it has been highlighted before.
+    """
+    cache_key = highlight_cache_key(code, language, line_numbers)
+    if (html := cache.get(cache_key)) is not None:
+        record_cache_lookups(hits=1)
+        return html
+    record_cache_lookups(misses=1)
+    html = render_highlighted_code(code, language, line_numbers)
+    cache.set(cache_key, html, settings.WAGTAIL_BLOCKS_HIGHLIGHT_CACHE_TIMEOUT)
+    return html
+
+
+def highlight_code_batch(items: Iterable[tuple[str, str, str]]) -> dict[tuple[str, str, str], str]:
+    """
+    Highlights many (code, language, line_numbers) tuples at once, such as every code block on a page, and returns
+    the html for each keyed by the tuple. Repeated tuples are only highlighted once.
+
+    The shared cache is checked for all of them in a single round trip. When there are at least
+    WAGTAIL_BLOCKS_HIGHLIGHT_PROCESS_THRESHOLD tuples which were not cached and WAGTAIL_BLOCKS_HIGHLIGHT_PROCESSES
+    is set, they are highlighted in a pool of that many processes. Starting the processes costs more than
+    highlighting a few blocks does, so this only helps on very large pages.
+    """
+    cache_keys = {item: highlight_cache_key(*item) for item in dict.fromkeys(items)}
+    if not cache_keys:
+        return {}
+
+    cached = cache.get_many(list(cache_keys.values()))
+    results = {item: cached[key] for item, key in cache_keys.items() if key in cached}
+    misses = [item for item in cache_keys if item not in results]
+    record_cache_lookups(hits=len(results), misses=len(misses))
+    if not misses:
+        return results
+
+    processes = settings.WAGTAIL_BLOCKS_HIGHLIGHT_PROCESSES
+    codes, languages, line_number_styles = zip(*misses)
+    if processes and len(misses) >= settings.WAGTAIL_BLOCKS_HIGHLIGHT_PROCESS_THRESHOLD:
+        chunksize = max(len(misses) // (processes * 4), 1)
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            htmls = list(
+                executor.map(render_highlighted_code, codes, languages, line_number_styles, chunksize=chunksize)
+            )
+    else:
+        htmls = list(map(render_highlighted_code, codes, languages, line_number_styles))
+
+    highlighted = dict(zip(misses, htmls))
+    cache.set_many(
+        {cache_keys[item]: html for item, html in highlighted.items()},
+        settings.WAGTAIL_BLOCKS_HIGHLIGHT_CACHE_TIMEOUT,
+    )
+    results.update(highlighted)
+    return results
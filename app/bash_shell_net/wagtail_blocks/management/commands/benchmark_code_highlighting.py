@@ -0,0 +1,91 @@
+import statistics
+import textwrap
+import time
+from typing import Callable
+
+from django.core.management.base import BaseCommand
+
+from pygments import highlight
+from pygments.formatters import get_formatter_by_name
+from pygments.lexers import get_lexer_by_name
+
+from bash_shell_net.wagtail_blocks.blocks import CodeBlock, LineNumberStyle
+from bash_shell_net.wagtail_blocks.highlight import FORMATTER_OPTIONS, render_highlighted_code, warm_highlighting_pools
+
+SAMPLES = [
+    (
+        "python",
+        textwrap.dedent(
+            """
+            class RecipePage(Page):
+                def calculate_color_srm(self) -> int:
+                    total_mcu = sum(f.calculate_mcu(self.gallons) for f in self.fermentables.all())
+                    return int(Decimal("1.4922") * (total_mcu ** Decimal("0.6859")))
+            """
+        ),
+    ),
+    (
+        "bash",
+        textwrap.dedent(
+            """
+            #!/bin/bash
+            for f in *.log; do
+                gzip "$f" && echo "compressed $f"
+            done
+            """
+        ),
+    ),
+    (
+        "javascript",
+        textwrap.dedent(
+            """
+            document.querySelectorAll('.js-lightbox a').forEach((link) => {
+              link.addEventListener('click', (event) => { event.preventDefault(); open(link.href); });
+            });
+            """
+        ),
+    ),
+    (
+        "sql",
+        "SELECT id, title FROM wagtailcore_page WHERE live = true ORDER BY first_published_at DESC LIMIT 15;",
+    ),
+]
+
+
+def render_without_pools(code: str, language: str, line_numbers: str) -> str:
+    # how CodeBlock highlighted code before the lexer and formatter pools
+    lexer = get_lexer_by_name(language)
+    formatter = get_formatter_by_name("html", linenos=line_numbers, **FORMATTER_OPTIONS)
+    return highlight(code, lexer, formatter)
+
+
+class Command(BaseCommand):
+    help = (
+        "Times highlighting code blocks with new pygments lexers and formatters for every block against using the "
+        "shared ones. The highlight cache is not used."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options) -> None:
+        warm_highlighting_pools(
+            languages=[language for language, _ in SAMPLES],
+            line_number_styles=[line_numbers for line_numbers, _ in CodeBlock.LINE_NUMBER_CHOICES],
+        )
+        for name, render in [("without pools", render_without_pools), ("with pools", render_highlighted_code)]:
+            timings = self.time_render(render, options["iterations"])
+            self.stdout.write(
+                f"{name}: mean {statistics.mean(timings) * 1000:.3f}ms, "
+                f"median {statistics.median(timings) * 1000:.3f}ms per block over {len(timings)} blocks"
+            )
+
+    def time_render(self, render: Callable[[str, str, str], str], iterations: int) -> list[float]:
+        timings = []
+        for _ in range(iterations):
+            for language, code in SAMPLES:
+                for line_numbers in (LineNumberStyle.NONE, LineNumberStyle.TABLE):
+                    start = time.perf_counter()
+                    render(code, language, line_numbers)
+                    timings.append(time.perf_counter() - start)
+        return timings
@@ -0,0 +1,102 @@
+from django.core.management.base import BaseCommand
+
+from wagtail import blocks
+from wagtail.fields import StreamField
+from wagtail.models import Revision, get_page_models
+
+from bash_shell_net.wagtail_blocks.blocks import CodeBlock, find_code_blocks
+
+
+def can_contain_code_block(block: blocks.Block) -> bool:
+    """
+    Returns True if values of `block` can have a CodeBlock in them
+    """
+    if isinstance(block, CodeBlock):
+        return True
+    if isinstance(block, blocks.ListBlock):
+        return can_contain_code_block(block.child_block)
+    # StreamBlock and StructBlock
+    return any(can_contain_code_block(child_block) for child_block in getattr(block, "child_blocks", {}).values())
+
+
+def get_code_block_streamfields(model) -> list[str]:
+    """
+    Returns the names of the StreamFields defined on `model` which can contain a CodeBlock, including those nested
+    in other blocks
+    """
+    return [
+        field.name
+        for field in model._meta.local_fields
+        if isinstance(field, StreamField) and can_contain_code_block(field.stream_block)
+    ]
+
+
+def get_stale_fields(obj, field_names: list[str]) -> list[str]:
+    """
+    Returns the names of the fields of `obj` with code blocks which do not have current highlighted html stored
+    """
+    stale = []
+    for field_name in field_names:
+        value = getattr(obj, field_name)
+        if value is None:
+            continue
+        # Looking at every block converts them from the stored json, so that saving the value runs
+        # CodeBlock.get_prep_value() rather than saving the stored json as it was. This must not stop at the
+        # first stale block for that reason.
+        if [
+            block
+            for block, block_value in find_code_blocks(value.stream_block, value)
+            if block.needs_prerender(block_value)
+        ]:
+            stale.append(field_name)
+    return stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Stores highlighted html and detected languages in the code blocks of every page, and its live and latest "
+        "revisions, which do not have them yet or have html highlighted by a different version of pygments or "
+        "different formatter options."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options) -> None:
+        for model in get_page_models():
+            if not (field_names := get_code_block_streamfields(model)):
+                continue
+
+            updated = 0
+            updated_revisions = 0
+            queryset = model._base_manager.only("pk", "live_revision", "latest_revision", *field_names).order_by("pk")
+            for page in queryset.iterator(chunk_size=options["batch_size"]):
+                if stale := get_stale_fields(page, field_names):
+                    # update() rather than save() so that this does not create revisions or change updated dates
+                    model._base_manager.filter(pk=page.pk).update(**{name: getattr(page, name) for name in stale})
+                    updated += 1
+                updated_revisions += self.prerender_revisions(
+                    model, field_names, {page.live_revision_id, page.latest_revision_id} - {None}
+                )
+
+            self.stdout.write(
+                f"Updated code blocks for {updated} {model._meta.verbose_name_plural} "
+                f"and {updated_revisions} of their revisions."
+            )
+
+    def prerender_revisions(self, model, field_names: list[str], revision_ids: set[int]) -> int:
+        """
+        Updates the content of the revisions in `revision_ids` the same way as the pages. The live revision is what
+        gets published again, such as by scheduled publishing or reverting, and the latest is what editors load.
+        Returns how many were updated.
+        """
+        updated = 0
+        for revision in Revision.objects.filter(pk__in=revision_ids):
+            revision_page = revision.as_object()
+            if stale := get_stale_fields(revision_page, field_names):
+                for name in stale:
+                    # stored the way wagtail serializes the page for a revision
+                    revision.content[name] = model._meta.get_field(name).value_to_string(revision_page)
+                Revision.objects.filter(pk=revision.pk).update(content=revision.content)
+                updated += 1
+        return updated
@@ -0,0 +1,17 @@
+from django.dispatch import receiver
+
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished
+
+from bash_shell_net.base.cache import delete_cache_pattern
+from bash_shell_net.wagtail_blocks.cache import streamfield_cache_pattern
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def evict_rendered_streamfields(sender, instance: Page, **kwargs) -> None:
+    """
+    Drop the cached StreamField html of a page when it is republished or unpublished. The cache keys include the
+    live revision id, so this just clears out entries which would otherwise sit there unused until they expire.
+    """
+    delete_cache_pattern(streamfield_cache_pattern(instance.pk))
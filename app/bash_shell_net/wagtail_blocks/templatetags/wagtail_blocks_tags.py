@@ -0,0 +1,19 @@
+from django import template
+from django.utils.safestring import SafeString
+
+from wagtail.models import Page
+
+from bash_shell_net.wagtail_blocks.cache import render_streamfield
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def include_cached_block(context, page: Page, field_name: str) -> SafeString:
+    """
+    Renders a StreamField of a page like `{% include_block page.body %}`, using the html cached for the live
+    revision of the page when there is one.
+
+    Usage: `{% include_cached_block page "body" %}`
+    """
+    return render_streamfield(page, field_name, context=context.flatten(), request=context.get("request"))
@@ -1,13 +1,38 @@
 import textwrap
+from io import StringIO
+from unittest import mock
 
-from django.test import SimpleTestCase, TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
 
-from wagtail.blocks import BoundBlock
+from wagtail.blocks import BoundBlock, CharBlock, ListBlock, StreamBlock, StreamValue, StructBlock, TextBlock
 from wagtail.images.models import Image
 from wagtail.images.tests.utils import get_test_image_file
-from wagtail.test.utils import WagtailTestUtils
+from wagtail.models import Revision
+from wagtail.test.utils import WagtailPageTestCase, WagtailTestUtils
+
+from bash_shell_net.base.instrumentation import start_request_stats, stop_request_stats
+from bash_shell_net.base.test_utils import add_wagtail_factory_page
+from bash_shell_net.blog.factories import BlogPageFactory, BlogPageIndexFactory
+from bash_shell_net.blog.models import BlogPage
 
 from . import blocks
+from .cache import render_streamfield, streamfield_cache_key
+from .highlight import (
+    HIGHLIGHT_VERSION,
+    get_formatter,
+    get_lexer,
+    highlight_cache_key,
+    highlight_code,
+    highlight_code_batch,
+    render_highlighted_code,
+    resolve_language,
+)
+from .management.commands.prerender_code_blocks import can_contain_code_block, get_stale_fields
+
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 
 class CodeBlockTest(WagtailTestUtils, SimpleTestCase):
@@ -24,7 +49,7 @@ class CodeBlockTest(WagtailTestUtils, SimpleTestCase):
                     """
                 ),
                 "language": blocks.CodeHighlightLanguage.AUTO,
-                "filename": "foo.py",
+                "filename": "",
                 "display_filename": False,
                 "line_numbers": blocks.LineNumberStyle.NONE,
                 "expected": textwrap.dedent(
@@ -35,6 +60,26 @@ class CodeBlockTest(WagtailTestUtils, SimpleTestCase):
                     """
                 ),
             },
+            {
+                # the language is detected from the filename before falling back to guessing
+                "code": textwrap.dedent(
+                    """
+                    def foo(*args, **kwargs):
+                        print('foobar')
+                    """
+                ),
+                "language": blocks.CodeHighlightLanguage.AUTO,
+                "filename": "foo.py",
+                "display_filename": False,
+                "line_numbers": blocks.LineNumberStyle.NONE,
+                "expected": textwrap.dedent(
+                    """
+                    <div class="codehilite"><pre><span></span><span class="k">def</span><span class="w"> </span><span class="nf">foo</span><span class="p">(</span><span class="o">*</span><span class="n">args</span><span class="p">,</span> <span class="o">**</span><span class="n">kwargs</span><span class="p">):</span>
+                        <span class="nb">print</span><span class="p">(</span><span class="s1">&#39;foobar&#39;</span><span class="p">)</span>
+                    </pre></div>
+                    """
+                ),
+            },
             {
                 "code": textwrap.dedent(
                     """
@@ -60,7 +105,7 @@ class CodeBlockTest(WagtailTestUtils, SimpleTestCase):
         block = blocks.CodeBlock()
 
         for t in test_matrix:
-            with self.subTest(language=t["language"]):
+            with self.subTest(language=t["language"], filename=t["filename"]):
 
                 render_values = block.get_default()
                 render_values.update(
@@ -76,6 +121,45 @@ class CodeBlockTest(WagtailTestUtils, SimpleTestCase):
                 assert isinstance(t["expected"], str)
                 self.assertEqual(t["expected"].strip(), rendered.strip())
 
+    def test_prerendered_html(self):
+        """
+        Test that the highlighted html is stored with the block and used when rendering it
+        """
+        block = blocks.CodeBlock()
+        value = block.get_default()
+        value.update({"code": "print('foobar')", "language": blocks.CodeHighlightLanguage.PYTHON})
+
+        prep_value = block.get_prep_value(value)
+        self.assertEqual(HIGHLIGHT_VERSION, prep_value["highlighted"]["version"])
+        self.assertIn('<span class="nb">print</span>', prep_value["highlighted"]["html"])
+
+        prep_value["highlighted"]["html"] = "<pre>stored</pre>"
+        self.assertIn("<pre>stored</pre>", block.render(block.to_python(prep_value)))
+        self.assertIn("<pre>stored</pre>", block.render(block.bulk_to_python([prep_value])[0]))
+
+        with self.subTest("highlighted with other options"):
+            prep_value["highlighted"]["version"] = "old"
+            rendered = block.render(block.to_python(prep_value))
+            self.assertNotIn("<pre>stored</pre>", rendered)
+            self.assertIn('<span class="nb">print</span>', rendered)
+
+    def test_auto_language_resolved_on_save(self):
+        block = blocks.CodeBlock()
+        value = block.get_default()
+        value.update({"code": "#!/usr/bin/env bash\necho 'foobar'", "language": blocks.CodeHighlightLanguage.AUTO})
+
+        prep_value = block.get_prep_value(value)
+        self.assertEqual("bash", prep_value["resolved_language"])
+
+        del prep_value["highlighted"]
+        with mock.patch("bash_shell_net.wagtail_blocks.blocks.resolve_language") as resolve_language:
+            self.assertEqual("bash", block.get_language(block.to_python(prep_value)))
+            self.assertEqual("bash", block.get_language(block.bulk_to_python([prep_value])[0]))
+        resolve_language.assert_not_called()
+
+        value["language"] = blocks.CodeHighlightLanguage.PYTHON
+        self.assertNotIn("resolved_language", block.get_prep_value(value))
+
     def test_child_blocks(self):
         """
         Tests that the expected keys are in child_blocks.
@@ -220,3 +304,269 @@ class DetailImageChooserBlockTest(WagtailTestUtils, TestCase):
         self.assertEqual(context["children"]["license_url"].value, "https://example.com/")
         self.assertEqual(context["children"]["license_name"].value, "a license")
         self.assertEqual(context["block_definition"], block)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RenderStreamFieldTest(WagtailPageTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+        page = add_wagtail_factory_page(BlogPageFactory, parent_page=blog_index_page, body=[("text", "Some text")])
+        page.save_revision().publish()
+        self.page = BlogPage.objects.get(pk=page.pk)
+
+    def test_render_is_cached(self):
+        cache_key = streamfield_cache_key(self.page.pk, self.page.live_revision_id, "body")
+        html = render_streamfield(self.page, "body")
+        expected = Template("{% load wagtailcore_tags %}{% include_block page.body %}").render(
+            Context({"page": self.page})
+        )
+        self.assertEqual(expected, html)
+        self.assertIn("Some text", html)
+        self.assertEqual(html, cache.get(cache_key))
+
+        cache.set(cache_key, "<p>cached body</p>")
+        self.assertEqual("<p>cached body</p>", render_streamfield(self.page, "body"))
+        rendered = Template('{% load wagtail_blocks_tags %}{% include_cached_block page "body" %}').render(
+            Context({"page": self.page})
+        )
+        self.assertEqual("<p>cached body</p>", rendered)
+
+    def test_preview_is_not_cached(self):
+        request = RequestFactory().get("/")
+        # set by wagtail on preview requests
+        setattr(request, "is_preview", True)
+        self.page.body = [("text", "Draft text")]
+        self.assertIn("Draft text", render_streamfield(self.page, "body", request=request))
+        self.assertIsNone(cache.get(streamfield_cache_key(self.page.pk, self.page.live_revision_id, "body")))
+
+    def test_empty_streamfield(self):
+        self.page.body = None
+        self.assertEqual("", render_streamfield(self.page, "body"))
+
+    def test_publish_evicts_rendered_streamfields(self):
+        with mock.patch("bash_shell_net.wagtail_blocks.signals.delete_cache_pattern") as delete_cache_pattern:
+            self.page.save_revision().publish()
+        delete_cache_pattern.assert_called_once_with(f"wagtail_blocks:streamfield:{self.page.pk}:*")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HighlightCodeTest(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_highlight_is_cached(self):
+        code = "print('foobar')"
+        with mock.patch(
+            "bash_shell_net.wagtail_blocks.highlight.render_highlighted_code", return_value="<pre>highlighted</pre>"
+        ) as render_highlighted_code:
+            stats = start_request_stats()
+            try:
+                self.assertEqual("<pre>highlighted</pre>", highlight_code(code, "python", ""))
+                self.assertEqual("<pre>highlighted</pre>", highlight_code(code, "python", ""))
+                self.assertEqual("<pre>highlighted</pre>", highlight_code(code, "python", ""))
+            finally:
+                stop_request_stats()
+            render_highlighted_code.assert_called_once_with(code, "python", "")
+            # every lookup is counted
+            self.assertEqual((2, 1), (stats.cache_hits, stats.cache_misses))
+
+            highlight_code(code, "python", blocks.LineNumberStyle.TABLE)
+            self.assertEqual(2, render_highlighted_code.call_count)
+
+        self.assertEqual("<pre>highlighted</pre>", cache.get(highlight_cache_key(code, "python", "")))
+
+    def test_cache_key(self):
+        key = highlight_cache_key("print('foobar')", "python", "")
+        self.assertEqual(key, highlight_cache_key("print('foobar')", "python", ""))
+        self.assertNotEqual(key, highlight_cache_key("print('foobar')", "", ""))
+        self.assertNotEqual(key, highlight_cache_key("print('foobar')", "python", "inline"))
+        self.assertNotEqual(key, highlight_cache_key("print('foo')", "python", ""))
+        with mock.patch.dict("bash_shell_net.wagtail_blocks.highlight.FORMATTER_OPTIONS", {"style": "monokai"}):
+            self.assertNotEqual(key, highlight_cache_key("print('foobar')", "python", ""))
+
+
+class PrerenderCodeBlocksCommandTest(WagtailPageTestCase):
+    def test_prerender_code_blocks(self):
+        blog_index_page = add_wagtail_factory_page(BlogPageIndexFactory)
+        page = add_wagtail_factory_page(BlogPageFactory, parent_page=blog_index_page)
+        code_value = {
+            "code": "print('foobar')",
+            "language": "python",
+            "filename": "",
+            "display_filename": False,
+            "line_numbers": "",
+        }
+        raw_body = [{"type": "text", "value": "Some text", "id": "1"}, {"type": "code", "value": code_value, "id": "2"}]
+        revision = page.save_revision()
+        revision.publish()
+        # stored the way it would have been before the highlighted html was saved with the block
+        BlogPage.objects.filter(pk=page.pk).update(body=StreamValue(page.body.stream_block, raw_body, is_lazy=True))
+        revision.content["body"] = raw_body
+        Revision.objects.filter(pk=revision.pk).update(content=revision.content)
+
+        out = StringIO()
+        call_command("prerender_code_blocks", stdout=out)
+        self.assertIn("Updated code blocks for 1 blog pages and 1 of their revisions.", out.getvalue())
+        self.assertIn("Updated code blocks for 0 standard pages and 0 of their revisions.", out.getvalue())
+
+        body = BlogPage.objects.get(pk=page.pk).body
+        self.assertEqual(HIGHLIGHT_VERSION, body.raw_data[1]["value"]["highlighted"]["version"])
+        self.assertEqual("Some text", body.raw_data[0]["value"])
+        revision_body = Revision.objects.get(pk=revision.pk).as_object().body
+        self.assertEqual(HIGHLIGHT_VERSION, revision_body.raw_data[1]["value"]["highlighted"]["version"])
+        self.assertEqual("Some text", revision_body.raw_data[0]["value"])
+
+        out = StringIO()
+        call_command("prerender_code_blocks", stdout=out)
+        self.assertIn("Updated code blocks for 0 blog pages and 0 of their revisions.", out.getvalue())
+
+    def test_nested_code_blocks(self):
+        stream_block = StreamBlock(
+            [
+                ("text", TextBlock()),
+                (
+                    "section",
+                    StructBlock([("heading", CharBlock()), ("examples", ListBlock(blocks.CodeBlock()))]),
+                ),
+            ]
+        )
+        self.assertFalse(can_contain_code_block(stream_block.child_blocks["text"]))
+        self.assertTrue(can_contain_code_block(stream_block))
+
+        code_value = {"code": "print('foobar')", "language": "python", "line_numbers": ""}
+        raw_body = [
+            {"type": "text", "value": "Some text", "id": "1"},
+            {"type": "section", "value": {"heading": "Examples", "examples": [code_value]}, "id": "2"},
+        ]
+        page = mock.Mock(body=StreamValue(stream_block, raw_body, is_lazy=True))
+        self.assertEqual(["body"], get_stale_fields(page, ["body"]))
+
+        prep_value = stream_block.get_prep_value(page.body)
+        highlighted = prep_value[1]["value"]["examples"][0]["value"]["highlighted"]
+        self.assertEqual(HIGHLIGHT_VERSION, highlighted["version"])
+        page.body = stream_block.to_python(prep_value)
+        self.assertEqual([], get_stale_fields(page, ["body"]))
+
+
+class ResolveLanguageTest(SimpleTestCase):
+    def test_resolve_language(self):
+        test_matrix = [
+            ("print('foobar')", "foo.py", "python"),
+            ("FROM python:3.13", "Dockerfile", "docker"),
+            ("echo 'foobar'", "foo.sh", "bash"),
+            ("#!/bin/bash\necho 'foobar'", "", "bash"),
+            ("#!/usr/bin/env python3\nprint('foobar')", "", "python"),
+            ("#!/usr/bin/env python3\nprint('foobar')", "foo.txt", "text"),
+            ("<?php echo 'foobar'; ?>", "", "php"),
+        ]
+        for code, filename, expected in test_matrix:
+            with self.subTest(code=code, filename=filename):
+                with mock.patch("bash_shell_net.wagtail_blocks.highlight.guess_lexer") as guess_lexer:
+                    self.assertEqual(expected, resolve_language(code, filename))
+                guess_lexer.assert_not_called()
+
+    def test_falls_back_to_guess_lexer(self):
+        with mock.patch("bash_shell_net.wagtail_blocks.highlight.guess_lexer") as guess_lexer:
+            guess_lexer.return_value.aliases = ["html"]
+            self.assertEqual("html", resolve_language("<p>foobar</p>", "foo"))
+        guess_lexer.assert_called_once_with("<p>foobar</p>")
+
+    def test_lexers_without_aliases(self):
+        with mock.patch("bash_shell_net.wagtail_blocks.highlight.get_lexer_for_filename") as get_lexer_for_filename:
+            get_lexer_for_filename.return_value.aliases = []
+            # the #! line is used instead
+            self.assertEqual("bash", resolve_language("#!/bin/bash\necho 'foobar'", "foo.sh"))
+
+        with mock.patch("bash_shell_net.wagtail_blocks.highlight.guess_lexer") as guess_lexer:
+            guess_lexer.return_value.aliases = []
+            self.assertEqual("text", resolve_language("<p>foobar</p>", "foo"))
+
+
+class HighlightingPoolTest(SimpleTestCase):
+    def test_pools(self):
+        self.assertIs(get_lexer("python"), get_lexer("python"))
+        self.assertIs(get_formatter(blocks.LineNumberStyle.TABLE), get_formatter(blocks.LineNumberStyle.TABLE))
+        self.assertIsNot(get_formatter(blocks.LineNumberStyle.TABLE), get_formatter(blocks.LineNumberStyle.NONE))
+
+    def test_warm_code_block_highlighting(self):
+        get_lexer.cache_clear()
+        get_formatter.cache_clear()
+        blocks.warm_code_block_highlighting()
+        # every language other than AUTO
+        self.assertEqual(len(blocks.CodeBlock.LANGUAGE_CHOICES) - 1, get_lexer.cache_info().currsize)
+        self.assertEqual(len(blocks.CodeBlock.LINE_NUMBER_CHOICES), get_formatter.cache_info().currsize)
+
+    def test_shared_lexers_and_formatters_highlight_the_same(self):
+        code = "def foo():\n    return 'foobar'"
+        for line_numbers in [blocks.LineNumberStyle.NONE, blocks.LineNumberStyle.TABLE, blocks.LineNumberStyle.INLINE]:
+            with self.subTest(line_numbers=line_numbers):
+                first = render_highlighted_code(code, "python", line_numbers)
+                self.assertEqual(first, render_highlighted_code(code, "python", line_numbers))
+                self.assertIn('<span class="k">def</span>', first)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command("benchmark_code_highlighting", iterations=1, stdout=out)
+        self.assertIn("without pools: mean", out.getvalue())
+        self.assertIn("with pools: mean", out.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HighlightCodeBlocksTest(WagtailPageTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.python_code = {"code": "print('foobar')", "language": "python", "line_numbers": ""}
+        self.bash_code = {"code": "#!/bin/bash\necho 'foobar'", "language": "", "line_numbers": "table"}
+        raw_body = [
+            {"type": "code", "value": self.python_code, "id": "1"},
+            {"type": "text", "value": "Some text", "id": "2"},
+            {"type": "code", "value": self.bash_code, "id": "3"},
+            {"type": "code", "value": self.python_code, "id": "4"},
+        ]
+        stream_block = BlogPage.body.field.stream_block
+        self.body = StreamValue(stream_block, raw_body, is_lazy=True)
+
+    def test_highlight_code_blocks(self):
+        expected = Template("{% load wagtailcore_tags %}{% include_block body %}").render(
+            Context({"body": StreamValue(self.body.stream_block, self.body.raw_data, is_lazy=True)})
+        )
+        with mock.patch(
+            "bash_shell_net.wagtail_blocks.blocks.highlight_code_batch", wraps=highlight_code_batch
+        ) as batch:
+            blocks.highlight_code_blocks(self.body)
+        batch.assert_called_once()
+        self.assertEqual("bash", self.body[2].value.resolved_language)
+        self.assertEqual(HIGHLIGHT_VERSION, self.body[0].value.highlighted["version"])
+
+        with mock.patch("bash_shell_net.wagtail_blocks.blocks.highlight_code") as highlight_code:
+            html = Template("{% load wagtailcore_tags %}{% include_block body %}").render(Context({"body": self.body}))
+        highlight_code.assert_not_called()
+        self.assertEqual(expected, html)
+
+    def test_highlight_code_batch(self):
+        items = [
+            (self.python_code["code"], "python", ""),
+            (self.bash_code["code"], "bash", "table"),
+            (self.python_code["code"], "python", ""),
+        ]
+        cache.set(highlight_cache_key(*items[1]), "<pre>cached</pre>")
+        with mock.patch(
+            "bash_shell_net.wagtail_blocks.highlight.render_highlighted_code", wraps=render_highlighted_code
+        ) as render:
+            results = highlight_code_batch(items)
+        render.assert_called_once_with(*items[0])
+        self.assertEqual({items[0]: render_highlighted_code(*items[0]), items[1]: "<pre>cached</pre>"}, results)
+        self.assertEqual(results[items[0]], cache.get(highlight_cache_key(*items[0])))
+        self.assertEqual({}, highlight_code_batch([]))
+
+    @override_settings(WAGTAIL_BLOCKS_HIGHLIGHT_PROCESSES=2, WAGTAIL_BLOCKS_HIGHLIGHT_PROCESS_THRESHOLD=2)
+    def test_highlight_code_batch_process_pool(self):
+        items = [(f"print({i})", "python", "") for i in range(4)]
+        self.assertEqual(
+            {item: render_highlighted_code(*item) for item in items},
+            highlight_code_batch(items),
+        )
@@ -112,6 +112,10 @@ MIDDLEWARE = [
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
     "csp.middleware.CSPMiddleware",
     "django_structlog.middlewares.RequestMiddleware",
+    # must come after RequestMiddleware, and before PageCacheMiddleware to count its cache lookups
+    "bash_shell_net.base.middleware.RequestInstrumentationMiddleware",
+    # must come after CSPMiddleware
+    "bash_shell_net.base.middleware.PageCacheMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
 ]
 
@@ -183,6 +187,7 @@ INSTALLED_APPS = [
     "bash_shell_net.projects",
     "bash_shell_net.base",
     "bash_shell_net.on_tap",
+    "bash_shell_net.wagtail_blocks",
 ]
 
 COVERAGE_PATH_EXCLUDES = [r".svn", r".git", r"templates", r"static"]
@@ -207,6 +212,46 @@ CACHES = {
     },
 }
 
+# How long rendered ingredients of recipes scaled to a specific volume are cached for
+ON_TAP_SCALED_RECIPE_CACHE_TIMEOUT = env("ON_TAP_SCALED_RECIPE_CACHE_TIMEOUT", int, 60 * 60 * 24)
+# How long the rendered html of page StreamFields is cached for
+WAGTAIL_BLOCKS_STREAMFIELD_CACHE_TIMEOUT = env("WAGTAIL_BLOCKS_STREAMFIELD_CACHE_TIMEOUT", int, 60 * 60 * 24)
+# How long code highlighted by pygments is cached for. The keys are a hash of the code, so nothing goes stale.
+WAGTAIL_BLOCKS_HIGHLIGHT_CACHE_TIMEOUT = env("WAGTAIL_BLOCKS_HIGHLIGHT_CACHE_TIMEOUT", int, 60 * 60 * 24 * 30)
+# Processes used to highlight the code blocks of a page which were not already highlighted, when there are at least
+# WAGTAIL_BLOCKS_HIGHLIGHT_PROCESS_THRESHOLD of them. 0 highlights them in the web process.
+WAGTAIL_BLOCKS_HIGHLIGHT_PROCESSES = env("WAGTAIL_BLOCKS_HIGHLIGHT_PROCESSES", int, 0)
+WAGTAIL_BLOCKS_HIGHLIGHT_PROCESS_THRESHOLD = env("WAGTAIL_BLOCKS_HIGHLIGHT_PROCESS_THRESHOLD", int, 50)
+# How long the list of project languages is cached for. It is cleared when a language is saved or deleted.
+PROJECTS_LANGUAGES_CACHE_TIMEOUT = env("PROJECTS_LANGUAGES_CACHE_TIMEOUT", int, 60 * 60 * 24)
+# How long each process keeps its own copy of the list of project languages before checking the shared cache again
+PROJECTS_LANGUAGES_LOCAL_CACHE_TIMEOUT = env("PROJECTS_LANGUAGES_LOCAL_CACHE_TIMEOUT", int, 60)
+# How long full pages are cached for anonymous visitors. They are also purged when a page they show is published.
+PAGE_CACHE_TIMEOUT = env("PAGE_CACHE_TIMEOUT", int, 60 * 60)
+# The query string parameters which change what a cached page shows. Any others are left out of the cache keys.
+# "p" is the page number of the sitemaps.
+PAGE_CACHE_QUERY_PARAMS = ["cursor", "scale_volume", "scale_unit", "p"]
+# Cached paths which list pages from all over the site and are purged whenever any page is published.
+# The sitemap sections should match the sitemaps in config/urls.py.
+PAGE_CACHE_SITE_WIDE_PATHS = [
+    "/sitemap.xml",
+    "/sitemap-on_tap.xml",
+    "/sitemap-on_tap-batches.xml",
+    "/sitemap-on_tap-recipes.xml",
+    "/sitemap-blog.xml",
+    "/sitemap-project.xml",
+    "/sitemap-projects.xml",
+    "/feeds/blog/rss/",
+]
+# Fraction of requests, from 0 to 1, whose SQL, template, and cache timings are added to the request_finished log
+REQUEST_INSTRUMENTATION_SAMPLE_RATE = env("REQUEST_INSTRUMENTATION_SAMPLE_RATE", float, 1.0)
+# How many times a query can run with different parameters in one request before DuplicateQueryMiddleware flags it,
+# and whether it raises DuplicateQueriesError rather than logging them. The middleware is not used by default.
+DUPLICATE_QUERIES_THRESHOLD = env("DUPLICATE_QUERIES_THRESHOLD", int, 5)
+DUPLICATE_QUERIES_RAISE = env("DUPLICATE_QUERIES_RAISE", bool, False)
+# Paths starting with these are not checked, since the repeated queries there are in wagtail and django
+DUPLICATE_QUERIES_IGNORED_PATHS = ["/cms/", "/admin/", "/__debug__/"]
+
 # S3/DO spaces settings
 AWS_IS_GZIPPED = True
 AWS_ACCESS_KEY_ID = os.environ.get("DO_ACCESS_KEY_ID", "")
@@ -223,6 +268,8 @@ AWS_STORAGE_BUCKET_NAME = "bash-shell-net"
 # markdown extensions
 # Not using markdown anymore... not sure I need this. may still be using it in the projects pages, though.
 MARKDOWN_EXTENSIONS = ["markdown.extensions.extra", "markdown.extensions.toc", "markdown.extensions.codehilite"]
+# How long html converted from markdown is cached for. The keys are a hash of the markdown, so nothing goes stale.
+BLOG_MARKDOWN_CACHE_TIMEOUT = env("BLOG_MARKDOWN_CACHE_TIMEOUT", int, 60 * 60 * 24 * 30)
 
 # wagtail settings
 WAGTAIL_SITE_NAME = "bash-shell.net"
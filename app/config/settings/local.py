@@ -12,6 +12,13 @@ SECURE_SSL_REDIRECT = False
 SESSION_COOKIE_SECURE = False
 CSRF_COOKIE_SECURE = False
 
+# log queries repeated too many times in a request. See bash_shell_net.base.duplicate_queries
+if env("DUPLICATE_QUERIES_MIDDLEWARE", bool, False):
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django_structlog.middlewares.RequestMiddleware") + 1,
+        "bash_shell_net.base.middleware.DuplicateQueryMiddleware",
+    )
+
 structlog.configure(
     processors=[
         structlog.stdlib.filter_by_level,
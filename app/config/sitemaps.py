@@ -1,4 +1,9 @@
+from functools import cached_property
+from typing import cast
+
 from django.contrib.sitemaps import Sitemap
+from django.core.paginator import Paginator
+from django.db.models import Count, Max, Q, QuerySet
 from django.urls import reverse
 
 from wagtail.contrib.sitemaps import Sitemap as WagtailSitemap
@@ -8,7 +13,30 @@ from bash_shell_net.on_tap.models import BatchLogPage, OnTapPage, RecipePage
 from bash_shell_net.projects.models import Project
 
 
-class BlogSitemap(WagtailSitemap):
+class PageSitemap(WagtailSitemap):
+    """
+    Base for the sitemaps of wagtail pages whose lastmod is last_published_at.
+
+    items() filters on public(), which queries every PageViewRestriction each time it is called, so the paginator
+    is kept for the sitemap rather than calling items() again for each use.
+    """
+
+    @cached_property
+    def paginator(self) -> Paginator:
+        return Paginator(self._items(), self.limit)
+
+    def get_latest_lastmod(self):
+        # Sitemap loads every page and calls lastmod() on each of them to find this for the sitemap index. That
+        # gives no lastmod when any page has none, since None cannot be compared to a datetime, so this does too.
+        # The paginator's object_list is the QuerySet from items().
+        pages = cast(QuerySet, self.paginator.object_list)
+        result = pages.aggregate(
+            latest=Max("last_published_at"), unpublished=Count("pk", filter=Q(last_published_at__isnull=True))
+        )
+        return None if result["unpublished"] else result["latest"]
+
+
+class BlogSitemap(PageSitemap):
     """
     Sitemap for posts
     """
@@ -23,7 +51,7 @@ class BlogSitemap(WagtailSitemap):
         return obj.last_published_at
 
 
-class OnTapSitemap(WagtailSitemap):
+class OnTapSitemap(PageSitemap):
     """
     Sitemap for posts
     """
@@ -40,7 +68,7 @@ class OnTapSitemap(WagtailSitemap):
         return obj.last_published_at
 
 
-class RecipePageSitemap(WagtailSitemap):
+class RecipePageSitemap(PageSitemap):
     """
     Sitemap for on_tap.RecipePage
     """
@@ -57,7 +85,7 @@ class RecipePageSitemap(WagtailSitemap):
         return obj.last_published_at
 
 
-class BatchLogPageSitemap(WagtailSitemap):
+class BatchLogPageSitemap(PageSitemap):
     """
     Sitemap for on_tap.BatchLogPage
     """
@@ -13,6 +13,7 @@ from wagtail.documents import urls as wagtaildocs_urls
 
 from debug_toolbar.toolbar import debug_toolbar_urls
 
+from bash_shell_net.base.page_cache import full_page_cache
 from bash_shell_net.blog.feeds import BlogFeedRss
 
 from .sitemaps import BatchLogPageSitemap, BlogSitemap, OnTapSitemap, ProjectSiteMap, ProjectsSiteMap, RecipePageSitemap
@@ -34,15 +35,21 @@ urlpatterns = [
     path("documents/", include(wagtaildocs_urls)),
     path("admin/doc/", include("django.contrib.admindocs.urls")),
     path("admin/", admin.site.urls),
+    # the paths of these should be in settings.PAGE_CACHE_SITE_WIDE_PATHS
     path(
         "sitemap.xml",
-        index,
+        full_page_cache(index),
         {
             "sitemaps": sitemaps,
         },
     ),
-    path("sitemap-<section>.xml", sitemap, {"sitemaps": sitemaps}, name="django.contrib.sitemaps.views.sitemap"),
-    path("feeds/blog/rss/", BlogFeedRss()),
+    path(
+        "sitemap-<section>.xml",
+        full_page_cache(sitemap),
+        {"sitemaps": sitemaps},
+        name="django.contrib.sitemaps.views.sitemap",
+    ),
+    path("feeds/blog/rss/", full_page_cache(BlogFeedRss())),
     path("about/", TemplateView.as_view(template_name="about.html"), name="about"),
     path("opensource/", TemplateView.as_view(template_name="open_source.html"), name="opensource"),
     path("projects/", include("bash_shell_net.projects.urls")),
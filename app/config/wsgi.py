@@ -29,6 +29,11 @@ from django.core.wsgi import get_wsgi_application
 
 application = get_wsgi_application()
 
+# Build the shared pygments lexers and formatters before the first request that shows code needs them
+from bash_shell_net.wagtail_blocks.blocks import warm_code_block_highlighting
+
+warm_code_block_highlighting()
+
 # Apply WSGI middleware here.
 # from helloworld.wsgi import HelloWorldApplication
 # application = HelloWorldApplication(application)